@@ -0,0 +1,35 @@
+import json
+import time
+
+from livekit.agents.tokenize._basic_sent import split_sentences
+
+GOLDEN_FILE = "sentences_golden.json"
+ROUNDS = 200
+
+# --- Check the output against the golden corpus ---
+with open(GOLDEN_FILE, encoding="utf-8") as f:
+    golden = json.load(f)
+
+for case in golden:
+    got = split_sentences(case["text"], case["min_sentence_len"], case["retain_format"])
+    assert [list(s) for s in got] == case["sentences"], case["text"]
+
+print(f"{len(golden)} golden cases ok")
+
+# --- Micro-benchmark: a short TTS sentence, an LLM reply, the whole corpus ---
+sentence = "Dr. Smith lives at 221 B. Baker St. in London."
+reply = (
+    "Sure! Our 4N/5D Kerala package starts at Rs. 24,999 per person, it covers Munnar, "
+    "Thekkady and Alleppey. You stay in 3.5 star hotels with breakfast included, and the "
+    "houseboat night in Alleppey has all meals. Flights aren't included, but I can add them "
+    "from Delhi or Mumbai. The best time to go is between October and March... the monsoon "
+    "makes the hill roads slow. Would you like me to share the day by day itinerary? "
+) * 4
+corpus = " ".join(case["text"] for case in golden if not case["retain_format"])
+
+for name, text in (("sentence", sentence), ("reply", reply), ("corpus", corpus)):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        split_sentences(text)
+    elapsed = (time.perf_counter() - start) / ROUNDS
+    print(f"{name:>8} ({len(text)} chars): {elapsed * 1e6:.1f} us per call")
@@ -1,14 +1,41 @@
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader
+import argparse
+
 from dotenv import load_dotenv
-load_dotenv("file.env")
 
-# Load PDF data from 'data/' folder
-documents = SimpleDirectoryReader('data').load_data()
+from catalog import CATALOG_FILE, Catalog
+from index_builder import DEFAULT_BATCH_SIZE, DEFAULT_MAX_CONCURRENCY, build
+from vector_store import VectorStore, convert_llama_index
+
+load_dotenv("file.env")
 
-# Build the index
-index = VectorStoreIndex.from_documents(documents)
+DATA_DIR = "data"
+PERSIST_DIR = "query-engine-storage"
+VECTORS_DIR = "query-engine-storage/vectors"
 
-# Persist the index to disk
-index.storage_context.persist(persist_dir="query-engine-storage")
+parser = argparse.ArgumentParser()
+parser.add_argument("--convert-only", action="store_true", help="Only convert the existing llama-index index to the binary store")
+parser.add_argument("--full", action="store_true", help="Re-embed every chunk instead of only the changed ones")
+parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Chunks per embedding request")
+parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="Embedding requests in flight")
+args = parser.parse_args()
 
-print("✅ Index built and saved to 'query-engine-storage/'")
+if args.convert_only:
+    manifest = convert_llama_index(PERSIST_DIR, VECTORS_DIR, dtype=args.dtype)
+    Catalog.from_nodes(VectorStore.open(VECTORS_DIR).nodes).write(f"{VECTORS_DIR}/{CATALOG_FILE}")
+    print(f"✅ {manifest.count} vectors ({manifest.dtype}) saved to '{VECTORS_DIR}/'")
+else:
+    # Only the files of 'data/' that changed since the last build are read and embedded
+    stats = build(
+        DATA_DIR,
+        VECTORS_DIR,
+        dtype=args.dtype,
+        batch_size=args.batch_size,
+        max_concurrency=args.max_concurrency,
+        full=args.full,
+    )
+    print(
+        f"✅ {stats.changed_files}/{stats.files} files changed, "
+        f"{stats.embedded_chunks}/{stats.chunks} chunks embedded, "
+        f"store saved to '{VECTORS_DIR}/'"
+    )
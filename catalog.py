@@ -0,0 +1,488 @@
+"""Structured side index of the travel packages, for exact filters.
+
+Built from the knowledge base chunks at `build_index.py` time and stored next to the
+vectors as `catalog.npz`: one row per package (or price tier), one numpy array per
+column (destination, duration, price, hotel stars, vehicle and meal tags). A search is a
+vectorized mask + lexsort over the columns, no embedding or LLM call.
+
+The fields are extracted with regexes from the brochures and the group departure table,
+a field the brochure doesn't mention is "unknown": it never excludes the package, it
+only ranks it below the ones that are known to match.
+
+`get_package_search` loads the catalog once per process and reloads it when the store is
+rebuilt, with the same index version check as the query engine (`retriever.IndexVersion`).
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import functools
+import logging
+import os
+import re
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from livekit.agents.llm.openai import FunctionTool, Tool
+from retriever import IndexVersion
+from vector_store import Node, VectorStore
+
+CATALOG_FILE = "catalog.npz"
+DEFAULT_LIMIT = 3
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# tags are bits of the `vehicle` and `meals` columns, a filter matches if the package has
+# any of the accepted bits, and is a known mismatch if it has another bit of the same group
+VEHICLE_TAGS: dict[str, re.Pattern[str]] = {
+    "private": re.compile(r"private (?:vehicle|transport|basis)|\(private\)"),
+    "shared": re.compile(r"\bsharing\b|\bshared\b"),
+    "ac": re.compile(r"air-conditioned|(?<!non )(?<!non-)(?<!non – )\ba/?c (?:vehicle|coach)"),
+    "non_ac": re.compile(r"non ?[–-]? ?a/?c\b"),
+    "suv": re.compile(r"\bsuv\b|innova|scorpio|xylo|ertiga"),
+    "sedan": re.compile(r"\bsedan\b|dzire|etios"),
+    "jeep": re.compile(r"\bjeep\b"),
+    "van": re.compile(r"\bvan\b|tempo traveller"),
+}
+MEAL_TAGS: dict[str, re.Pattern[str]] = {
+    "breakfast": re.compile(r"\bcp plan\b|breakfast only"),
+    "half_board": re.compile(r"\bmap plan\b|breakfast (?:&|and) dinner"),
+    "full_board": re.compile(r"full board|all meals|\bap plan\b"),
+    "veg": re.compile(r"(?<!non )(?<!non-)(?<!non – )\b(?:pure )?veg(?:etarian)?\b|\bjain\b"),
+    "non_veg": re.compile(r"non ?[–-]? ?veg(?:etarian)?\b"),
+}
+_VEHICLE_GROUPS = (("private", "shared"), ("ac", "non_ac"), ("suv", "sedan", "jeep", "van"))
+_MEAL_GROUPS = (("breakfast", "half_board", "full_board"), ("veg", "non_veg"))
+# a meal plan includes the smaller ones
+_MEAL_ACCEPTS = {
+    "breakfast": ("breakfast", "half_board", "full_board"),
+    "half_board": ("half_board", "full_board"),
+    "full_board": ("full_board",),
+    "veg": ("veg",),
+    "non_veg": ("non_veg",),
+}
+
+_DURATION_RE = re.compile(r"(\d+)\s*N(?:ights?)?\s*[/,:]?\s*(\d+)\s*D(?:ays?)?", re.IGNORECASE)
+_DAY_RE = re.compile(r"\bDay\s+(\d+)\b", re.IGNORECASE)
+_PRICE_RE = re.compile(r"(?:₹|\bRs\.?|\bINR)\s*(\d[\d,]*)", re.IGNORECASE)
+_TIER_RE = re.compile(r"(\d)\s*\*\s*[-–]\s*(?:₹|\bRs\.?|\bINR)\s*(\d[\d,]*)", re.IGNORECASE)
+_STARS_RE = re.compile(r"(\d)\s*(?:-\s*)?(?:star\b|\*)", re.IGNORECASE)
+_TABLE_ROW_RE = re.compile(
+    r"((?:[A-Z][A-Za-z]*|\([^)]*\))(?:\s+(?:[A-Z][A-Za-z]*|\([^)]*\))){0,2})\s+(\d+)N,(\d+)D"
+)
+_TABLE_HEADER_WORDS = {
+    "Destination",
+    "No",
+    "Of",
+    "Days",
+    "Departure",
+    "Dates",
+    "Experience",
+    "Price",
+}
+_AMOUNT_RE = re.compile(r"\b\d{1,3}(?:,\d{2,3})+\b|\b\d{4,7}\b")
+_NAME_NOISE_RE = re.compile(
+    r"\.pdf$|\b\d+\s*n\s*[:/,]?\s*\d+\s*d\b|[–-]?\s*\d+\s*nights?\s*:?\s*\d+\s*days?|\bplan\b"
+    r"|\bgroup tour\b|\bhidden gems\b|[-–:]\s*$",
+    re.IGNORECASE,
+)
+
+
+@dataclasses.dataclass
+class Package:
+    name: str
+    destination: str
+    source: str
+    text: str = ""
+    nights: int = -1
+    days: int = -1
+    price: float = float("nan")
+    hotel_stars: int = 0
+    vehicle: int = 0
+    meals: int = 0
+
+
+def _mask(tags: dict[str, re.Pattern[str]], text: str) -> int:
+    return sum(1 << i for i, pattern in enumerate(tags.values()) if pattern.search(text))
+
+
+def _bits(tags: dict[str, re.Pattern[str]], names: Iterable[str]) -> int:
+    index = list(tags)
+    return sum(1 << index.index(name) for name in names)
+
+
+def _tag_filter(
+    column: np.ndarray,
+    tags: dict[str, re.Pattern[str]],
+    groups: tuple[tuple[str, ...], ...],
+    tag: str,
+    accepts: Iterable[str],
+) -> tuple[np.ndarray, np.ndarray]:
+    """(matched, known) masks of a tag filter"""
+    group = next(g for g in groups if tag in g)
+    matched = (column & _bits(tags, accepts)) != 0
+    known = (column & _bits(tags, group)) != 0
+    return matched, known
+
+
+def _tag_names(tags: dict[str, re.Pattern[str]], mask: int) -> list[str]:
+    return [name for i, name in enumerate(tags) if mask & (1 << i)]
+
+
+def _amount(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def _destination(name: str) -> str:
+    name = _NAME_NOISE_RE.sub(" ", name.replace("_", " "))
+    name = re.sub(r"^\d+\)\s*", "", name)
+    return _WHITESPACE_RE.sub(" ", name).strip(" -–:").title()
+
+
+def _parse_table(text: str) -> list[tuple[str, int, int, float]]:
+    """Rows of the group departure table: destination, nights, days, price"""
+    rows = []
+    matches = list(_TABLE_ROW_RE.finditer(text))
+    for m, next_m in zip(matches, matches[1:] + [None]):
+        words = m.group(1).split()
+        while words and words[0] in _TABLE_HEADER_WORDS:
+            words.pop(0)
+        segment = text[m.end() : next_m.start() if next_m else len(text)]
+        amounts = [_amount(a) for a in _AMOUNT_RE.findall(segment)]
+        amounts = [a for a in amounts if a >= 1000]
+        if words and amounts:
+            rows.append((" ".join(words), int(m.group(2)), int(m.group(3)), amounts[-1]))
+    return rows
+
+
+def _parse_package(source: str, name: str, text: str) -> list[Package]:
+    lower = text.lower()
+    pkg = Package(
+        name=_WHITESPACE_RE.sub(" ", re.sub(r"\.pdf$", "", name, flags=re.IGNORECASE)).strip(),
+        destination=_destination(name),
+        source=source,
+        text=f"{name} {text}".lower(),
+        vehicle=_mask(VEHICLE_TAGS, lower),
+        meals=_mask(MEAL_TAGS, lower),
+    )
+
+    if m := _DURATION_RE.search(name) or _DURATION_RE.search(text):
+        pkg.nights, pkg.days = int(m.group(1)), int(m.group(2))
+    elif days := [int(d) for d in _DAY_RE.findall(text)]:
+        pkg.days = max(days)
+        pkg.nights = pkg.days - 1
+
+    if m := _STARS_RE.search(text):
+        pkg.hotel_stars = int(m.group(1))
+
+    tiers = _TIER_RE.findall(text)
+    if len(tiers) > 1:
+        return [
+            dataclasses.replace(
+                pkg, name=f"{pkg.name} ({stars} star)", hotel_stars=int(stars), price=_amount(price)
+            )
+            for stars, price in tiers
+        ]
+
+    if m := _PRICE_RE.search(text):
+        pkg.price = _amount(m.group(1))
+    return [pkg]
+
+
+def extract_packages(nodes: list[Node]) -> list[Package]:
+    """One package per source document (per price tier when the brochure has several),
+    prices missing from a brochure are taken from the group departure table"""
+    docs: dict[str, tuple[str, list[str]]] = {}
+    for node in nodes:
+        source = str(node.metadata.get("file_name") or node.ref_doc_id or node.id)
+        docs.setdefault(source, (source.strip(), []))[1].append(node.text)
+
+    packages: list[Package] = []
+    table: list[tuple[str, int, int, float]] = []
+    table_source = ""
+    for source, (name, texts) in docs.items():
+        text = _WHITESPACE_RE.sub(" ", " ".join(texts))
+        if len(rows := _parse_table(text)) >= 3:
+            table.extend(rows)
+            table_source = source
+            continue
+        packages.extend(_parse_package(source, name, text))
+
+    for dest, nights, days, price in table:
+        words = re.findall(r"[a-z]+", dest.lower())
+        matching = [p for p in packages if p.nights == nights and all(w in p.text for w in words)]
+        for p in matching:
+            if np.isnan(p.price):
+                p.price = price
+        if not matching:
+            packages.append(
+                Package(
+                    name=f"{dest} {nights}N{days}D",
+                    destination=dest,
+                    source=table_source,
+                    text=dest.lower(),
+                    nights=nights,
+                    days=days,
+                    price=price,
+                )
+            )
+
+    return packages
+
+
+class Catalog:
+    def __init__(self, columns: dict[str, np.ndarray]) -> None:
+        self._columns = columns
+        self._names = columns["name"]
+        self._destination = columns["destination"]
+        self._text = columns["text"]
+        self._nights = columns["nights"]
+        self._days = columns["days"]
+        self._price = columns["price"]
+        self._hotel_stars = columns["hotel_stars"]
+        self._vehicle = columns["vehicle"]
+        self._meals = columns["meals"]
+
+    @classmethod
+    def from_packages(cls, packages: list[Package]) -> Catalog:
+        return cls(
+            {
+                "name": np.array([p.name for p in packages], dtype=str),
+                "destination": np.array([p.destination for p in packages], dtype=str),
+                "source": np.array([p.source for p in packages], dtype=str),
+                "text": np.array([p.text for p in packages], dtype=str),
+                "nights": np.array([p.nights for p in packages], dtype=np.int16),
+                "days": np.array([p.days for p in packages], dtype=np.int16),
+                "price": np.array([p.price for p in packages], dtype=np.float64),
+                "hotel_stars": np.array([p.hotel_stars for p in packages], dtype=np.int8),
+                "vehicle": np.array([p.vehicle for p in packages], dtype=np.uint16),
+                "meals": np.array([p.meals for p in packages], dtype=np.uint16),
+            }
+        )
+
+    @classmethod
+    def from_nodes(cls, nodes: list[Node]) -> Catalog:
+        return cls.from_packages(extract_packages(nodes))
+
+    @classmethod
+    def open(cls, path: str | os.PathLike[str]) -> Catalog:
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def write(self, path: str | os.PathLike[str]) -> None:
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **self._columns)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def search(
+        self,
+        *,
+        destination: str | None = None,
+        max_price: float | None = None,
+        min_hotel_stars: int | None = None,
+        vehicle: str | None = None,
+        meal_plan: str | None = None,
+        nights: int | None = None,
+        limit: int = DEFAULT_LIMIT,
+    ) -> list[dict[str, Any]]:
+        """Packages matching the filters, best first.
+
+        Ranked by the number of filters known to match, then by price. Unknown fields
+        don't exclude a package, known mismatches do.
+        """
+        n = len(self)
+        keep = np.ones(n, dtype=bool)
+        score = np.zeros(n, dtype=np.int16)
+
+        if destination:
+            keep &= np.char.find(self._text, destination.strip().lower()) >= 0
+
+        if max_price is not None:
+            known = ~np.isnan(self._price)
+            keep &= ~known | (self._price <= max_price)
+            score += known
+
+        if min_hotel_stars:
+            known = self._hotel_stars > 0
+            keep &= ~known | (self._hotel_stars >= min_hotel_stars)
+            score += known
+
+        if nights is not None:
+            known = self._nights >= 0
+            keep &= ~known | (self._nights == nights)
+            score += known
+
+        if vehicle in VEHICLE_TAGS:
+            matched, known = _tag_filter(
+                self._vehicle, VEHICLE_TAGS, _VEHICLE_GROUPS, vehicle, (vehicle,)
+            )
+            keep &= matched | ~known
+            score += matched
+
+        if meal_plan in MEAL_TAGS:
+            matched, known = _tag_filter(
+                self._meals, MEAL_TAGS, _MEAL_GROUPS, meal_plan, _MEAL_ACCEPTS[meal_plan]
+            )
+            keep &= matched | ~known
+            score += matched
+
+        idx = np.flatnonzero(keep)
+        # lexsort: last key first, unknown prices (nan) sort last
+        order = np.lexsort((self._price[idx], -score[idx]))
+        return [self._row(i) for i in idx[order][:limit]]
+
+    def _row(self, i: int) -> dict[str, Any]:
+        price = float(self._price[i])
+        return {
+            "name": str(self._names[i]),
+            "destination": str(self._destination[i]),
+            "nights": int(self._nights[i]) if self._nights[i] >= 0 else None,
+            "days": int(self._days[i]) if self._days[i] >= 0 else None,
+            "price": None if np.isnan(price) else price,
+            "hotel_stars": int(self._hotel_stars[i]) or None,
+            "vehicle": _tag_names(VEHICLE_TAGS, int(self._vehicle[i])),
+            "meals": _tag_names(MEAL_TAGS, int(self._meals[i])),
+        }
+
+    def as_function_tool(
+        self, name: str = "search_packages", description: str | None = None
+    ) -> Tool:
+        return _search_packages_tool(self.search, name=name, description=description)
+
+
+def format_packages(rows: list[dict[str, Any]]) -> str:
+    if not rows:
+        return "No matching package found."
+
+    lines = []
+    for row in rows:
+        parts = [row["name"]]
+        if row["price"] is not None:
+            parts.append(f"₹{row['price']:,.0f} per person")
+        if row["nights"] is not None and row["days"] is not None:
+            parts.append(f"{row['nights']} nights / {row['days']} days")
+        if row["hotel_stars"]:
+            parts.append(f"{row['hotel_stars']}-star hotel")
+        else:
+            parts.append("hotel class not listed")
+        if row["vehicle"]:
+            parts.append("vehicle: " + ", ".join(row["vehicle"]))
+        if row["meals"]:
+            parts.append("meals: " + ", ".join(row["meals"]))
+        lines.append("- " + ", ".join(parts))
+    return "\n".join(lines)
+
+
+def _search_packages_tool(
+    search: Callable[..., list[dict[str, Any]]], *, name: str, description: str | None
+) -> Tool:
+    async def search_packages(
+        destination: str | None = None,
+        max_budget: float | None = None,
+        hotel_stars: int | None = None,
+        vehicle: str | None = None,
+        meal_plan: str | None = None,
+        nights: int | None = None,
+    ) -> str:
+        filters: dict[str, Any] = {
+            "destination": destination,
+            "min_hotel_stars": hotel_stars,
+            "vehicle": vehicle,
+            "meal_plan": meal_plan,
+            "nights": nights,
+        }
+        rows = search(max_price=max_budget, **filters)
+        if rows or max_budget is None:
+            return format_packages(rows)
+
+        rows = search(**filters)
+        if not rows:
+            return format_packages(rows)
+        closest = format_packages(rows)
+        return f"No package within the budget, the closest options are:\n{closest}"
+
+    return FunctionTool(
+        name=name,
+        description=description
+        or "Find travel packages by destination, budget per person (INR), minimum hotel "
+        "star rating, vehicle, meal plan and number of nights.",
+        fn=search_packages,
+        parameters={
+            "destination": {"type": "string", "description": "Place or region"},
+            "max_budget": {"type": "number", "description": "Max price per person in INR"},
+            "hotel_stars": {"type": "integer", "description": "Minimum hotel star rating"},
+            "vehicle": {"type": "string", "enum": list(VEHICLE_TAGS)},
+            "meal_plan": {"type": "string", "enum": list(MEAL_TAGS)},
+            "nights": {"type": "integer", "description": "Number of nights"},
+        },
+        required=[],
+    ).to_tool()
+
+
+def load_catalog(path: str | os.PathLike[str]) -> Catalog:
+    """Catalog of the store at `path`, extracted from its nodes if it wasn't built yet"""
+    if (Path(path) / CATALOG_FILE).exists():
+        return Catalog.open(Path(path) / CATALOG_FILE)
+    return Catalog.from_nodes(VectorStore.open(path).nodes)
+
+
+class PackageSearch:
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        index_store_path: str | os.PathLike[str] | None = None,
+    ) -> None:
+        self._path = path
+        self._catalog = load_catalog(path)
+
+        # manifest of the store, the catalog is reloaded when the manifest changes
+        self._index_version = IndexVersion(index_store_path) if index_store_path else None
+        self._version = self._index_version() if self._index_version else ""
+
+    def _check_index(self) -> None:
+        """Reload the catalog if the store was rebuilt"""
+        if self._index_version is None:
+            return
+
+        version = self._index_version()
+        if version == self._version:
+            return
+
+        self._version = version
+        try:
+            self._catalog = load_catalog(self._path)
+        except Exception:
+            logger.warning("failed to reload the rebuilt package catalog", exc_info=True)
+            return
+
+        logger.info(
+            "package catalog reloaded", extra={"version": version, "count": len(self._catalog)}
+        )
+
+    @property
+    def catalog(self) -> Catalog:
+        self._check_index()
+        return self._catalog
+
+    def search(self, **kwargs: Any) -> list[dict[str, Any]]:
+        """`Catalog.search` on the catalog of the current store"""
+        return self.catalog.search(**kwargs)
+
+    def as_function_tool(
+        self, name: str = "search_packages", description: str | None = None
+    ) -> Tool:
+        return _search_packages_tool(self.search, name=name, description=description)
+
+
+@functools.lru_cache(maxsize=None)
+def get_package_search(path: str | os.PathLike[str], **kwargs: Any) -> PackageSearch:
+    """Package search of the store at `path`, built once per process"""
+    return PackageSearch(path, **kwargs)
@@ -0,0 +1,219 @@
+"""Incremental build of the knowledge base store from the files in `data/`.
+
+Every source file is hashed: an unchanged file keeps its chunks without being read again.
+Changed files are re-chunked, and only chunks whose text isn't in the current store are
+embedded, in batched requests with bounded concurrency. The result is written to a new
+generation directory, with the package catalog (`catalog.py`), and swapped in atomically
+(`vector_store.publish`), so a running process never sees a half-written store.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from openai import AsyncOpenAI
+
+from catalog import CATALOG_FILE, Catalog
+from livekit.agents.utils import http_context
+from vector_store import (
+    DEFAULT_EMBED_MODEL,
+    Dtype,
+    Manifest,
+    Node,
+    VectorStore,
+    chunk_hash,
+    new_generation,
+    publish,
+    write,
+)
+
+SOURCES_FILE = "sources.json"
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+@dataclass
+class BuildStats:
+    files: int
+    changed_files: int
+    chunks: int
+    embedded_chunks: int
+    manifest: Manifest
+
+
+def file_hash(path: str | os.PathLike[str]) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _source_files(data_dir: Path) -> list[Path]:
+    # same selection as SimpleDirectoryReader(data_dir): top level, hidden files skipped
+    return sorted(p for p in data_dir.iterdir() if p.is_file() and not p.name.startswith("."))
+
+
+def _load_chunks(path: Path) -> list[Node]:
+    from llama_index.core import SimpleDirectoryReader
+    from llama_index.core.node_parser import SentenceSplitter
+
+    documents = SimpleDirectoryReader(input_files=[str(path)]).load_data()
+    chunks = SentenceSplitter().get_nodes_from_documents(documents)
+
+    nodes = []
+    for i, chunk in enumerate(chunks):
+        text = chunk.get_content()
+        node_id = hashlib.sha256(f"{path.name}\0{i}\0{text}".encode()).hexdigest()[:32]
+        nodes.append(
+            Node(id=node_id, text=text, ref_doc_id=path.name, metadata=dict(chunk.metadata))
+        )
+    return nodes
+
+
+async def _aembed(
+    texts: list[str],
+    *,
+    client: AsyncOpenAI,
+    embed_model: str,
+    batch_size: int,
+    max_concurrency: int,
+) -> list[np.ndarray]:
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async def _embed_batch(batch: list[str]) -> list[np.ndarray]:
+        async with sem:
+            res = await client.embeddings.create(model=embed_model, input=batch)
+        data = sorted(res.data, key=lambda d: d.index)
+        return [np.asarray(d.embedding, dtype=np.float32) for d in data]
+
+    batches = await asyncio.gather(
+        *(_embed_batch(texts[i : i + batch_size]) for i in range(0, len(texts), batch_size))
+    )
+    return [e for batch in batches for e in batch]
+
+
+async def abuild(
+    data_dir: str | os.PathLike[str],
+    path: str | os.PathLike[str],
+    *,
+    embed_model: str = DEFAULT_EMBED_MODEL,
+    dtype: Dtype = "float32",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    api_key: str | None = None,
+    full: bool = False,
+) -> BuildStats:
+    """Update the store at `path` from the files in `data_dir`, `full` ignores the current
+    store and re-embeds everything"""
+    data_dir, path = Path(data_dir), Path(path)
+
+    prev_sources: dict[str, dict[str, Any]] = {}
+    prev_nodes: dict[str, Node] = {}
+    prev_embeddings: dict[str, np.ndarray] = {}
+    prev_manifest: Manifest | None = None
+    if not full and VectorStore.exists(path):
+        store = VectorStore.open(path)
+        if store.manifest.embed_model == embed_model:
+            prev_manifest = store.manifest
+            prev_nodes = {n.id: n for n in store.nodes}
+            for node, row in zip(store.nodes, store.embeddings):
+                prev_embeddings[chunk_hash(node.text)] = row
+            if (path / SOURCES_FILE).exists():
+                prev_sources = json.loads((path / SOURCES_FILE).read_text())
+
+    files = _source_files(data_dir)
+    hashes = await asyncio.gather(*(asyncio.to_thread(file_hash, p) for p in files))
+
+    sources: dict[str, dict[str, Any]] = {}
+    changed: list[Path] = []
+    for p, h in zip(files, hashes):
+        prev = prev_sources.get(p.name)
+        if prev is not None and prev["hash"] == h and all(i in prev_nodes for i in prev["nodes"]):
+            sources[p.name] = prev
+        else:
+            sources[p.name] = {"hash": h, "nodes": []}
+            changed.append(p)
+
+    unchanged = (
+        not changed
+        and sources.keys() == prev_sources.keys()
+        and (path / CATALOG_FILE).exists()
+    )
+    if prev_manifest is not None and prev_manifest.dtype == dtype and unchanged:
+        return BuildStats(
+            files=len(files),
+            changed_files=0,
+            chunks=prev_manifest.count,
+            embedded_chunks=0,
+            manifest=prev_manifest,
+        )
+
+    # reading and chunking PDFs is blocking
+    loaded = await asyncio.gather(*(asyncio.to_thread(_load_chunks, p) for p in changed))
+    new_nodes = {n.id: n for chunks in loaded for n in chunks}
+    for p, chunks in zip(changed, loaded):
+        sources[p.name]["nodes"] = [n.id for n in chunks]
+
+    nodes = [
+        new_nodes.get(node_id) or prev_nodes[node_id]
+        for source in sources.values()
+        for node_id in source["nodes"]
+    ]
+    hashes = [chunk_hash(n.text) for n in nodes]
+    missing = list(dict.fromkeys(h for h in hashes if h not in prev_embeddings))
+
+    embedded: dict[str, np.ndarray] = {}
+    if missing:
+        texts = {chunk_hash(n.text): n.text for n in nodes}
+        client = AsyncOpenAI(api_key=api_key, http_client=http_context.httpx_client())
+        rows = await _aembed(
+            [texts[h] for h in missing],
+            client=client,
+            embed_model=embed_model,
+            batch_size=batch_size,
+            max_concurrency=max_concurrency,
+        )
+        embedded = dict(zip(missing, rows))
+
+    embeddings = np.stack([embedded[h] if h in embedded else prev_embeddings[h] for h in hashes])
+
+    generation = new_generation(path)
+    (generation / SOURCES_FILE).write_text(json.dumps(sources, indent=2))
+    Catalog.from_nodes(nodes).write(generation / CATALOG_FILE)
+    manifest = write(
+        generation, embeddings=embeddings, nodes=nodes, dtype=dtype, embed_model=embed_model
+    )
+    publish(path, generation)
+
+    return BuildStats(
+        files=len(files),
+        changed_files=len(changed),
+        chunks=len(nodes),
+        embedded_chunks=len(missing),
+        manifest=manifest,
+    )
+
+
+def build(
+    data_dir: str | os.PathLike[str], path: str | os.PathLike[str], **kwargs: Any
+) -> BuildStats:
+    """Blocking `abuild`, runs its own event loop in a thread so it can be called while
+    another loop is running (e.g. when main.py is imported by uvicorn)"""
+
+    async def _run() -> BuildStats:
+        try:
+            return await abuild(data_dir, path, **kwargs)
+        finally:
+            await http_context._close_process_session()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _run()).result()
@@ -7,15 +7,20 @@ from typing import ClassVar, Protocol
 
 class _RunnerMeta(Protocol):
     INFERENCE_METHOD: ClassVar[str]
+    BATCH_INTERVAL: ClassVar[float]
 
 
 _RunnersDict = dict[str, type["_InferenceRunner"]]
 
 
-# kept private until we stabilize the API (only used for EOU today)
+# kept private until we stabilize the API (used for EOU and VAD today)
 class _InferenceRunner(ABC, _RunnerMeta):
     registered_runners: _RunnersDict = {}
 
+    BATCH_INTERVAL: ClassVar[float] = 0.0
+    """When > 0, the inference process collects the requests received during this interval
+    (in seconds) and hands them to `run_batch` in a single call."""
+
     @classmethod
     def register_runner(cls, runner_class: type[_InferenceRunner]) -> None:
         if threading.current_thread() != threading.main_thread():
@@ -35,3 +40,7 @@ class _InferenceRunner(ABC, _RunnerMeta):
     def run(self, data: bytes) -> bytes | None:
         """Run inference on the given data."""
         ...
+
+    def run_batch(self, data: list[bytes]) -> list[bytes | None]:
+        """Run inference on several requests at once, only used when BATCH_INTERVAL > 0."""
+        return [self.run(d) for d in data]
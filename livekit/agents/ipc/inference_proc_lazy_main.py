@@ -69,6 +69,12 @@ class _InferenceProc:
         self._runners = {name: runner() for name, runner in runners.items()}
         self._executor = ThreadPoolExecutor(max_workers=math.ceil(hw.get_cpu_monitor().cpu_count()))
 
+        # pending requests of batched runners, flushed once per BATCH_INTERVAL
+        self._pending_batches: dict[str, list[proto.InferenceRequest]] = {}
+        self._batch_tasks: set[asyncio.Task[None]] = set()
+        # a runner keeps per-stream state, its batches run one at a time and in order
+        self._batch_locks: dict[str, asyncio.Lock] = {}
+
     def initialize(self, init_req: proto.InitializeRequest, client: _ProcClient) -> None:
         self._client = client
 
@@ -109,6 +115,15 @@ class _InferenceProc:
         if msg.method not in self._runners:
             logger.warning("unknown inference method", extra={"method": msg.method})
 
+        elif self._runners[msg.method].BATCH_INTERVAL > 0:
+            pending = self._pending_batches.setdefault(msg.method, [])
+            pending.append(msg)
+            if len(pending) == 1:
+                task = asyncio.create_task(self._run_batch(msg.method))
+                self._batch_tasks.add(task)
+                task.add_done_callback(self._batch_tasks.discard)
+            return
+
         try:
             data = await loop.run_in_executor(
                 self._executor, self._runners[msg.method].run, msg.data
@@ -125,3 +140,30 @@ class _InferenceProc:
             await self._client.send(
                 proto.InferenceResponse(request_id=msg.request_id, error=str(e))
             )
+
+    async def _run_batch(self, method: str) -> None:
+        runner = self._runners[method]
+        await asyncio.sleep(runner.BATCH_INTERVAL)
+
+        lock = self._batch_locks.setdefault(method, asyncio.Lock())
+        async with lock:
+            # requests received while the previous batch was running join this one
+            reqs = self._pending_batches.pop(method, [])
+            if not reqs:
+                return
+
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, runner.run_batch, [req.data for req in reqs]
+                )
+            except Exception as e:
+                logger.exception("error running batched inference", extra={"method": method})
+                for req in reqs:
+                    await self._client.send(
+                        proto.InferenceResponse(request_id=req.request_id, error=str(e))
+                    )
+                return
+
+        for req, data in zip(reqs, results):
+            await self._client.send(proto.InferenceResponse(request_id=req.request_id, data=data))
@@ -1,5 +1,6 @@
 from .chat_context import ChatContext, ChatContent, ChatItem, ChatRole
-from .chat_chunk import ChatChunk
+from .context_window import ContextWindow, ContextWindowOptions
+from .chat_chunk import ChatChunk, ChoiceDelta, CompletionUsage, FunctionToolCall
 from .tool_context import StopResponse, ToolContext, is_raw_function_tool
 from . import utils
 
@@ -13,7 +14,9 @@ from .openai import (
     ToolError,
     find_function_tools,
     LLM,
+    LLMStream,
     OpenAILLM,
+    ToolChoice,
     LLMError,
     RealtimeModel,
     RealtimeModelError,
@@ -22,9 +25,16 @@ from .openai import (
 __all__ = [
     "LLM",
     "OpenAILLM",
+    "LLMStream",
+    "ToolChoice",
     "ChatMessage",
     "ChatChunk",
+    "ChoiceDelta",
+    "CompletionUsage",
+    "FunctionToolCall",
     "ChatContext",
+    "ContextWindow",
+    "ContextWindowOptions",
     "ChatContent",
     "FunctionCall",
     "FunctionCallOutput",
@@ -1,4 +1,34 @@
 # livekit/agents/llm/chat_chunk.py
-class ChatChunk:
-    def __init__(self, content: str):
-        self.content = content
+from __future__ import annotations
+
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class FunctionToolCall(BaseModel):
+    """A tool call requested by the LLM, emitted once its arguments are complete"""
+
+    type: Literal["function"] = "function"
+    name: str
+    arguments: str
+    call_id: str
+
+
+class ChoiceDelta(BaseModel):
+    role: Optional[Literal["system", "user", "assistant", "tool"]] = None
+    content: Optional[str] = None
+    tool_calls: list[FunctionToolCall] = Field(default_factory=list)
+
+
+class CompletionUsage(BaseModel):
+    completion_tokens: int
+    prompt_tokens: int
+    prompt_cached_tokens: int = 0
+    total_tokens: int
+
+
+class ChatChunk(BaseModel):
+    id: str
+    delta: Optional[ChoiceDelta] = None
+    usage: Optional[CompletionUsage] = None
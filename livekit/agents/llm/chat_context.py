@@ -1,9 +1,11 @@
+from collections.abc import Iterable, Iterator, MutableSequence
+from dataclasses import dataclass
 from typing import List, Optional
 from .openai import ChatMessage
 from pydantic import BaseModel
 from typing import Any
 from typing import Literal
-from .openai import FunctionCall
+from .openai import FunctionCall, serialize_items
 from enum import Enum
 
 class ChatRole(str, Enum):
@@ -23,48 +25,223 @@ class ChatMessage(BaseModel):
 class ChatContent(BaseModel):
     content: Optional[str] = None
 
+
+class _ItemBuffer:
+    """Append-only storage shared by a chat context and its copies.
+
+    A context sees the first `length` items of its buffer. Appending at the end of the buffer
+    is done in place, the views of the other contexts are unchanged; any other edit copies the
+    visible items to a new buffer first. Items at a given position of a buffer therefore never
+    change, which is what makes `copy()` O(1)."""
+
+    __slots__ = ("items", "index")
+
+    def __init__(self, items: List[Any]) -> None:
+        self.items = items
+        self.index: dict = {}  # id -> first position
+        for i, item in enumerate(items):
+            self._index(item, i)
+
+    def append(self, item: Any) -> None:
+        self._index(item, len(self.items))
+        self.items.append(item)
+
+    def _index(self, item: Any, i: int) -> None:
+        item_id = getattr(item, "id", None)
+        if item_id is not None:
+            self.index.setdefault(item_id, i)
+
+
+class _ChatItems(MutableSequence):
+    """Mutable view of the items of a ChatContext"""
+
+    __slots__ = ("_ctx",)
+
+    def __init__(self, ctx: "ChatContext") -> None:
+        self._ctx = ctx
+
+    def __len__(self) -> int:
+        return self._ctx._len
+
+    def __getitem__(self, i: Any) -> Any:
+        ctx = self._ctx
+        if isinstance(i, slice):
+            return ctx._buffer.items[: ctx._len][i]
+        if i < 0:
+            i += ctx._len
+        if not 0 <= i < ctx._len:
+            raise IndexError("chat context index out of range")
+        return ctx._buffer.items[i]
+
+    def __iter__(self) -> Iterator[Any]:
+        items = self._ctx._buffer.items
+        for i in range(self._ctx._len):
+            yield items[i]
+
+    def __setitem__(self, i: Any, value: Any) -> None:
+        items = self._ctx._fork()
+        items[i] = value
+        self._ctx._reset(items)
+
+    def __delitem__(self, i: Any) -> None:
+        items = self._ctx._fork()
+        del items[i]
+        self._ctx._reset(items)
+
+    def insert(self, i: int, value: Any) -> None:
+        if i >= self._ctx._len:
+            self.append(value)
+            return
+        items = self._ctx._fork()
+        items.insert(i, value)
+        self._ctx._reset(items)
+
+    def append(self, value: Any) -> None:
+        self._ctx._append(value)
+
+    def extend(self, values: Iterable[Any]) -> None:
+        for value in values:
+            self._ctx._append(value)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+@dataclass(frozen=True)
+class _ProviderFormat:
+    buffer: _ItemBuffer  # serialized items are buffer.items[:length]
+    length: int
+    messages: tuple  # provider messages, never mutated once created
+    state: Any  # serializer state to resume after the last item
+
+
 class ChatContext:
     def __init__(self, messages: Optional[List[ChatMessage]] = None):
         from livekit.agents.voice.generation import INSTRUCTIONS_MESSAGE_ID
-        self.messages = messages or []
-        
+        messages = list(messages or [])
 
-        if not any(msg.id == INSTRUCTIONS_MESSAGE_ID for msg in self.messages):
-            self.messages.insert(0, ChatMessage(
+        if not any(getattr(msg, "id", None) == INSTRUCTIONS_MESSAGE_ID for msg in messages):
+            messages.insert(0, ChatMessage(
                 id=INSTRUCTIONS_MESSAGE_ID,
                 role=ChatRole.system,
                 content="You are a helpful travel assistant. Ask questions naturally.",
             ))
 
-    def insert(self, message: ChatMessage):
-        self.messages.insert(0, message)
+        self._reset(messages)
+        # serialized messages by provider, shared with copies. Items are treated as immutable
+        # (replaced, never edited in place), so while they are only appended the previous
+        # serialization is extended instead of redone
+        self._provider_format: dict = {}
+
+    def _reset(self, items: List[Any]) -> None:
+        self._buffer = _ItemBuffer(items)
+        self._len = len(items)
+
+    def _fork(self) -> List[Any]:
+        # edits other than appends never happen in a buffer, they could be visible to copies
+        return self._buffer.items[: self._len]
+
+    def _append(self, item: Any) -> None:
+        if self._len != len(self._buffer.items):
+            # a copy appended to the shared buffer, continue on our own
+            self._reset(self._fork())
+        self._buffer.append(item)
+        self._len += 1
+
+    @property
+    def messages(self) -> _ChatItems:
+        return _ChatItems(self)
+
+    def insert(self, message: Any):
+        """Append a message or a list of items, new items always go after the history so the
+        instructions and the previous turns stay a stable prompt prefix."""
+        if isinstance(message, (list, tuple)):
+            self.messages.extend(message)
+        else:
+            self.messages.append(message)
 
     def add_message(self, *, role: ChatRole, content: str, id: Optional[str] = None, **kwargs):
         msg = ChatMessage(role=role, content=content, id=id, **kwargs)
-        self.messages.append(msg)
+        self._append(msg)
         return msg
 
 
     def get_messages(self) -> List[ChatMessage]:
         return self.messages
-    
+
     @property
-    def items(self):
+    def items(self) -> _ChatItems:
         return self.messages
 
     def clear(self):
-        self.messages = []
+        self._reset([])
 
     @classmethod
     def empty(cls):
         return cls(messages=[])
-    
-    def index_by_id(self, message_id: str) -> int:
-        """Returns the index of the message with the given ID."""
-        for i, item in enumerate(self.messages):
-            if item.id == message_id:
-                return i
-        raise ValueError(f"Message ID {message_id} not found in chat context.")
+
+    def copy(self, *, tools: Any = None) -> "ChatContext":
+        """O(1), the copy shares the items until one of the contexts is edited.
+
+        When `tools` is given, the function calls of the tools that aren't in it are dropped
+        with their outputs, the items are only copied if something is dropped."""
+        ctx = ChatContext.__new__(ChatContext)
+        ctx._buffer = self._buffer
+        ctx._len = self._len
+        # shared: the copy made each turn extends the serialization of the previous turn
+        ctx._provider_format = self._provider_format
+
+        if tools is not None:
+            names = {getattr(t, "name", None) or getattr(t, "__name__", None) for t in tools}
+            dropped_calls: set = set()
+            kept = []
+            for item in self.items:
+                item_type = getattr(item, "type", "message")
+                if item_type == "function_call" and item.name not in names:
+                    dropped_calls.add(item.call_id)
+                    continue
+                if item_type == "function_call_output" and (
+                    (item.call_id and item.call_id in dropped_calls)
+                    or (item.name and item.name not in names)
+                ):
+                    continue
+                kept.append(item)
+
+            if len(kept) != ctx._len:
+                ctx._reset(kept)
+
+        return ctx
+
+    def get_by_id(self, message_id: str) -> Optional[Any]:
+        idx = self.index_by_id(message_id)
+        return self._buffer.items[idx] if idx is not None else None
+
+    def index_by_id(self, message_id: str) -> Optional[int]:
+        """Returns the index of the message with the given ID, None if it isn't found."""
+        idx = self._buffer.index.get(message_id)
+        return idx if idx is not None and idx < self._len else None
+
+    def to_provider_format(self, format: Literal["openai"] = "openai") -> List[dict]:
+        """The items as provider messages, byte-identical for an unchanged prefix so the
+        provider's prompt cache is hit. Only the items appended since the last call are
+        serialized."""
+        buffer, length = self._buffer, self._len
+        cached = self._provider_format.get(format)
+        if cached is not None and cached.length <= length and (
+            cached.buffer is buffer  # append-only, same prefix
+            or all(
+                a is b
+                for a, b in zip(cached.buffer.items[: cached.length], buffer.items[:length])
+            )
+        ):
+            start, messages, state = cached.length, list(cached.messages), cached.state
+        else:
+            start, messages, state = 0, [], None
+
+        if start < length or cached is None:
+            state = serialize_items(buffer.items[start:length], messages, state)
+            self._provider_format[format] = _ProviderFormat(buffer, length, tuple(messages), state)
+        return messages
 
 
 
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Optional
+
+from ..log import logger
+from ..utils import aio
+from .chat_context import ChatContext, ChatMessage, ChatRole
+from .utils import token_counter
+
+if TYPE_CHECKING:
+    from .openai import OpenAILLM
+
+# Context window management: the token count of each chat item is computed once and cached,
+# when the chat context crosses `max_tokens` the oldest turns are summarized (or dropped) in
+# the background until it fits in `target_tokens`. The instructions and the most recent turns
+# are always kept, and the cut is made at the start of a user turn so function calls stay
+# next to their outputs.
+
+SUMMARY_MESSAGE_ID = "lk.context_window.summary"
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the earlier part of a phone conversation between a voice agent and a user. "
+    "Keep everything the agent needs to continue the conversation: the user's name, "
+    "preferences, dates, budget, numbers, questions already answered and decisions made. "
+    "Write short plain sentences, no more than 150 words."
+)
+# role, separators and name of each message in the provider format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@dataclass
+class ContextWindowOptions:
+    max_tokens: int = 12_000
+    """Compaction starts once the chat context is larger"""
+    target_tokens: int = 6_000
+    """Size the chat context is compacted to"""
+    min_recent_items: int = 6
+    """Most recent items that are always kept as is"""
+    summarize: bool = True
+    """Replace the removed turns with a summary written by the LLM, otherwise drop them"""
+
+
+def _item_text(item: Any) -> str:
+    item_type = getattr(item, "type", "message")
+    if item_type == "function_call":
+        return f"{item.name} {item.arguments}"
+    if item_type == "function_call_output":
+        return str(item.output)
+
+    content = getattr(item, "content", None)
+    if isinstance(content, list):
+        return "\n".join(c for c in content if isinstance(c, str))
+    return content or ""
+
+
+def _role(item: Any) -> str | None:
+    if getattr(item, "type", "message") != "message":
+        return None
+    return getattr(item.role, "value", item.role)
+
+
+class ContextWindow:
+    def __init__(self, opts: ContextWindowOptions) -> None:
+        if opts.target_tokens >= opts.max_tokens:
+            raise ValueError("target_tokens must be lower than max_tokens")
+
+        self._opts = opts
+        # id(item) -> (item, tokens), the item is kept so the id can't be reused
+        self._tokens: dict[int, tuple[Any, int]] = {}
+        self._compact_atask: asyncio.Task[None] | None = None
+
+    @property
+    def options(self) -> ContextWindowOptions:
+        return self._opts
+
+    def item_tokens(self, item: Any) -> int:
+        if (cached := self._tokens.get(id(item))) is not None and cached[0] is item:
+            return cached[1]
+
+        tokens = token_counter().count(_item_text(item)) + MESSAGE_OVERHEAD_TOKENS
+        self._tokens[id(item)] = (item, tokens)
+        return tokens
+
+    def count_tokens(self, chat_ctx: ChatContext) -> int:
+        return sum(self.item_tokens(item) for item in chat_ctx.items)
+
+    def schedule(self, chat_ctx: ChatContext, *, llm: Optional[OpenAILLM] = None) -> None:
+        """Compact `chat_ctx` in the background if it's over budget, called after each turn"""
+        if self._compact_atask is not None and not self._compact_atask.done():
+            return
+
+        if self.count_tokens(chat_ctx) <= self._opts.max_tokens:
+            return
+
+        self._compact_atask = asyncio.create_task(
+            self.compact(chat_ctx, llm=llm), name="ContextWindow.compact"
+        )
+
+    async def compact(self, chat_ctx: ChatContext, *, llm: Optional[OpenAILLM] = None) -> None:
+        items = list(chat_ctx.items)
+
+        head = 0  # instructions, and the summary of a previous compaction
+        while head < len(items) and _role(items[head]) == "system":
+            head += 1
+
+        budget = self._opts.target_tokens - sum(self.item_tokens(i) for i in items[:head])
+        cut = len(items)
+        while cut > head:
+            kept = len(items) - cut
+            tokens = self.item_tokens(items[cut - 1])
+            if kept >= self._opts.min_recent_items and tokens > budget:
+                break
+            budget -= tokens
+            cut -= 1
+
+        # don't split a turn: the kept items start with a user message. The cut only moves
+        # back, the most recent items are always kept
+        while head < cut < len(items) and _role(items[cut]) != "user":
+            cut -= 1
+
+        summary_idx = next(
+            (i for i in range(head) if getattr(items[i], "id", None) == SUMMARY_MESSAGE_ID), None
+        )
+        old = items[head:cut]
+        if not old or cut == len(items):
+            return
+
+        summary: ChatMessage | None = None
+        if self._opts.summarize and llm is not None:
+            previous = items[summary_idx] if summary_idx is not None else None
+            try:
+                summary = await self._summarize(llm, previous, old)
+            except Exception:
+                logger.warning(
+                    "failed to summarize the chat context, dropping the old turns", exc_info=True
+                )
+
+        # the context kept changing while summarizing, only new items may have been appended
+        current = chat_ctx.items
+        start = next((i for i, item in enumerate(current) if item is old[0]), None)
+        if start is None or any(a is not b for a, b in zip(current[start:], old)):
+            return
+
+        current[start : start + len(old)] = []
+        if summary is not None:
+            if summary_idx is not None and current[summary_idx] is items[summary_idx]:
+                current[summary_idx] = summary
+            else:
+                current.insert(start, summary)
+
+        self._tokens = {id(i): self._tokens[id(i)] for i in current if id(i) in self._tokens}
+
+        logger.debug(
+            "chat context compacted",
+            extra={"removed_items": len(old), "summarized": summary is not None},
+        )
+
+    async def _summarize(
+        self, llm: OpenAILLM, previous: Any | None, items: list[Any]
+    ) -> ChatMessage:
+        lines = []
+        if previous is not None:
+            lines.append(f"Summary so far: {_item_text(previous).removeprefix(SUMMARY_PREFIX)}")
+        for item in items:
+            item_type = getattr(item, "type", "message")
+            if item_type == "function_call":
+                continue
+            role = "tool" if item_type == "function_call_output" else _role(item)
+            if text := _item_text(item).strip():
+                lines.append(f"{role}: {text}")
+
+        from ..voice.generation import INSTRUCTIONS_MESSAGE_ID
+
+        summary_ctx = ChatContext(
+            [
+                ChatMessage(
+                    id=INSTRUCTIONS_MESSAGE_ID, role=ChatRole.system, content=SUMMARY_INSTRUCTIONS
+                ),
+                ChatMessage(role=ChatRole.user, content="\n".join(lines)),
+            ]
+        )
+
+        text = ""
+        async with llm.chat(chat_ctx=summary_ctx) as stream:
+            async for chunk in stream:
+                if chunk.delta and chunk.delta.content:
+                    text += chunk.delta.content
+
+        return ChatMessage(
+            id=SUMMARY_MESSAGE_ID,
+            role=ChatRole.system,
+            content=SUMMARY_PREFIX + text.strip(),
+        )
+
+    async def aclose(self) -> None:
+        if self._compact_atask is not None:
+            await aio.cancel_and_wait(self._compact_atask)
@@ -1,13 +1,40 @@
 from __future__ import annotations
-from typing import Optional, Dict, Any, Callable, List, Literal
-from pydantic import BaseModel, ConfigDict
+
+import asyncio
+import inspect
+import time
+import typing
+from collections.abc import AsyncIterable, AsyncIterator, Iterator
+from enum import Enum
+from types import TracebackType
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, List, Literal, Union
+
+import openai
+from livekit import rtc
+from pydantic import BaseModel, ConfigDict, Field
 from openai import AsyncOpenAI
 
+from .._exceptions import APIConnectionError, APIError, APIStatusError, APITimeoutError
+from ..log import logger
+from ..metrics import LLMMetrics
+from ..types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, APIConnectOptions, NotGivenOr
+from ..utils import aio, http_context, is_given
+from .chat_chunk import ChatChunk, ChoiceDelta, CompletionUsage, FunctionToolCall
+
+if TYPE_CHECKING:
+    from .chat_context import ChatContext
+
 
 # ─── Exception Definitions ─────────────────────────────────────────────────────
-class LLMError(Exception):
-    """Custom exception for LLM-related errors."""
-    pass
+class LLMError(BaseModel):
+    """Emitted by the LLM ("error" event) when a completion request failed."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    type: Literal["llm_error"] = "llm_error"
+    timestamp: float
+    label: str
+    error: Exception = Field(..., exclude=True)
+    recoverable: bool
 
 class ToolError(Exception):
     def __init__(self, tool_name: str, message: str):
@@ -20,28 +47,421 @@ class RealtimeModelError(Exception):
     pass
 
 # ─── OpenAI Chat Client ────────────────────────────────────────────────────────
-class OpenAILLM:
+class NamedToolChoice(typing.TypedDict):
+    type: Literal["function"]
+    function: Dict[str, str]
+
+ToolChoice = Union[NamedToolChoice, Literal["auto", "required", "none"]]
+
+
+class OpenAILLM(rtc.EventEmitter[Literal["metrics_collected", "error"]]):
     def __init__(self, model: str = "gpt-4o", api_key: Optional[str] = None):
+        super().__init__()
         self.model = model
-        self.client = AsyncOpenAI(api_key=api_key)
+        self._api_key = api_key
+        self._client: Optional[AsyncOpenAI] = None
+        self._http_client: Any = None
+        self._label = f"{type(self).__module__}.{type(self).__name__}"
 
-    async def chat(self, message: str) -> str:
-        res = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": message}]
-        )
-        return res.choices[0].message.content
-    
-    def on(self, event: str, handler):
-        # Stub method to avoid errors when metrics hooks are attached
-        pass
+    @property
+    def label(self) -> str:
+        return self._label
 
-    def prewarm(self):
-        # No-op method to satisfy LiveKit agent
-        pass
+    @property
+    def client(self) -> AsyncOpenAI:
+        # bound to the pooled httpx client of the running loop (keep-alive, HTTP/2 when h2 is installed)
+        http_client = http_context.httpx_client()
+        if self._client is None or self._http_client is not http_client:
+            self._client = AsyncOpenAI(api_key=self._api_key, http_client=http_client)
+            self._http_client = http_client
+        return self._client
+
+    def chat(
+        self,
+        *,
+        chat_ctx: ChatContext,
+        tools: Optional[List[Any]] = None,
+        tool_choice: NotGivenOr[ToolChoice] = NOT_GIVEN,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> LLMStream:
+        """Stream a completion of `chat_ctx`: content deltas are emitted as they arrive, tool
+        calls once their arguments are complete."""
+        extra: Dict[str, Any] = {}
+        if tools:
+            extra["tools"] = [to_openai_tool(tool) for tool in tools]
+            if is_given(tool_choice):
+                extra["tool_choice"] = tool_choice
+            if is_given(parallel_tool_calls):
+                extra["parallel_tool_calls"] = parallel_tool_calls
+
+        return LLMStream(self, chat_ctx=chat_ctx, extra_kwargs=extra, conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        """Open the connection to the OpenAI API ahead of the first completion."""
+        http_context.prewarm(str(self.client.base_url), client="httpx")
 
 LLM = OpenAILLM  # Aliased for internal references
 
+
+class LLMStream:
+    """Returned by `OpenAILLM.chat`, an async iterator of `ChatChunk`"""
+
+    def __init__(
+        self,
+        llm: OpenAILLM,
+        *,
+        chat_ctx: ChatContext,
+        extra_kwargs: Dict[str, Any],
+        conn_options: APIConnectOptions,
+    ) -> None:
+        self._llm = llm
+        self._chat_ctx = chat_ctx
+        self._extra_kwargs = extra_kwargs
+        self._conn_options = conn_options
+        self._event_ch = aio.Chan[ChatChunk]()
+
+        self._tee = aio.itertools.tee(self._event_ch, 2)
+        self._event_aiter, monitor_aiter = self._tee
+        self._current_attempt_has_error = False
+        self._metrics_task = asyncio.create_task(
+            self._metrics_monitor_task(monitor_aiter), name="LLM._metrics_task"
+        )
+        self._task = asyncio.create_task(self._main_task(), name="LLM._main_task")
+        self._task.add_done_callback(lambda _: self._event_ch.close())
+
+    @property
+    def chat_ctx(self) -> ChatContext:
+        return self._chat_ctx
+
+    async def _metrics_monitor_task(self, event_aiter: AsyncIterable[ChatChunk]) -> None:
+        """Task used to collect metrics"""
+
+        start_time = time.perf_counter()
+        ttft = -1.0
+        request_id = ""
+        usage: CompletionUsage | None = None
+
+        async for ev in event_aiter:
+            request_id = ev.id
+            if ev.usage is not None:
+                usage = ev.usage
+            if ttft == -1.0 and ev.delta is not None:
+                ttft = time.perf_counter() - start_time
+
+        duration = time.perf_counter() - start_time
+
+        if self._current_attempt_has_error:
+            return
+
+        metrics = LLMMetrics(
+            timestamp=time.time(),
+            request_id=request_id,
+            ttft=ttft,
+            duration=duration,
+            cancelled=self._task.cancelled(),
+            label=self._llm._label,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            prompt_cached_tokens=usage.prompt_cached_tokens if usage else 0,
+            total_tokens=usage.total_tokens if usage else 0,
+            tokens_per_second=usage.completion_tokens / duration if usage and duration else 0.0,
+        )
+        self._llm.emit("metrics_collected", metrics)
+
+    async def _main_task(self) -> None:
+        for i in range(self._conn_options.max_retry + 1):
+            try:
+                return await self._run()
+            except APIError as e:
+                retry_interval = self._conn_options._interval_for_retry(i)
+                if self._conn_options.max_retry == i or not e.retryable:
+                    self._emit_error(e, recoverable=False)
+                    raise
+                else:
+                    self._emit_error(e, recoverable=True)
+                    logger.warning(
+                        f"failed to generate LLM completion, retrying in {retry_interval}s",
+                        exc_info=e,
+                        extra={"llm": self._llm._label, "attempt": i + 1},
+                    )
+
+                await asyncio.sleep(retry_interval)
+                # Reset the flag when retrying
+                self._current_attempt_has_error = False
+
+    async def _run(self) -> None:
+        # once a chunk is forwarded the attempt can't be replayed without duplicating output
+        retryable = True
+        tool_calls = _ToolCallAssembler()
+        try:
+            stream = await self._llm.client.chat.completions.create(
+                model=self._llm.model,
+                messages=to_chat_messages(self._chat_ctx),
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=self._conn_options.timeout,
+                **self._extra_kwargs,
+            )
+            async with stream:
+                async for chunk in stream:
+                    for choice in chunk.choices:
+                        for ev in _parse_choice(chunk.id, choice, tool_calls):
+                            self._event_ch.send_nowait(ev)
+                            retryable = False
+
+                    if chunk.usage is not None:
+                        self._event_ch.send_nowait(
+                            ChatChunk(
+                                id=chunk.id,
+                                usage=CompletionUsage(
+                                    completion_tokens=chunk.usage.completion_tokens,
+                                    prompt_tokens=chunk.usage.prompt_tokens,
+                                    prompt_cached_tokens=_cached_tokens(chunk.usage),
+                                    total_tokens=chunk.usage.total_tokens,
+                                ),
+                            )
+                        )
+        except openai.APITimeoutError:
+            raise APITimeoutError(retryable=retryable) from None
+        except openai.APIStatusError as e:
+            raise APIStatusError(
+                e.message, status_code=e.status_code, request_id=e.request_id, body=e.body
+            ) from None
+        except openai.APIConnectionError as e:
+            raise APIConnectionError(retryable=retryable) from e
+
+    def _emit_error(self, api_error: Exception, recoverable: bool) -> None:
+        self._current_attempt_has_error = True
+        self._llm.emit(
+            "error",
+            LLMError(
+                timestamp=time.time(),
+                label=self._llm._label,
+                error=api_error,
+                recoverable=recoverable,
+            ),
+        )
+
+    async def aclose(self) -> None:
+        """Close is automatically called if the stream is completely collected"""
+        await aio.cancel_and_wait(self._task)
+        self._event_ch.close()
+        await self._metrics_task
+        await self._tee.aclose()
+
+    async def __anext__(self) -> ChatChunk:
+        try:
+            val = await self._event_aiter.__anext__()
+        except StopAsyncIteration:
+            if not self._task.cancelled() and (exc := self._task.exception()):
+                raise exc  # noqa: B904
+
+            raise StopAsyncIteration from None
+
+        return val
+
+    def __aiter__(self) -> AsyncIterator[ChatChunk]:
+        return self
+
+    async def __aenter__(self) -> LLMStream:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+
+class _ToolCallAssembler:
+    """Tool calls are streamed as fragments: the first one of each call has its index, id and
+    name, the following ones only append to its arguments."""
+
+    def __init__(self) -> None:
+        self._index: int | None = None
+        self._call_id = ""
+        self._name = ""
+        self._arguments = ""
+
+    def push(
+        self, index: int, call_id: str | None, name: str | None, arguments: str | None
+    ) -> FunctionToolCall | None:
+        """Add a fragment, returns the previous call if this fragment starts a new one"""
+        done = None
+        if self._index is not None and index != self._index:
+            done = self.flush()
+
+        if self._index is None:
+            self._index = index
+            self._call_id = call_id or ""
+            self._name = name or ""
+        elif name:
+            self._name = name
+        self._arguments += arguments or ""
+        return done
+
+    def flush(self) -> FunctionToolCall | None:
+        if self._index is None:
+            return None
+
+        call = FunctionToolCall(
+            name=self._name, arguments=self._arguments or "{}", call_id=self._call_id
+        )
+        self._index = None
+        self._call_id = self._name = self._arguments = ""
+        return call
+
+
+def _parse_choice(
+    request_id: str, choice: Any, tool_calls: _ToolCallAssembler
+) -> Iterator[ChatChunk]:
+    delta = choice.delta
+    if delta is not None:
+        done: list[FunctionToolCall] = []
+        for tool in delta.tool_calls or []:
+            if tool.function is None:
+                continue
+            fnc = tool.function
+            if (call := tool_calls.push(tool.index, tool.id, fnc.name, fnc.arguments)) is not None:
+                done.append(call)
+
+        if done:
+            yield ChatChunk(id=request_id, delta=ChoiceDelta(role="assistant", tool_calls=done))
+
+        if delta.content:
+            yield ChatChunk(
+                id=request_id, delta=ChoiceDelta(role="assistant", content=delta.content)
+            )
+
+    if choice.finish_reason is not None and (call := tool_calls.flush()) is not None:
+        yield ChatChunk(id=request_id, delta=ChoiceDelta(role="assistant", tool_calls=[call]))
+
+
+def _cached_tokens(usage: Any) -> int:
+    # prompt tokens served from the provider's prefix cache
+    details = getattr(usage, "prompt_tokens_details", None)
+    return (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+
+
+# ─── Request Serialization ─────────────────────────────────────────────────────
+def _text_content(content: Any) -> str:
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(c for c in content if isinstance(c, str))
+    return str(content)
+
+
+def to_chat_messages(chat_ctx: ChatContext) -> List[Dict[str, Any]]:
+    """`chat_ctx` in the format of the chat completions API, memoized by the chat context"""
+    return chat_ctx.to_provider_format("openai")
+
+
+def serialize_items(
+    items: List[Any], messages: List[Dict[str, Any]], last_id: str | None
+) -> str | None:
+    """Append the chat completion messages of `items` to `messages`, consecutive function calls
+    are grouped in the assistant message of the same generation. `last_id` is the id of the
+    item of messages[-1], returned updated so a later call can resume.
+
+    Messages already in the list are replaced, never mutated: they can be shared with the
+    serializations of other copies of the chat context."""
+    for item in items:
+        item_type = getattr(item, "type", "message")
+        if item_type == "function_call":
+            tool_call = {
+                "id": item.call_id,
+                "type": "function",
+                "function": {"name": item.name, "arguments": item.arguments or "{}"},
+            }
+            # function call ids are "{generation id}/fnc_{i}", the text of the generation has its id
+            generation_id = (item.id or "").split("/", 1)[0]
+            prev = messages[-1] if messages else None
+            if prev is not None and prev["role"] == "assistant" and (
+                "tool_calls" in prev or (generation_id and generation_id == last_id)
+            ):
+                messages[-1] = {**prev, "tool_calls": [*prev.get("tool_calls", ()), tool_call]}
+            else:
+                messages.append({"role": "assistant", "content": None, "tool_calls": [tool_call]})
+        elif item_type == "function_call_output":
+            messages.append(
+                {"role": "tool", "tool_call_id": item.call_id, "content": str(item.output)}
+            )
+        elif item_type == "message":
+            role = item.role.value if isinstance(item.role, Enum) else str(item.role)
+            messages.append({"role": role, "content": _text_content(item.content)})
+        else:
+            continue
+
+        last_id = getattr(item, "id", None)
+
+    return last_id
+
+
+_JSON_TYPES: Dict[Any, str] = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+def _json_type(annotation: Any) -> Dict[str, Any]:
+    if typing.get_origin(annotation) is Literal:
+        return {"type": "string", "enum": [str(a) for a in typing.get_args(annotation)]}
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if args and typing.get_origin(annotation) not in (list, List):
+        # Optional[X] / X | None
+        return _json_type(args[0])
+    if typing.get_origin(annotation) in (list, List):
+        return {"type": "array", "items": _json_type(args[0]) if args else {}}
+    return {"type": _JSON_TYPES.get(annotation, "string")}
+
+
+def _signature_schema(fn: Callable) -> Dict[str, Any]:
+    try:
+        hints = typing.get_type_hints(fn)
+    except Exception:
+        hints = {}
+
+    properties: Dict[str, Any] = {}
+    required: List[str] = []
+    for name, param in inspect.signature(fn).parameters.items():
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD) or name in ("self", "context"):
+            continue
+        properties[name] = _json_type(hints.get(name, str))
+        if param.default is param.empty:
+            required.append(name)
+
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def to_openai_tool(tool: Any) -> Dict[str, Any]:
+    """Tool definition of a `Tool`, `FunctionTool` or plain function, the parameters schema is
+    inferred from the signature of the function when it isn't given"""
+    fn = getattr(tool, "fn", None) or (tool if callable(tool) else None)
+    name = getattr(tool, "name", None) or fn.__name__
+    description = getattr(tool, "description", None) or (fn.__doc__ if fn else None) or ""
+
+    parameters = getattr(tool, "parameters", None)
+    if parameters and parameters.get("type") == "object":
+        schema = parameters
+    elif parameters:
+        schema = {
+            "type": "object",
+            "properties": parameters,
+            "required": list(getattr(tool, "required", None) or []),
+        }
+    elif fn is not None:
+        schema = _signature_schema(fn)
+    else:
+        schema = {"type": "object", "properties": {}}
+
+    return {
+        "type": "function",
+        "function": {"name": name, "description": description, "parameters": schema},
+    }
+
 # ─── Tool Abstraction ──────────────────────────────────────────────────────────
 class Tool:
     def __init__(
@@ -110,12 +530,19 @@ class ChatMessage(BaseModel):
     tool_call_id: Optional[str] = None
 
 class FunctionCall(BaseModel):
+    id: Optional[str] = None
+    type: Literal["function_call"] = "function_call"
+    call_id: str = ""
     name: str
     arguments: str
 
 class FunctionCallOutput(BaseModel):
-    name: str
-    result: Any
+    id: Optional[str] = None
+    type: Literal["function_call_output"] = "function_call_output"
+    call_id: str = ""
+    name: str = ""
+    output: str = ""
+    is_error: bool = False
 
 class RawFunctionTool(BaseModel):
     name: str
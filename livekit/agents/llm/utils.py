@@ -1,5 +1,10 @@
 # livekit/agents/llm/utils.py
 
+from __future__ import annotations
+
+import functools
+from typing import Any
+
 def get_stop_response(*args, **kwargs):
     # Dummy fallback
     return {"type": "stop", "reason": "not_implemented"}
@@ -10,3 +15,31 @@ class StopResponse:
 
     def dict(self):
         return {"type": "stop", "reason": self.reason}
+
+
+class TokenCounter:
+    """tiktoken when installed, ~4 characters per token otherwise"""
+
+    def __init__(self) -> None:
+        try:
+            import tiktoken
+
+            self._encoding: Any = tiktoken.get_encoding("o200k_base")
+        except Exception:  # not installed, or the encoding can't be downloaded
+            self._encoding = None
+
+    def count(self, text: str) -> int:
+        if self._encoding is None:
+            return (len(text) + 3) // 4
+        return len(self._encoding.encode(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if self._encoding is None:
+            return text[: max_tokens * 4]
+        return self._encoding.decode(self._encoding.encode(text)[:max_tokens])
+
+
+@functools.lru_cache(maxsize=None)
+def token_counter() -> TokenCounter:
+    """Shared by the process, the encoding is loaded once"""
+    return TokenCounter()
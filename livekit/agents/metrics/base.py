@@ -47,6 +47,9 @@ class TTSMetrics(BaseModel):
     streamed: bool
     segment_id: str | None = None
     speech_id: str | None = None
+    first_request_delay: float | None = None
+    """Time between the first text of a segment pushed to a stream adapter and its first TTS
+    request, set on the metrics of that request."""
 
 
 class VADMetrics(BaseModel):
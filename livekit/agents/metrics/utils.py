@@ -19,8 +19,14 @@ def log_metrics(metrics: AgentMetrics, *, logger: logging.Logger | None = None)
             f"RealtimeModel metrics: ttft={metrics.ttft:.2f}, input_tokens={metrics.input_tokens}, cached_input_tokens={metrics.input_token_details.cached_tokens}, output_tokens={metrics.output_tokens}, total_tokens={metrics.total_tokens}, tokens_per_second={metrics.tokens_per_second:.2f}"  # noqa: E501
         )
     elif isinstance(metrics, TTSMetrics):
+        first_request = (
+            f", first_request_delay={metrics.first_request_delay:.2f}"
+            if metrics.first_request_delay is not None
+            else ""
+        )
         logger.info(
             f"TTS metrics: ttfb={metrics.ttfb}, audio_duration={metrics.audio_duration:.2f}"
+            f"{first_request}"
         )
     elif isinstance(metrics, EOUMetrics):
         logger.info(
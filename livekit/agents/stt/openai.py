@@ -1,44 +1,403 @@
-import os
+from __future__ import annotations
+
 import asyncio
+import os
+import time
+import weakref
+from collections.abc import AsyncIterable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
 import aiohttp
-import types
-from livekit.agents.stt.base import STT
-from livekit.agents.utils.audio import pcm_to_wav_bytes
 
+from livekit import rtc
+
+from .. import utils
+from .._exceptions import APIConnectionError, APIStatusError, APITimeoutError
+from ..log import logger
+from ..types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, APIConnectOptions, NotGivenOr
+from ..utils import AudioBuffer, is_given
+from ..utils.audio import pcm_to_wav_bytes
+from .stt import (
+    STT,
+    RecognitionUsage,
+    RecognizeStream,
+    SpeechData,
+    SpeechEvent,
+    SpeechEventType,
+    STTCapabilities,
+)
+
+if TYPE_CHECKING:
+    from ..voice.vad import VAD, VADEvent, VADStream
+
+OPENAI_TRANSCRIPTION_URL = "https://api.openai.com/v1/audio/transcriptions"
+
+
+@dataclass
+class _STTOptions:
+    model: str
+    language: str
+    min_chunk_duration: float
+    max_chunk_duration: float
+    pause_threshold: float
+
+
+@dataclass
+class _Utterance:
+    request_id: str
+    pending_frames: list[rtc.AudioFrame]  # audio not uploaded yet
+    chunk_tasks: list[asyncio.Task[str]] = field(default_factory=list)  # uploaded, in order
+    chunk_texts: list[str] = field(default_factory=list)  # texts of the chunks already published
+    publish_task: asyncio.Task[None] | None = None
+    ended_at: float | None = None  # perf_counter() at end of speech
 
 
 class OpenAIWhisperSTT(STT):
-    def __init__(self, model: str = "whisper-1", api_key: str | None = None):
+    def __init__(
+        self,
+        model: str = "whisper-1",
+        api_key: str | None = None,
+        *,
+        language: str = "en",
+        vad: VAD | None = None,
+        min_chunk_duration: float = 2.0,
+        max_chunk_duration: float = 6.0,
+        pause_threshold: float = 0.35,
+    ) -> None:
+        """
+        Create a Whisper STT.
+
+        Whisper only transcribes complete files, so `stream()` splits each utterance into
+        chunks while the user is still talking: once `min_chunk_duration` seconds are
+        buffered, the audio is cut at the next VAD window whose speech probability is below
+        `pause_threshold` (or at `max_chunk_duration`) and uploaded in the background.
+        At end of speech only the remaining tail has to be transcribed.
+
+        Args:
+            model (str): Whisper model name.
+            api_key (str | None): OpenAI API key, defaults to ``OPENAI_API_KEY``.
+            language (str): Language of the audio.
+            vad (VAD | None): VAD used to segment the audio, a SileroVAD is created if omitted.
+                When the voice pipeline runs the same VAD, the streams reuse its events
+                (see `share_vad_events`).
+            min_chunk_duration (float): Minimum duration of a chunk uploaded mid-utterance.
+            max_chunk_duration (float): Force a cut when no pause was found after this duration.
+            pause_threshold (float): Speech probability under which a window counts as a pause.
+        """
+        super().__init__(capabilities=STTCapabilities(streaming=True, interim_results=True))
         self.model = model
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("Missing OpenAI API key")
-        
-    def on(self, event_name, callback):
-        # Dummy event handler (does nothing)
-        pass
 
-    async def transcribe(self, pcm: bytes, sample_rate: int) -> str:
-        wav_bytes = pcm_to_wav_bytes(pcm, sample_rate)
+        self._opts = _STTOptions(
+            model=model,
+            language=language,
+            min_chunk_duration=min_chunk_duration,
+            max_chunk_duration=max_chunk_duration,
+            pause_threshold=pause_threshold,
+        )
+        self._vad = vad
+        self._vad_shared = False
+        self._streams = weakref.WeakSet[WhisperRecognizeStream]()
+
+    def share_vad_events(self, vad: VAD) -> bool:
+        """Segment on the events of `vad` when it is the VAD of this STT (or none was given),
+        the streams don't run a second VAD stream then"""
+        if self._vad is not None and self._vad is not vad:
+            return False
+
+        self._vad = vad
+        self._vad_shared = True
+        return True
+
+    def push_vad_event(self, ev: VADEvent) -> None:
+        for stream in self._streams:
+            stream.push_vad_event(ev)
+
+    def _get_vad(self) -> VAD:
+        if self._vad is None:
+            from ..voice.vad import SileroVAD
+
+            self._vad = SileroVAD()
+        return self._vad
+
+    def prewarm(self) -> None:
+        utils.http_context.prewarm(OPENAI_TRANSCRIPTION_URL)
+
+    async def _transcribe_wav(
+        self, wav_bytes: bytes, *, language: str, prompt: str, conn_options: APIConnectOptions
+    ) -> str:
         headers = {
             "Authorization": f"Bearer {self.api_key}",
         }
 
         data = aiohttp.FormData()
         data.add_field("file", wav_bytes, filename="audio.wav", content_type="audio/wav")
-        data.add_field("model", self.model)
-        data.add_field("language", "en")
+        data.add_field("model", self._opts.model)
+        data.add_field("language", language)
+        if prompt:
+            data.add_field("prompt", prompt)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post("https://api.openai.com/v1/audio/transcriptions", headers=headers, data=data) as resp:
+        try:
+            async with utils.http_context.http_session().post(
+                OPENAI_TRANSCRIPTION_URL,
+                headers=headers,
+                data=data,
+                timeout=aiohttp.ClientTimeout(total=30, sock_connect=conn_options.timeout),
+            ) as resp:
                 if resp.status != 200:
-                    text = await resp.text()
-                    raise RuntimeError(f"OpenAI STT failed ({resp.status}): {text}")
+                    raise APIStatusError(
+                        "OpenAI STT failed",
+                        status_code=resp.status,
+                        request_id=resp.headers.get("x-request-id"),
+                        body=await resp.text(),
+                    )
                 result = await resp.json()
-                return result["text"]
+                return str(result["text"]).strip()
+        except asyncio.TimeoutError:
+            raise APITimeoutError() from None
+        except aiohttp.ClientError as e:
+            raise APIConnectionError() from e
+
+    async def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        return await self._transcribe_wav(
+            pcm_to_wav_bytes(pcm, sample_rate),
+            language=self._opts.language,
+            prompt="",
+            conn_options=DEFAULT_API_CONNECT_OPTIONS,
+        )
+
+    async def _recognize_impl(
+        self,
+        buffer: AudioBuffer,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions,
+    ) -> SpeechEvent:
+        language = language if is_given(language) else self._opts.language
+        text = await self._transcribe_wav(
+            rtc.combine_audio_frames(buffer).to_wav_bytes(),
+            language=language,
+            prompt="",
+            conn_options=conn_options,
+        )
+        return SpeechEvent(
+            type=SpeechEventType.FINAL_TRANSCRIPT,
+            request_id=utils.shortuuid(),
+            alternatives=[SpeechData(language=language, text=text)],
+        )
+
+    def stream(
+        self,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> WhisperRecognizeStream:
+        stream = WhisperRecognizeStream(
+            stt=self,
+            vad=self._get_vad(),
+            vad_shared=self._vad_shared,
+            opts=self._opts,
+            language=language if is_given(language) else self._opts.language,
+            conn_options=conn_options,
+        )
+        self._streams.add(stream)
+        return stream
+
+
+class WhisperRecognizeStream(RecognizeStream):
+    def __init__(
+        self,
+        *,
+        stt: OpenAIWhisperSTT,
+        vad: VAD,
+        vad_shared: bool,
+        opts: _STTOptions,
+        language: str,
+        conn_options: APIConnectOptions,
+    ) -> None:
+        super().__init__(stt=stt, conn_options=conn_options)
+        self._whisper = stt
+        self._vad = vad
+        # events pushed by the voice pipeline, when its VAD stream is shared
+        self._vad_events = utils.aio.Chan[VADEvent]() if vad_shared else None
+        self._opts = opts
+        self._language = language
+
+    async def _run(self) -> None:
+        from ..voice.vad import VADEventType
+
+        vad_stream: VADStream | None = None
+        events: AsyncIterable[VADEvent]
+        if self._vad_events is not None:
+            events = self._vad_events  # of the VAD stream run by the voice pipeline
+        else:
+            events = vad_stream = self._vad.stream()
+
+        utterance: _Utterance | None = None  # being spoken
+        utterances: list[_Utterance] = []  # being spoken or finalized
+        finalize_ch = utils.aio.Chan[_Utterance]()
+
+        def _upload_pending(utt: _Utterance) -> None:
+            if not utt.pending_frames:
+                return
+
+            frame = rtc.combine_audio_frames(utt.pending_frames)
+            utt.pending_frames = []
+            utt.chunk_tasks.append(
+                asyncio.create_task(
+                    self._whisper._transcribe_wav(
+                        frame.to_wav_bytes(),
+                        language=self._language,
+                        prompt=" ".join(utt.chunk_texts),
+                        conn_options=self._conn_options,
+                    )
+                )
+            )
+            self._event_ch.send_nowait(
+                SpeechEvent(
+                    type=SpeechEventType.RECOGNITION_USAGE,
+                    request_id=utt.request_id,
+                    recognition_usage=RecognitionUsage(audio_duration=frame.duration),
+                )
+            )
+
+            if utt.ended_at is None and (utt.publish_task is None or utt.publish_task.done()):
+                utt.publish_task = asyncio.create_task(_publish_interims(utt))
+
+        async def _publish_interims(utt: _Utterance) -> None:
+            """emit an interim transcript each time the next chunk (in order) is transcribed"""
+            while len(utt.chunk_texts) < len(utt.chunk_tasks):
+                try:
+                    text = await utt.chunk_tasks[len(utt.chunk_texts)]
+                except Exception:
+                    return  # the error is raised by _finalize
+                utt.chunk_texts.append(text)
+                transcript = " ".join(t for t in utt.chunk_texts if t)
+                if utt.ended_at is None and transcript:
+                    self._event_ch.send_nowait(
+                        SpeechEvent(
+                            type=SpeechEventType.INTERIM_TRANSCRIPT,
+                            request_id=utt.request_id,
+                            alternatives=[SpeechData(language=self._language, text=transcript)],
+                        )
+                    )
+
+        async def _finalize(utt: _Utterance) -> None:
+            try:
+                texts = await asyncio.gather(*utt.chunk_tasks)
+            except BaseException:
+                # gather doesn't cancel the other uploads when one of them fails
+                await utils.aio.cancel_and_wait(*utt.chunk_tasks)
+                raise
+            finally:
+                if utt.publish_task is not None:
+                    await utils.aio.cancel_and_wait(utt.publish_task)
+
+            transcript = " ".join(t for t in texts if t)
+            logger.debug(
+                "whisper final transcript",
+                extra={
+                    "tail_delay": time.perf_counter() - (utt.ended_at or 0.0),
+                    "chunks": len(texts),
+                },
+            )
+            if transcript:
+                self._event_ch.send_nowait(
+                    SpeechEvent(
+                        type=SpeechEventType.FINAL_TRANSCRIPT,
+                        request_id=utt.request_id,
+                        alternatives=[SpeechData(language=self._language, text=transcript)],
+                    )
+                )
+
+        async def _finalize_task() -> None:
+            """final transcripts in utterance order, the next utterance is recognized meanwhile"""
+            async for utt in finalize_ch:
+                await _finalize(utt)
+                utterances.remove(utt)
+
+        async def _forward_input() -> None:
+            """forward input to vad"""
+            async for input in self._input_ch:
+                if vad_stream is None:
+                    continue  # segmented on the shared events
+                if isinstance(input, self._FlushSentinel):
+                    vad_stream.flush()
+                    continue
+                vad_stream.push_frame(input)
+
+            if vad_stream is not None:
+                vad_stream.end_input()
+            else:
+                self._close_vad_events()
+
+        def _on_inference_done(utt: _Utterance, ev: VADEvent) -> None:
+            utt.pending_frames.extend(ev.frames)
+
+            duration = sum(f.duration for f in utt.pending_frames)
+            if duration >= self._opts.max_chunk_duration or (
+                duration >= self._opts.min_chunk_duration
+                and ev.probability < self._opts.pause_threshold
+            ):
+                _upload_pending(utt)
+
+        async def _recognize() -> None:
+            nonlocal utterance
+            async for ev in events:
+                if ev.type == VADEventType.START_OF_SPEECH:
+                    # contains the prefix padding and the windows that triggered the detection
+                    utterance = _Utterance(
+                        request_id=utils.shortuuid(), pending_frames=list(ev.frames)
+                    )
+                    utterances.append(utterance)
+                    self._event_ch.send_nowait(
+                        SpeechEvent(
+                            SpeechEventType.START_OF_SPEECH, request_id=utterance.request_id
+                        )
+                    )
+                elif ev.type == VADEventType.INFERENCE_DONE and utterance is not None:
+                    _on_inference_done(utterance, ev)
+                elif ev.type == VADEventType.END_OF_SPEECH and utterance is not None:
+                    utterance.ended_at = time.perf_counter()
+                    self._event_ch.send_nowait(
+                        SpeechEvent(
+                            SpeechEventType.END_OF_SPEECH, request_id=utterance.request_id
+                        )
+                    )
+                    _upload_pending(utterance)  # the short tail
+                    finalize_ch.send_nowait(utterance)
+                    utterance = None
+
+            finalize_ch.close()
+
+        tasks = [
+            asyncio.create_task(_forward_input(), name="forward_input"),
+            asyncio.create_task(_recognize(), name="recognize"),
+            asyncio.create_task(_finalize_task(), name="finalize"),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await utils.aio.cancel_and_wait(*tasks)
+            for utt in utterances:
+                await utils.aio.cancel_and_wait(*utt.chunk_tasks)
+                if utt.publish_task is not None:
+                    await utils.aio.cancel_and_wait(utt.publish_task)
+            if vad_stream is not None:
+                await vad_stream.aclose()
+
+    def push_vad_event(self, ev: VADEvent) -> None:
+        if self._vad_events is not None and not self._vad_events.closed:
+            self._vad_events.send_nowait(ev)
 
-    from types import SimpleNamespace
+    async def aclose(self) -> None:
+        await super().aclose()
+        self._close_vad_events()
 
-    @property
-    def capabilities(self):
-        return types.SimpleNamespace(streaming=False)
+    def _close_vad_events(self) -> None:
+        if self._vad_events is not None:
+            self._vad_events.close()
+        self._whisper._streams.discard(self)
@@ -2,13 +2,16 @@ from __future__ import annotations
 
 import asyncio
 from collections.abc import AsyncIterable
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from .. import utils
 from ..types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, APIConnectOptions, NotGivenOr
 
 from .stt import STT, RecognizeStream, SpeechEvent, SpeechEventType, STTCapabilities
 
+if TYPE_CHECKING:
+    from ..voice.vad import VAD
+
 def get_vad():
     from ..voice.vad.silero import SileroVAD as VAD
     return VAD()
@@ -84,6 +87,8 @@ class StreamAdapterWrapper(RecognizeStream):
         pass  # do nothing
 
     async def _run(self) -> None:
+        from ..voice.vad import VADEventType
+
         vad_stream = self._vad.stream()
 
         async def _forward_input() -> None:
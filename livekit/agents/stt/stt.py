@@ -7,7 +7,7 @@ from collections.abc import AsyncIterable, AsyncIterator
 from dataclasses import dataclass, field
 from enum import Enum, unique
 from types import TracebackType
-from typing import Generic, Literal, TypeVar, Union
+from typing import TYPE_CHECKING, Generic, Literal, TypeVar, Union
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -20,6 +20,9 @@ from ..types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, APIConnectOptions, N
 from ..utils import AudioBuffer, aio, is_given
 from ..utils.audio import calculate_audio_duration
 
+if TYPE_CHECKING:
+    from ..voice.vad import VAD, VADEvent
+
 
 @unique
 class SpeechEventType(str, Enum):
@@ -200,6 +203,21 @@ class STT(
         """Pre-warm connection to the STT service"""
         pass
 
+    def share_vad_events(self, vad: VAD) -> bool:
+        """
+        Called by the voice pipeline with the VAD it runs on the same audio. An STT that
+        segments the audio with a VAD can return True to get the events of the pipeline's
+        VAD stream (see `push_vad_event`) instead of running a second one.
+
+        Returns:
+            bool: Whether the events are used, False by default.
+        """
+        return False
+
+    def push_vad_event(self, ev: VADEvent) -> None:
+        """An event of the VAD shared with `share_vad_events`, for the open streams"""
+        pass
+
 
 class RecognizeStream(ABC):
     class _FlushSentinel:
@@ -338,6 +356,10 @@ class RecognizeStream(ABC):
         else:
             self._input_ch.send_nowait(frame)
 
+    def push_vad_event(self, ev: VADEvent) -> None:
+        """An event of the VAD shared with `STT.share_vad_events`, ignored by default"""
+        pass
+
     def flush(self) -> None:
         """Mark the end of the current segment"""
         self._check_input_not_ended()
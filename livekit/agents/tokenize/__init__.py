@@ -1,5 +1,5 @@
 from . import basic, utils
-from .token_stream import BufferedSentenceStream, BufferedWordStream
+from .token_stream import BufferedSentenceStream, BufferedWordStream, EagerFlushOptions
 from .tokenizer import (
     SentenceStream,
     SentenceTokenizer,
@@ -16,6 +16,7 @@ __all__ = [
     "TokenData",
     "BufferedSentenceStream",
     "BufferedWordStream",
+    "EagerFlushOptions",
     "basic",
     "utils",
 ]
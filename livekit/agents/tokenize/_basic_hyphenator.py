@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import functools
 import re
-from typing import Any
+
+# words hyphenated at most, process wide. The synchronizer hyphenates every spoken word and
+# a conversation keeps using the same few hundred
+CACHE_SIZE = 4096
 
 
 # Frank Liang hyphenator. impl from https://github.com/jfinkels/hyphenate
@@ -9,7 +13,15 @@ from typing import Any
 # Users that want different languages or more advanced hyphenation should use the livekit-plugins-*
 class Hyphenator:
     def __init__(self, patterns: str, exceptions: str = "") -> None:
-        self.tree: dict[str | None, Any] = {}
+        # The patterns are stored in a trie flattened into an array, a node is the offset of its
+        # row: the child of node n for the character of index c is next[n + c], 0 if there's
+        # none (the root is never a child). points[n // width] are the points of the pattern
+        # ending at node n, if any.
+        chars = sorted(set(re.sub("[0-9\\s]", "", patterns)))
+        self._char_index = {c: i for i, c in enumerate(chars)}
+        self._width = len(chars)
+        self._next = [0] * self._width
+        self._points: list[tuple[int, ...] | None] = [None]
         for pattern in patterns.split():
             self._insert_pattern(pattern)
 
@@ -25,15 +37,15 @@ class Hyphenator:
         chars = re.sub("[0-9]", "", pattern)
         points = [int(d or 0) for d in re.split("[.a-z]", pattern)]
 
-        # Insert the pattern into the tree. Each character finds a dict
-        # another level down in the tree, and leaf nodes have the list of
-        # points.
-        t = self.tree
+        node = 0
         for c in chars:
-            if c not in t:
-                t[c] = {}
-            t = t[c]
-        t[None] = points
+            i = node + self._char_index[c]
+            if not self._next[i]:
+                self._next[i] = len(self._next)
+                self._next.extend([0] * self._width)
+                self._points.append(None)
+            node = self._next[i]
+        self._points[node // self._width] = tuple(points)
 
     def hyphenate_word(self, word: str) -> list[str]:
         """Given a word, returns a list of pieces, broken at the possible
@@ -47,18 +59,24 @@ class Hyphenator:
             points = self.exceptions[word.lower()]
         else:
             work = "." + word.lower() + "."
+            # -1 for the characters no pattern contains
+            indices = [self._char_index.get(c, -1) for c in work]
             points = [0] * (len(work) + 1)
+            next_, width, node_points = self._next, self._width, self._points
             for i in range(len(work)):
-                t = self.tree
-                for c in work[i:]:
-                    if c in t:
-                        t = t[c]
-                        if None in t:
-                            p = t[None]
-                            for j, p_j in enumerate(p):
-                                points[i + j] = max(points[i + j], p_j)
-                    else:
+                node = 0
+                for j in range(i, len(work)):
+                    c = indices[j]
+                    if c < 0:
+                        break
+                    node = next_[node + c]
+                    if not node:
                         break
+                    p = node_points[node // width]
+                    if p is not None:
+                        for k, p_k in enumerate(p, i):
+                            if p_k > points[k]:
+                                points[k] = p_k
             # No hyphens in the first two chars or the last two.
             points[1] = points[2] = points[-2] = points[-3] = 0
 
@@ -531,4 +549,17 @@ ret-ri-bu-tion ta-ble
 """
 
 hyphenator = Hyphenator(PATTERNS, EXCEPTIONS)
-hyphenate_word = hyphenator.hyphenate_word
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _hyphenate_word(word: str) -> tuple[str, ...]:
+    return tuple(hyphenator.hyphenate_word(word))
+
+
+def hyphenate_word(word: str) -> list[str]:
+    return list(_hyphenate_word(word))
+
+
+def count_hyphens(word: str) -> int:
+    """Number of pieces of hyphenate_word (~syllables), without building the list"""
+    return len(_hyphenate_word(word))
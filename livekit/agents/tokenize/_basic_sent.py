@@ -1,56 +1,214 @@
 import re
 
-
 # rule based segmentation based on https://stackoverflow.com/a/31505798, works surprisingly well
+#
+# The rules of the original are regex substitutions done one after the other, protecting
+# periods with a "<prd>" placeholder and marking the end of sentences with "<stop>". They only
+# ever look at the characters around a period, so they are evaluated here on the positions of
+# the periods, in the same order and with the same non-overlapping semantics, and the text is
+# only scanned once.
+
+_PUNCTUATIONS_RE = re.compile(r"[.!?。！？]")
+_WEBSITES_RE = re.compile(r"com|net|org|io|gov|edu|me")
+_STARTERS_RE = re.compile(
+    r"Mr|Mrs|Ms|Dr|Prof|Capt|Cpt|Lt|He\s|She\s|It\s|They\s|Their\s|Our\s|We\s|But\s|However\s|That\s|This\s|Wherever"  # noqa: E501
+)
+
+_ALPHABETS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
+_UPPERCASE = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_DIGITS = frozenset("0123456789")
+_QUOTES = frozenset('"”')
+_PREFIXES = frozenset(("Mr", "St", "Ms", "Dr"))  # and "Mrs"
+_SUFFIXES = frozenset(("Jr", "Sr", "Co"))  # and "Inc", "Ltd"
+_LONG_SUFFIXES = frozenset(("Inc", "Ltd"))
+# a rule can only start at a period with one of these around it
+_AFTER = _ALPHABETS | _DIGITS | {"."}
+_BEFORE = _DIGITS | {"."}
+_TWO_LETTERS = _PREFIXES | _SUFFIXES | {"Ph"}
+_THREE_LETTERS = _LONG_SUFFIXES | {"Mrs"}
+
+# stands for a newline when retain_format is set, it isn't a whitespace so the rules don't
+# match across lines
+_NEL = "\x00"
+
+
 def split_sentences(
     text: str, min_sentence_len: int = 20, retain_format: bool = False
 ) -> list[tuple[str, int, int]]:
     """
-    the text may not contain substrings "<prd>" or "<stop>"
+    the text may not contain the character "\\x00" when retain_format is set
     """
-    alphabets = r"([A-Za-z])"
-    prefixes = r"(Mr|St|Mrs|Ms|Dr)[.]"
-    suffixes = r"(Inc|Ltd|Jr|Sr|Co)"
-    starters = r"(Mr|Mrs|Ms|Dr|Prof|Capt|Cpt|Lt|He\s|She\s|It\s|They\s|Their\s|Our\s|We\s|But\s|However\s|That\s|This\s|Wherever)"  # noqa: E501
-    acronyms = r"([A-Z][.][A-Z][.](?:[A-Z][.])?)"
-    websites = r"[.](com|net|org|io|gov|edu|me)"
-    digits = r"([0-9])"
-    multiple_dots = r"\.{2,}"
-
-    # fmt: off
-    if retain_format:
-        text = text.replace("\n","<nel><stop>")
-    else:
-        text = text.replace("\n"," ")
-
-    text = re.sub(prefixes,"\\1<prd>", text)
-    text = re.sub(websites,"<prd>\\1", text)
-    text = re.sub(digits + "[.]" + digits,"\\1<prd>\\2",text)
-    # text = re.sub(multiple_dots, lambda match: "<prd>" * len(match.group(0)) + "<stop>", text)
-    # TODO(theomonnom): need improvement for ""..." dots", check capital + next sentence should not be  # noqa: E501
-    # small
-    text = re.sub(multiple_dots, lambda match: "<prd>" * len(match.group(0)), text)
+    text = text.replace("\n", _NEL if retain_format else " ")
+    n = len(text)
+
+    punctuations = [m.start() for m in _PUNCTUATIONS_RE.finditer(text)]
+    protected: set[int] = set()  # periods that don't end a sentence ("<prd>")
+    stops: set[int] = set()  # a sentence ends after these positions ("<stop>")
+
+    # most periods end a word followed by a space, no rule starts at them
+    periods = [
+        p
+        for p in punctuations
+        if text[p] == "."
+        and (
+            text[p + 1 : p + 2] in _AFTER
+            or (p >= 1 and text[p - 1] in _BEFORE)
+            or (p >= 2 and (text[p - 2].isspace() or text[p - 2 : p] in _TWO_LETTERS))
+            or (p >= 3 and text[p - 3 : p] in _THREE_LETTERS)
+        )
+    ]
+
+    def free(p: int) -> bool:
+        return 0 <= p < n and text[p] == "." and p not in protected
+
+    def suffix_start(p: int) -> int:
+        if p >= 3 and text[p - 3 : p] in _LONG_SUFFIXES:
+            return p - 4
+        if p >= 2 and text[p - 2 : p] in _SUFFIXES:
+            return p - 3
+        return -1
+
+    # prefixes and websites, e.g. "Mr.", "livekit.io"
+    for p in periods:
+        if (
+            (p >= 2 and text[p - 2 : p] in _PREFIXES)
+            or (p >= 3 and text[p - 3 : p] == "Mrs")
+            or _WEBSITES_RE.match(text, p + 1)
+        ):
+            protected.add(p)
+
+    # digits, "1.5"
+    end = 1
+    for p in periods:
+        if (
+            end <= p < n - 1
+            and text[p - 1] in _DIGITS
+            and text[p + 1] in _DIGITS
+            and p not in protected
+        ):
+            protected.add(p)
+            end = p + 3
+
+    # multiple dots, "..."
+    protected.update([p for p in periods if free(p) and (free(p - 1) or free(p + 1))])
+
     if "Ph.D" in text:
-        text = text.replace("Ph.D.","Ph<prd>D<prd>")
-    text = re.sub(r"\s" + alphabets + "[.] "," \\1<prd> ",text)
-    text = re.sub(acronyms+" "+starters,"\\1<stop> \\2",text)
-    text = re.sub(alphabets + "[.]" + alphabets + "[.]" + alphabets + "[.]","\\1<prd>\\2<prd>\\3<prd>",text)  # noqa: E501
-    text = re.sub(alphabets + "[.]" + alphabets + "[.]","\\1<prd>\\2<prd>",text)
-    text = re.sub(r" "+suffixes+"[.] "+starters," \\1<stop> \\2",text)
-    text = re.sub(r" "+suffixes+"[.]"," \\1<prd>",text)
-    text = re.sub(r" " + alphabets + "[.]"," \\1<prd>",text)
-
-    # mark end of sentence punctuations with <stop>
-    text = re.sub(r"([.!?。！？])([\"”])", "\\1\\2<stop>", text)
-    text = re.sub(r"([.!?。！？])(?![\"”])", "\\1<stop>", text)
-
-    text = text.replace("<prd>",".")
-    # fmt: on
-
-    if retain_format:
-        text = text.replace("<nel>", "\n")
-    splitted_sentences = text.split("<stop>")
-    text = text.replace("<stop>", "")
+        for p in periods:
+            if (
+                p >= 2
+                and text[p - 2 : p] == "Ph"
+                and text[p + 1 : p + 2] == "D"
+                and free(p)
+                and free(p + 2)
+            ):
+                protected.update((p, p + 2))
+
+    # single letters followed by a space, "J. Doe"; the whitespace before them becomes a space
+    end = 2
+    spaces = []
+    for p in periods:
+        if (
+            p >= end
+            and text[p + 1 : p + 2] == " "
+            and text[p - 1] in _ALPHABETS
+            and text[p - 2].isspace()
+            and free(p)
+        ):
+            protected.add(p)
+            end = p + 4
+            if text[p - 2] != " ":
+                spaces.append(p - 2)
+    if spaces:
+        chars = list(text)
+        for i in spaces:
+            chars[i] = " "
+        text = "".join(chars)
+
+    # acronyms followed by a sentence starter, "U.S. He"
+    end = 1
+    for p in periods:
+        if (
+            p < end
+            or text[p - 1] not in _UPPERCASE
+            or text[p + 1 : p + 2] not in _UPPERCASE
+            or not free(p)
+            or not free(p + 2)
+        ):
+            continue
+        last = p + 2
+        if text[p + 3 : p + 4] in _UPPERCASE and free(p + 4):
+            last = p + 4
+        if text[last + 1 : last + 2] == " " and (m := _STARTERS_RE.match(text, last + 2)):
+            stops.add(last)
+            end = m.end() + 1
+
+    # letters separated by periods, "a.b.c." then "e.g."
+    end = 1
+    for p in periods:
+        if (
+            p >= end
+            and text[p - 1] in _ALPHABETS
+            and text[p + 1 : p + 2] in _ALPHABETS
+            and text[p + 3 : p + 4] in _ALPHABETS
+            and free(p)
+            and free(p + 2)
+            and free(p + 4)
+        ):
+            protected.update((p, p + 2, p + 4))
+            end = p + 6
+    end = 1
+    for p in periods:
+        if (
+            p >= end
+            and text[p - 1] in _ALPHABETS
+            and text[p + 1 : p + 2] in _ALPHABETS
+            and free(p)
+            and free(p + 2)
+        ):
+            protected.update((p, p + 2))
+            end = p + 4
+
+    # suffixes followed by a sentence starter, "Acme Inc. They"
+    end = 0
+    for p in periods:
+        start = suffix_start(p)
+        if (
+            start >= end
+            and text[start] == " "
+            and text[p + 1 : p + 2] == " "
+            and free(p)
+            and (m := _STARTERS_RE.match(text, p + 2))
+        ):
+            protected.add(p)
+            stops.add(p)
+            end = m.end()
+
+    # other suffixes, and single letters, "Acme Inc.", " a."
+    for p in periods:
+        if p in protected:
+            continue
+        start = suffix_start(p)
+        if (start >= 0 and text[start] == " ") or (
+            p >= 2 and text[p - 2] == " " and text[p - 1] in _ALPHABETS
+        ):
+            protected.add(p)
+
+    # end of sentence punctuations, after the closing quote if any
+    for p in punctuations:
+        if p in protected:
+            continue
+        stops.add(p + 1 if text[p + 1 : p + 2] in _QUOTES else p)
+
+    if retain_format and _NEL in text:
+        stops.update(i for i, c in enumerate(text) if c == _NEL)
+        text = text.replace(_NEL, "\n")
+
+    splitted_sentences = []
+    prev = 0
+    for stop in sorted(stops):
+        splitted_sentences.append(text[prev : stop + 1])
+        prev = stop + 1
+    splitted_sentences.append(text[prev:])
 
     sentences: list[tuple[str, int, int]] = []
 
@@ -19,6 +19,7 @@ __all__ = [
     "SentenceTokenizer",
     "WordTokenizer",
     "hyphenate_word",
+    "count_hyphens",
     "tokenize_paragraphs",
 ]
 
@@ -29,6 +30,7 @@ class _TokenizerOptions:
     min_sentence_len: int
     stream_context_len: int
     retain_format: bool
+    eager_flush: token_stream.EagerFlushOptions | None
 
 
 class SentenceTokenizer(tokenizer.SentenceTokenizer):
@@ -39,12 +41,19 @@ class SentenceTokenizer(tokenizer.SentenceTokenizer):
         min_sentence_len: int = 20,
         stream_context_len: int = 10,
         retain_format: bool = False,
+        eager_flush: token_stream.EagerFlushOptions | None = None,
     ) -> None:
+        """
+        Args:
+            eager_flush: When streaming, send the first clause of each segment without waiting
+                for the end of its sentence, lowers the latency of a TTS fed by the stream.
+        """
         self._config = _TokenizerOptions(
             language=language,
             min_sentence_len=min_sentence_len,
             stream_context_len=stream_context_len,
             retain_format=retain_format,
+            eager_flush=eager_flush,
         )
 
     def tokenize(self, text: str, *, language: str | None = None) -> list[str]:
@@ -66,6 +75,7 @@ class SentenceTokenizer(tokenizer.SentenceTokenizer):
             ),
             min_token_len=self._config.min_sentence_len,
             min_ctx_len=self._config.stream_context_len,
+            eager_flush=self._config.eager_flush,
         )
 
 
@@ -100,6 +110,10 @@ def hyphenate_word(word: str) -> list[str]:
     return _basic_hyphenator.hyphenate_word(word)
 
 
+def count_hyphens(word: str) -> int:
+    return _basic_hyphenator.count_hyphens(word)
+
+
 def split_words(
     text: str, *, ignore_punctuation: bool = True, split_character: bool = False
 ) -> list[tuple[str, int, int]]:
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import asyncio
+import re
 import typing
+from dataclasses import dataclass
 from typing import Callable, Union
 
 from ..utils import aio, shortuuid
@@ -11,6 +14,33 @@ from .tokenizer import SentenceStream, TokenData, WordStream
 TokenizeCallable = Callable[[str], Union[list[str], list[tuple[str, int, int]]]]
 
 
+# Characters that may end a sentence or a word. Text is only tokenized when one of them was
+# pushed, and while the text following the last one is shorter than BOUNDARY_LOOKAHEAD: the
+# rules deciding whether it really ends a token (abbreviations, decimals, websites, the
+# minimum token length) only look at a few characters around it.
+SENTENCE_BOUNDARY_RE = re.compile(r"[.!?。！？\n]")
+WORD_BOUNDARY_RE = re.compile(r"\s")
+BOUNDARY_LOOKAHEAD = 16
+
+# complete words of the pending text, the first clause is cut after one of them
+_COMPLETE_WORD_RE = re.compile(r"\S+(?=\s)")
+CLAUSE_PUNCTUATIONS = frozenset(",;:—–")
+CONJUNCTIONS = frozenset(("and", "but", "or", "so", "because", "which", "while", "then"))
+
+
+@dataclass
+class EagerFlushOptions:
+    """Send the first clause of each segment without waiting for the end of its sentence, the
+    following text is batched in full sentences."""
+
+    min_words: int = 3
+    """The first clause is at least this many words"""
+    max_words: int = 10
+    """Words sent at once if no comma or conjunction was found"""
+    max_delay: float = 0.5
+    """Seconds after the first text of the segment after which the complete words are sent"""
+
+
 class BufferedTokenStream:
     def __init__(
         self,
@@ -19,52 +49,87 @@ class BufferedTokenStream:
         min_token_len: int,
         min_ctx_len: int,
         retain_format: bool = False,
+        boundary_re: re.Pattern[str] | None = None,
     ) -> None:
         self._event_ch = aio.Chan[TokenData]()
         self._tokenize_fnc = tokenize_fnc
         self._min_ctx_len = min_ctx_len
         self._min_token_len = min_token_len
         self._retain_format = retain_format
+        self._boundary_re = boundary_re
         self._current_segment_id = shortuuid()
 
         self._buf_tokens: list[str] = []  # <= min_token_len
-        self._in_buf = ""
+        # pushed text not emitted yet, joined only when it's tokenized
+        self._in_chunks: list[str] = []
+        self._in_len = 0
+        # position in the pending text of the last boundary character, -1 once it's resolved
+        self._boundary_pos = -1
         self._out_buf = ""
 
+    @property
+    def _in_buf(self) -> str:
+        if len(self._in_chunks) > 1:
+            self._in_chunks = ["".join(self._in_chunks)]
+        return self._in_chunks[0] if self._in_chunks else ""
+
     @typing.no_type_check
     def push_text(self, text: str) -> None:
         self._check_not_closed()
-        self._in_buf += text
+        if not text:
+            return
+
+        self._in_chunks.append(text)
+        self._in_len += len(text)
 
-        if len(self._in_buf) < self._min_ctx_len:
+        if self._boundary_re is None:
+            self._boundary_pos = self._in_len - 1
+        else:
+            # only the new text is scanned
+            for m in self._boundary_re.finditer(text):
+                self._boundary_pos = self._in_len - len(text) + m.start()
+
+        if self._in_len < self._min_ctx_len or self._boundary_pos < 0:
             return
 
-        while True:
-            tokens = self._tokenize_fnc(self._in_buf)
-            if len(tokens) <= 1:
-                break
+        self._tokenize()
+
+        if self._boundary_pos >= 0 and self._in_len - self._boundary_pos > BOUNDARY_LOOKAHEAD:
+            self._boundary_pos = -1
 
+    @typing.no_type_check
+    def _tokenize(self) -> None:
+        in_buf = self._in_buf
+        tokens = self._tokenize_fnc(in_buf)
+        if len(tokens) <= 1:
+            return
+
+        # a single pass: every token but the last one is complete
+        consumed = 0
+        for tok in tokens[:-1]:
             if self._out_buf:
                 self._out_buf += " "
 
-            tok = tokens.pop(0)
-            tok_text = tok
-            if isinstance(tok, tuple):
-                tok_text = tok[0]
-
+            tok_text = tok[0] if isinstance(tok, tuple) else tok
             self._out_buf += tok_text
             if len(self._out_buf) >= self._min_token_len:
-                self._event_ch.send_nowait(
-                    TokenData(token=self._out_buf, segment_id=self._current_segment_id)
-                )
-
+                self._send(self._out_buf)
                 self._out_buf = ""
 
             if isinstance(tok, tuple):
-                self._in_buf = self._in_buf[tok[2] :]
+                consumed = tok[2]
             else:
-                tok_i = max(self._in_buf.find(tok), 0)
-                self._in_buf = self._in_buf[tok_i + len(tok) :].lstrip()
+                tok_i = max(in_buf.find(tok, consumed), consumed)
+                consumed = tok_i + len(tok)
+                while consumed < len(in_buf) and in_buf[consumed].isspace():
+                    consumed += 1
+
+        in_buf = in_buf[consumed:]
+        self._in_chunks = [in_buf] if in_buf else []
+        self._in_len = len(in_buf)
+        self._boundary_pos -= consumed
+        if self._boundary_pos < 0:
+            self._boundary_pos = -1
 
     @typing.no_type_check
     def flush(self) -> None:
@@ -82,14 +147,17 @@ class BufferedTokenStream:
                     self._out_buf += " ".join(tokens)
 
             if self._out_buf:
-                self._event_ch.send_nowait(
-                    TokenData(token=self._out_buf, segment_id=self._current_segment_id)
-                )
+                self._send(self._out_buf)
 
         self._current_segment_id = shortuuid()
-        self._in_buf = ""
+        self._in_chunks = []
+        self._in_len = 0
+        self._boundary_pos = -1
         self._out_buf = ""
 
+    def _send(self, token: str) -> None:
+        self._event_ch.send_nowait(TokenData(token=token, segment_id=self._current_segment_id))
+
     def end_input(self) -> None:
         self.flush()
         self._event_ch.close()
@@ -116,12 +184,111 @@ class BufferedSentenceStream(BufferedTokenStream, SentenceStream):
         tokenizer: TokenizeCallable,
         min_token_len: int,
         min_ctx_len: int,
+        eager_flush: EagerFlushOptions | None = None,
     ) -> None:
         super().__init__(
             tokenize_fnc=tokenizer,
             min_token_len=min_token_len,
             min_ctx_len=min_ctx_len,
+            boundary_re=SENTENCE_BOUNDARY_RE,
         )
+        self._eager_flush = eager_flush
+        # the first token of the current segment wasn't sent yet
+        self._eager_pending = eager_flush is not None
+        self._eager_timer: asyncio.TimerHandle | None = None
+
+    def push_text(self, text: str) -> None:
+        super().push_text(text)
+        if not self._eager_pending or not text:
+            return
+
+        if self._eager_timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass  # no timer, only flushed by words
+            else:
+                assert self._eager_flush is not None
+                self._eager_timer = loop.call_later(
+                    self._eager_flush.max_delay, self._eager_flush_first, True
+                )
+
+        self._eager_flush_first(False)
+
+    def flush(self) -> None:
+        super().flush()
+        self._reset_eager()
+
+    async def aclose(self) -> None:
+        self._reset_eager()
+        await super().aclose()
+
+    def _send(self, token: str) -> None:
+        super()._send(token)
+        if self._eager_pending:
+            self._eager_pending = False
+            if self._eager_timer is not None:
+                self._eager_timer.cancel()
+                self._eager_timer = None
+
+    def _reset_eager(self) -> None:
+        if self._eager_timer is not None:
+            self._eager_timer.cancel()
+            self._eager_timer = None
+        self._eager_pending = self._eager_flush is not None
+
+    def _eager_flush_first(self, timeout: bool) -> None:
+        if timeout:
+            # fired, the next push_text arms a new timer if nothing could be sent
+            self._eager_timer = None
+        if not self._eager_pending or self._event_ch.closed:
+            return
+
+        in_buf = self._in_buf
+        cut = self._first_clause_end(in_buf, timeout=timeout)
+        if cut < 0 or (cut == 0 and not self._out_buf):
+            return
+
+        consumed = cut
+        while consumed < len(in_buf) and in_buf[consumed].isspace():
+            consumed += 1
+
+        token = in_buf[:cut].strip()
+        if self._out_buf:
+            token = f"{self._out_buf} {token}" if token else self._out_buf
+
+        rest = in_buf[consumed:]
+        self._in_chunks = [rest] if rest else []
+        self._in_len = len(rest)
+        self._boundary_pos -= consumed
+        if self._boundary_pos < 0:
+            self._boundary_pos = -1
+        self._out_buf = ""
+        self._send(token)
+
+    def _first_clause_end(self, in_buf: str, *, timeout: bool) -> int:
+        """End of the first clause in the pending text, -1 to keep waiting"""
+        assert self._eager_flush is not None
+        opts = self._eager_flush
+
+        # complete sentences shorter than min_token_len
+        count = len(self._out_buf.split())
+        words = [(m.group(), m.end()) for m in _COMPLETE_WORD_RE.finditer(in_buf)]
+        for i, (word, end) in enumerate(words):
+            count += 1
+            if count < opts.min_words:
+                continue
+
+            if (
+                count >= opts.max_words
+                or word[-1] in CLAUSE_PUNCTUATIONS
+                or (i + 1 < len(words) and words[i + 1][0].lower() in CONJUNCTIONS)
+            ):
+                return end
+
+        if timeout:
+            return words[-1][1] if words else 0
+        return -1
 
 
 class BufferedWordStream(BufferedTokenStream, WordStream):
@@ -136,4 +303,5 @@ class BufferedWordStream(BufferedTokenStream, WordStream):
             tokenize_fnc=tokenizer,
             min_token_len=min_token_len,
             min_ctx_len=min_ctx_len,
+            boundary_re=WORD_BOUNDARY_RE,
         )
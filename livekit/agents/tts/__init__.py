@@ -1,3 +1,4 @@
+from .cache_adapter import CacheAdapter, CacheChunkedStream, CacheSynthesizeStream, PhraseCache
 from .fallback_adapter import (
     AvailabilityChangedEvent,
     FallbackAdapter,
@@ -27,6 +28,10 @@ __all__ = [
     "FallbackAdapter",
     "FallbackChunkedStream",
     "FallbackSynthesizeStream",
+    "CacheAdapter",
+    "CacheChunkedStream",
+    "CacheSynthesizeStream",
+    "PhraseCache",
     "AudioEmitter",
     "TTSError",
 ]
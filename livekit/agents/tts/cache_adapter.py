@@ -0,0 +1,457 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterable
+from typing import Any, Union
+
+from .. import tokenize, utils
+from ..log import logger
+from ..types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, APIConnectOptions, NotGivenOr
+from .stream_adapter import DEFAULT_STREAM_ADAPTER_API_CONNECT_OPTIONS
+from .tts import (
+    TTS,
+    AudioEmitter,
+    ChunkedStream,
+    SynthesizedAudio,
+    SynthesizeStream,
+    TTSCapabilities,
+)
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "LK_TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "livekit-tts-cache")
+)
+DEFAULT_MAX_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+# streams of the wrapped TTS open at once, the one being played included
+MAX_CONCURRENT_STREAMS = 3
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize the text used in cache keys, punctuation and case are kept since they
+    change the prosody"""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class PhraseCache:
+    """Content-addressed store of synthesized PCM.
+
+    Recent phrases are kept in an LRU memory tier, every phrase is also written as raw
+    PCM to `cache_dir` and memory-mapped on lookup, so the cache survives restarts and
+    is shared by all the processes of a worker. Once the directory grows past
+    `max_disk_bytes`, the least recently used files are deleted.
+    """
+
+    def __init__(
+        self,
+        *,
+        cache_dir: str | None = DEFAULT_CACHE_DIR,
+        max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+        max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+    ) -> None:
+        self._cache_dir = cache_dir
+        self._max_memory_bytes = max_memory_bytes
+        self._max_disk_bytes = max_disk_bytes
+        # disk hits are kept as views of their mapping, they don't take heap memory
+        self._memory: OrderedDict[str, bytes | memoryview] = OrderedDict()
+        self._memory_bytes = 0
+        self._write_tasks: set[asyncio.Task[None]] = set()
+        # bytes written to the directory since the last scan, by this process and others
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()  # files are written from worker threads
+
+        if self._cache_dir is not None:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            self._trim_disk()
+
+    def get(self, key: str) -> bytes | memoryview | None:
+        if (pcm := self._memory.get(key)) is not None:
+            self._memory.move_to_end(key)
+            return pcm
+
+        if self._cache_dir is None:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError: empty file
+            return None
+
+        try:
+            os.utime(path)  # the mtime orders the eviction of the disk tier
+        except OSError:
+            pass
+
+        pcm = memoryview(mm)
+        self._put_memory(key, pcm)
+        return pcm
+
+    def put(self, key: str, pcm: bytes) -> None:
+        if not pcm:
+            return
+
+        self._put_memory(key, pcm)
+        if self._cache_dir is not None:
+            task = asyncio.create_task(asyncio.to_thread(self._write_file, key, pcm))
+            self._write_tasks.add(task)
+            task.add_done_callback(self._write_tasks.discard)
+
+    async def aflush(self) -> None:
+        """Wait for the disk writes of the phrases already put"""
+        while self._write_tasks:
+            await asyncio.gather(*self._write_tasks)
+
+    def _put_memory(self, key: str, pcm: bytes | memoryview) -> None:
+        if len(pcm) > self._max_memory_bytes:
+            return
+
+        if (prev := self._memory.pop(key, None)) is not None:
+            self._memory_bytes -= len(prev)
+
+        self._memory[key] = pcm
+        self._memory_bytes += len(pcm)
+        while self._memory_bytes > self._max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _path(self, key: str) -> str:
+        assert self._cache_dir is not None
+        return os.path.join(self._cache_dir, f"{key}.pcm")
+
+    def _write_file(self, key: str, pcm: bytes) -> None:
+        path = self._path(key)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp_path, path)  # readers never see a partial file
+        except OSError:
+            logger.warning("failed to write the tts cache", extra={"path": path}, exc_info=True)
+            return
+
+        with self._disk_lock:
+            self._disk_bytes += len(pcm)
+            if self._disk_bytes > self._max_disk_bytes:
+                self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        """Delete the least recently used files until the directory is under 90% of
+        `max_disk_bytes`. The directory is scanned since other processes write to it too"""
+        assert self._cache_dir is not None
+        files: list[tuple[float, int, str]] = []
+        with os.scandir(self._cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".pcm"):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:  # deleted by another process
+                    continue
+                files.append((st.st_mtime, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        if total > self._max_disk_bytes:
+            target = self._max_disk_bytes * 0.9
+            for _, size, path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)  # mappings of the file stay valid
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+        self._disk_bytes = total
+
+
+def _voice_params(tts: TTS) -> dict[str, Any]:
+    """Best effort extraction of the options that change the synthesized voice"""
+    params: dict[str, Any] = {}
+    opts = getattr(tts, "_opts", None)
+    for name in ("voice_id", "voice", "model", "voice_settings", "language", "speed"):
+        value = getattr(opts, name, None)
+        if value is None:
+            continue
+        if dataclasses.is_dataclass(value) and not isinstance(value, type):
+            value = dataclasses.asdict(value)
+        params[name] = value
+    return params
+
+
+def phrase_key(tts: TTS, text: str) -> str:
+    """Content address of `text` spoken by `tts`, stable across processes"""
+    if isinstance(tts, CacheAdapter):
+        tts = tts.wrapped_tts
+
+    data = {
+        "tts": tts.label,
+        "sample_rate": tts.sample_rate,
+        "num_channels": tts.num_channels,
+        "text": normalize_text(text),
+        **_voice_params(tts),
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+class CacheAdapter(TTS):
+    def __init__(
+        self,
+        *,
+        tts: TTS,
+        sentence_tokenizer: NotGivenOr[tokenize.SentenceTokenizer] = NOT_GIVEN,
+        cache: PhraseCache | None = None,
+    ) -> None:
+        """
+        Cache the audio of any TTS, one entry per sentence.
+
+        Scripted lines (greetings, fixed questions in the prompt) are synthesized once and
+        then replayed from the cache without any API call. Entries are keyed on the
+        voice options of the wrapped TTS and the normalized sentence.
+
+        When streaming, only the cached sentences are replaced: each miss is sent to its own
+        stream of the wrapped TTS as soon as it is known (up to `MAX_CONCURRENT_STREAMS` at
+        once), and its audio is stored under its sentence.
+
+        Args:
+            tts (TTS): The TTS to wrap.
+            sentence_tokenizer (tokenize.SentenceTokenizer): Used to split streamed text, the
+                sentences are the cache keys. A tokenizer with eager_flush lowers the hit rate.
+            cache (PhraseCache | None): Storage, a default memory + disk cache is created if None.
+        """
+        super().__init__(
+            capabilities=TTSCapabilities(streaming=True),
+            sample_rate=tts.sample_rate,
+            num_channels=tts.num_channels,
+        )
+        self._wrapped_tts = tts
+        # no eager flush: its cut points depend on timing, the cache keys would too
+        self._sentence_tokenizer = sentence_tokenizer or tokenize.basic.SentenceTokenizer()
+        self._cache = cache or PhraseCache()
+
+        @self._wrapped_tts.on("metrics_collected")
+        def _forward_metrics(*args: Any, **kwargs: Any) -> None:
+            self.emit("metrics_collected", *args, **kwargs)
+
+    @property
+    def wrapped_tts(self) -> TTS:
+        return self._wrapped_tts
+
+    @property
+    def cache(self) -> PhraseCache:
+        return self._cache
+
+    def cache_key(self, text: str) -> str:
+        return phrase_key(self._wrapped_tts, text)
+
+    def synthesize(
+        self,
+        text: str,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> CacheChunkedStream:
+        return CacheChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(
+        self,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> CacheSynthesizeStream:
+        return CacheSynthesizeStream(tts=self, conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        self._wrapped_tts.prewarm()
+
+    async def aclose(self) -> None:
+        await self._wrapped_tts.aclose()
+
+    async def _synthesize_cached(
+        self,
+        text: str,
+        output_emitter: AudioEmitter,
+        *,
+        conn_options: APIConnectOptions,
+        first_request_delay: float | None = None,
+    ) -> None:
+        """Push the audio of `text` to the emitter, from the cache when possible"""
+        key = self.cache_key(text)
+        if (pcm := self._cache.get(key)) is not None:
+            output_emitter.push(bytes(pcm))  # the emitter only takes bytes, not disk views
+            return
+
+        buf = bytearray()
+        stream = self._wrapped_tts.synthesize(text, conn_options=conn_options)
+        stream._first_request_delay = first_request_delay
+        async with stream:
+            async for ev in stream:
+                data = ev.frame.data.tobytes()
+                buf += data
+                output_emitter.push(data)
+
+        self._cache.put(key, bytes(buf))
+
+
+class CacheChunkedStream(ChunkedStream):
+    def __init__(
+        self, *, tts: CacheAdapter, input_text: str, conn_options: APIConnectOptions
+    ) -> None:
+        # the wrapped TTS already retries
+        super().__init__(
+            tts=tts, input_text=input_text, conn_options=DEFAULT_STREAM_ADAPTER_API_CONNECT_OPTIONS
+        )
+        self._tts: CacheAdapter = tts
+        self._wrapped_tts_conn_options = conn_options
+
+    async def _metrics_monitor_task(self, event_aiter: AsyncIterable[SynthesizedAudio]) -> None:
+        pass  # misses are reported by the wrapped TTS
+
+    async def _run(self, output_emitter: AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=self._tts.sample_rate,
+            num_channels=self._tts.num_channels,
+            mime_type="audio/pcm",
+        )
+        await self._tts._synthesize_cached(
+            self._input_text, output_emitter, conn_options=self._wrapped_tts_conn_options
+        )
+
+
+@dataclasses.dataclass
+class _StreamedSentence:
+    """A cache miss, synthesized by its own stream of the wrapped TTS"""
+
+    stream: SynthesizeStream
+    key: str
+
+
+@dataclasses.dataclass
+class _ChunkedSentence:
+    """A cache miss synthesized alone, when the wrapped TTS can't stream"""
+
+    text: str
+    first_request_delay: float | None = None
+
+
+class CacheSynthesizeStream(SynthesizeStream):
+    def __init__(self, *, tts: CacheAdapter, conn_options: APIConnectOptions) -> None:
+        super().__init__(tts=tts, conn_options=DEFAULT_STREAM_ADAPTER_API_CONNECT_OPTIONS)
+        self._tts: CacheAdapter = tts
+        self._wrapped_tts_conn_options = conn_options
+        self._sent_stream = tts._sentence_tokenizer.stream()
+
+    async def _metrics_monitor_task(self, event_aiter: AsyncIterable[SynthesizedAudio]) -> None:
+        pass  # misses are reported by the wrapped TTS
+
+    async def _run(self, output_emitter: AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=self._tts.sample_rate,
+            num_channels=self._tts.num_channels,
+            mime_type="audio/pcm",
+            stream=True,
+        )
+        output_emitter.start_segment(segment_id=utils.shortuuid())
+
+        # in order: cached audio, streamed misses, or misses to synthesize one by one when
+        # the wrapped TTS can't stream
+        playout_ch = utils.aio.Chan[
+            Union[bytes, memoryview, _StreamedSentence, _ChunkedSentence]
+        ]()
+        wrapped_streams: list[SynthesizeStream] = []
+        streams_sem = asyncio.Semaphore(MAX_CONCURRENT_STREAMS)
+        # perf_counter of the first text of each segment, for the time to first TTS request
+        segment_starts: deque[float] = deque()
+
+        async def _forward_input() -> None:
+            started = False
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    self._sent_stream.flush()
+                    started = False
+                    continue
+
+                if not started and data.strip():
+                    started = True
+                    segment_starts.append(time.perf_counter())
+
+                self._sent_stream.push_text(data)
+
+            self._sent_stream.end_input()
+
+        async def _plan() -> None:
+            wrapped_tts = self._tts.wrapped_tts
+            segment_id = None
+            async for ev in self._sent_stream:
+                key = self._tts.cache_key(ev.token)
+                pcm = self._tts.cache.get(key)
+
+                # only reported when the first sentence of the segment is a miss
+                first_request_delay = None
+                if ev.segment_id != segment_id:
+                    segment_id = ev.segment_id
+                    if segment_starts:
+                        first_request_delay = time.perf_counter() - segment_starts.popleft()
+
+                if pcm is not None:
+                    playout_ch.send_nowait(pcm)
+                elif not wrapped_tts.capabilities.streaming:
+                    playout_ch.send_nowait(_ChunkedSentence(ev.token, first_request_delay))
+                elif any(c.isalnum() for c in ev.token):  # nothing to say otherwise
+                    await streams_sem.acquire()
+                    stream = wrapped_tts.stream(conn_options=self._wrapped_tts_conn_options)
+                    stream._first_request_delay = first_request_delay
+                    wrapped_streams.append(stream)
+                    stream.push_text(ev.token)
+                    stream.end_input()
+                    playout_ch.send_nowait(_StreamedSentence(stream, key))
+
+            playout_ch.close()
+
+        async def _playout() -> None:
+            async for item in playout_ch:
+                if isinstance(item, _StreamedSentence):
+                    buf = bytearray()
+                    async for ev in item.stream:
+                        data = ev.frame.data.tobytes()
+                        buf += data
+                        output_emitter.push(data)
+                    await item.stream.aclose()
+                    streams_sem.release()
+
+                    self._tts.cache.put(item.key, bytes(buf))
+                elif isinstance(item, _ChunkedSentence):
+                    await self._tts._synthesize_cached(
+                        item.text,
+                        output_emitter,
+                        conn_options=self._wrapped_tts_conn_options,
+                        first_request_delay=item.first_request_delay,
+                    )
+                else:
+                    output_emitter.push(bytes(item))
+                output_emitter.flush()
+
+        tasks = [
+            asyncio.create_task(_forward_input()),
+            asyncio.create_task(_plan()),
+            asyncio.create_task(_playout()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await utils.aio.cancel_and_wait(*tasks)
+            for stream in wrapped_streams:
+                await stream.aclose()
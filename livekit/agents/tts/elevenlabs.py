@@ -1,22 +1,451 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import dataclasses
+import json
 import os
-import requests
-
-class ElevenLabsTTS:
-    def __init__(self, voice_id: str):
-        self.voice_id = voice_id
-        self.api_key = os.environ.get("ELEVENLABS_API_KEY")
-        self.url = f"https://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}"
-
-    def synthesize(self, text: str) -> bytes:
-        headers = {
-            "xi-api-key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        data = {
-            "text": text,
-            "model_id": "eleven_monolingual_v1",
-            "voice_settings": {"stability": 0.5, "similarity_boost": 0.5}
-        }
-        response = requests.post(self.url, headers=headers, json=data)
-        response.raise_for_status()
-        return response.content
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import aiohttp
+
+from .. import tokenize, utils
+from .._exceptions import APIConnectionError, APIError, APIStatusError, APITimeoutError
+from ..log import logger
+from ..types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, APIConnectOptions, NotGivenOr
+from ..utils import http_context, is_given
+from . import tts
+
+API_BASE_URL = "https://api.elevenlabs.io/v1"
+AUTHORIZATION_HEADER = "xi-api-key"
+DEFAULT_MODEL = "eleven_monolingual_v1"
+WS_INACTIVITY_TIMEOUT = 180  # maximum allowed by the API
+
+TTSEncoding = Literal[
+    "pcm_16000",
+    "pcm_22050",
+    "pcm_24000",
+    "pcm_44100",
+    "mp3_22050_32",
+    "mp3_44100_64",
+    "mp3_44100_128",
+]
+
+
+@dataclass
+class VoiceSettings:
+    stability: float  # [0.0 - 1.0]
+    similarity_boost: float  # [0.0 - 1.0]
+    style: float | None = None  # [0.0 - 1.0]
+    speed: float | None = None  # [0.7 - 1.2]
+    use_speaker_boost: bool | None = None
+
+
+DEFAULT_VOICE_SETTINGS = VoiceSettings(stability=0.5, similarity_boost=0.5)
+
+
+@dataclass
+class _TTSOptions:
+    api_key: str
+    voice_id: str
+    voice_settings: VoiceSettings | None
+    model: str
+    language: str | None
+    base_url: str
+    encoding: TTSEncoding
+    sample_rate: int
+    streaming_latency: int | None
+    word_tokenizer: tokenize.WordTokenizer
+    chunk_length_schedule: list[int] | None
+
+
+class ElevenLabsTTS(tts.TTS):
+    def __init__(
+        self,
+        voice_id: str,
+        *,
+        model: str = DEFAULT_MODEL,
+        voice_settings: VoiceSettings | None = DEFAULT_VOICE_SETTINGS,
+        language: str | None = None,
+        api_key: str | None = None,
+        base_url: str = API_BASE_URL,
+        encoding: TTSEncoding = "pcm_24000",
+        streaming_latency: int | None = None,
+        word_tokenizer: tokenize.WordTokenizer | None = None,
+        chunk_length_schedule: list[int] | None = None,
+        http_session: aiohttp.ClientSession | None = None,
+    ) -> None:
+        """
+        Create a new instance of ElevenLabs TTS.
+
+        Audio is streamed as it is generated: `synthesize()` reads the chunked HTTP response
+        and `stream()` sends the text over a pooled websocket (one context per segment)
+        as it is produced, the connection is opened by `prewarm()` and reused across replies.
+        Raw PCM is requested by default, so no decoding is needed on our side.
+
+        Args:
+            voice_id (str): Voice ID.
+            model (str): TTS model to use.
+            voice_settings (VoiceSettings | None): Voice settings.
+            language (str | None): Language code, only supported by multilingual models.
+            api_key (str | None): ElevenLabs API key, defaults to ``ELEVENLABS_API_KEY``.
+            base_url (str): Custom base URL for the API.
+            encoding (TTSEncoding): Audio output format, ``pcm_*`` is streamed without decoding.
+            streaming_latency (int | None): Optimize for streaming latency (0-4), server default if None.
+            word_tokenizer (tokenize.WordTokenizer | None): Tokenizer used to split the streamed text.
+            chunk_length_schedule (list[int] | None): Characters buffered by the server before each generation.
+            http_session (aiohttp.ClientSession | None): Custom HTTP session, the shared pool is used by default.
+        """  # noqa: E501
+        sample_rate = _sample_rate_from_format(encoding)
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=True),
+            sample_rate=sample_rate,
+            num_channels=1,
+        )
+
+        api_key = api_key or os.environ.get("ELEVENLABS_API_KEY")
+        if not api_key:
+            raise ValueError(
+                "ElevenLabs API key is required, either as argument or set ELEVENLABS_API_KEY"
+            )
+
+        if word_tokenizer is None:
+            word_tokenizer = tokenize.basic.WordTokenizer(ignore_punctuation=False)
+
+        self._opts = _TTSOptions(
+            api_key=api_key,
+            voice_id=voice_id,
+            voice_settings=voice_settings,
+            model=model,
+            language=language,
+            base_url=base_url,
+            encoding=encoding,
+            sample_rate=sample_rate,
+            streaming_latency=streaming_latency,
+            word_tokenizer=word_tokenizer,
+            chunk_length_schedule=chunk_length_schedule,
+        )
+        self._session = http_session
+        self._pool = utils.ConnectionPool[aiohttp.ClientWebSocketResponse](
+            connect_cb=self._connect_ws,
+            close_cb=self._close_ws,
+            max_session_duration=WS_INACTIVITY_TIMEOUT - 30,
+            mark_refreshed_on_get=True,
+            refresh_margin=30,
+        )
+        self._close_context_tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def voice_id(self) -> str:
+        return self._opts.voice_id
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # not cached, the shared session is bound to the running loop
+        return self._session or http_context.http_session()
+
+    async def _connect_ws(self, timeout: float) -> aiohttp.ClientWebSocketResponse:
+        return await asyncio.wait_for(
+            self._ensure_session().ws_connect(
+                _multi_stream_url(self._opts), headers={AUTHORIZATION_HEADER: self._opts.api_key}
+            ),
+            timeout,
+        )
+
+    async def _close_ws(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        await ws.close()
+
+    async def _get_ws(self, *, timeout: float) -> aiohttp.ClientWebSocketResponse:
+        while True:
+            ws = await self._pool.get(timeout=timeout)
+            if not ws.closed:
+                return ws
+            self._pool.remove(ws)  # closed by the server while idle
+
+    def _close_context(self, ws: aiohttp.ClientWebSocketResponse, context_id: str) -> None:
+        async def _close() -> None:
+            try:
+                await ws.send_str(json.dumps({"context_id": context_id, "close_context": True}))
+            except Exception:
+                logger.debug("failed to close ElevenLabs context", exc_info=True)
+
+        task = asyncio.create_task(_close())
+        self._close_context_tasks.add(task)
+        task.add_done_callback(self._close_context_tasks.discard)
+
+    def update_options(
+        self,
+        *,
+        voice_id: NotGivenOr[str] = NOT_GIVEN,
+        voice_settings: NotGivenOr[VoiceSettings] = NOT_GIVEN,
+        model: NotGivenOr[str] = NOT_GIVEN,
+        language: NotGivenOr[str] = NOT_GIVEN,
+    ) -> None:
+        if is_given(voice_id):
+            self._opts.voice_id = voice_id
+        if is_given(voice_settings):
+            self._opts.voice_settings = voice_settings
+        if is_given(model):
+            self._opts.model = model
+        if is_given(language):
+            self._opts.language = language
+
+        if is_given(voice_id) or is_given(model) or is_given(language):
+            self._pool.invalidate()  # baked into the websocket url
+
+    def prewarm(self) -> None:
+        self._pool.prewarm()
+        http_context.prewarm(self._opts.base_url)
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> ChunkedStream:
+        return ChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(
+        self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> SynthesizeStream:
+        return SynthesizeStream(tts=self, conn_options=conn_options)
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+class ChunkedStream(tts.ChunkedStream):
+    """Synthesize using the chunked HTTP streaming endpoint"""
+
+    def __init__(
+        self, *, tts: ElevenLabsTTS, input_text: str, conn_options: APIConnectOptions
+    ) -> None:
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._tts: ElevenLabsTTS = tts
+        self._opts = dataclasses.replace(tts._opts)
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        data: dict[str, Any] = {"text": self._input_text, "model_id": self._opts.model}
+        if self._opts.voice_settings:
+            data["voice_settings"] = _strip_nones(dataclasses.asdict(self._opts.voice_settings))
+        if self._opts.language:
+            data["language_code"] = self._opts.language
+
+        try:
+            async with self._tts._ensure_session().post(
+                _synthesize_url(self._opts),
+                headers={AUTHORIZATION_HEADER: self._opts.api_key},
+                json=data,
+                timeout=aiohttp.ClientTimeout(total=30, sock_connect=self._conn_options.timeout),
+            ) as resp:
+                if resp.status != 200:
+                    raise APIStatusError(
+                        "ElevenLabs TTS failed",
+                        status_code=resp.status,
+                        request_id=resp.headers.get("request-id"),
+                        body=await resp.text(),
+                    )
+
+                output_emitter.initialize(
+                    request_id=resp.headers.get("request-id") or utils.shortuuid(),
+                    sample_rate=self._opts.sample_rate,
+                    num_channels=1,
+                    mime_type=_mime_type_from_format(self._opts.encoding),
+                )
+
+                # forward the body as soon as it arrives, the first bytes are usually
+                # available long before the whole utterance is synthesized
+                async for chunk, _ in resp.content.iter_chunks():
+                    output_emitter.push(chunk)
+
+                output_emitter.flush()
+        except asyncio.TimeoutError:
+            raise APITimeoutError() from None
+        except APIError:
+            raise
+        except Exception as e:
+            raise APIConnectionError() from e
+
+
+class SynthesizeStream(tts.SynthesizeStream):
+    """Streamed API using pooled `multi-stream-input` websockets, one context per segment"""
+
+    def __init__(self, *, tts: ElevenLabsTTS, conn_options: APIConnectOptions) -> None:
+        super().__init__(tts=tts, conn_options=conn_options)
+        self._tts: ElevenLabsTTS = tts
+        self._opts = dataclasses.replace(tts._opts)
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        request_id = utils.shortuuid()
+        output_emitter.initialize(
+            request_id=request_id,
+            sample_rate=self._opts.sample_rate,
+            num_channels=1,
+            mime_type=_mime_type_from_format(self._opts.encoding),
+            stream=True,
+        )
+
+        segments_ch = utils.aio.Chan[tokenize.WordStream]()
+
+        async def _tokenize_input() -> None:
+            """split the input into word streams, one per segment"""
+            word_stream: tokenize.WordStream | None = None
+            async for input in self._input_ch:
+                if isinstance(input, str):
+                    if word_stream is None:
+                        word_stream = self._opts.word_tokenizer.stream()
+                        segments_ch.send_nowait(word_stream)
+                    word_stream.push_text(input)
+                elif isinstance(input, self._FlushSentinel):
+                    if word_stream is not None:
+                        word_stream.end_input()
+                    word_stream = None
+
+            if word_stream is not None:
+                word_stream.end_input()
+
+            segments_ch.close()
+
+        async def _process_segments() -> None:
+            async for word_stream in segments_ch:
+                await self._run_segment(word_stream, output_emitter)
+
+        tasks = [
+            asyncio.create_task(_tokenize_input()),
+            asyncio.create_task(_process_segments()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except asyncio.TimeoutError:
+            raise APITimeoutError() from None
+        except aiohttp.ClientResponseError as e:
+            raise APIStatusError(
+                message=e.message, status_code=e.status, request_id=request_id, body=None
+            ) from None
+        except APIError:
+            raise
+        except Exception as e:
+            raise APIConnectionError() from e
+        finally:
+            await utils.aio.gracefully_cancel(*tasks)
+
+    async def _run_segment(
+        self, word_stream: tokenize.WordStream, output_emitter: tts.AudioEmitter
+    ) -> None:
+        # every segment is a new context on a pooled connection, the connection itself
+        # outlives the segment and is reused by the next reply
+        context_id = utils.shortuuid()
+        ws_conn = await self._tts._get_ws(timeout=self._conn_options.timeout)
+        output_emitter.start_segment(segment_id=context_id)
+        eos_sent = False
+
+        async def _send_task() -> None:
+            nonlocal eos_sent
+
+            init_pkt: dict[str, Any] = {"text": " ", "context_id": context_id}
+            if self._opts.voice_settings:
+                init_pkt["voice_settings"] = _strip_nones(
+                    dataclasses.asdict(self._opts.voice_settings)
+                )
+            if self._opts.chunk_length_schedule:
+                init_pkt["generation_config"] = {
+                    "chunk_length_schedule": self._opts.chunk_length_schedule
+                }
+            await ws_conn.send_str(json.dumps(init_pkt))
+
+            async for data in word_stream:
+                self._mark_started()
+                await ws_conn.send_str(
+                    json.dumps({"text": f"{data.token} ", "context_id": context_id})
+                )
+
+            # generate the remaining buffered text, then close the context (not the socket)
+            eos_sent = True
+            await ws_conn.send_str(json.dumps({"context_id": context_id, "flush": True}))
+            await ws_conn.send_str(json.dumps({"context_id": context_id, "close_context": True}))
+
+        async def _recv_task() -> None:
+            while True:
+                msg = await ws_conn.receive()
+                if msg.type in (
+                    aiohttp.WSMsgType.CLOSED,
+                    aiohttp.WSMsgType.CLOSE,
+                    aiohttp.WSMsgType.CLOSING,
+                ):
+                    raise APIStatusError(
+                        "ElevenLabs connection closed unexpectedly", request_id=context_id
+                    )
+
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    logger.warning("unexpected ElevenLabs message type %s", msg.type)
+                    continue
+
+                data = json.loads(msg.data)
+                if data.get("error"):
+                    raise APIError(f"ElevenLabs returned an error: {data['error']}", body=data)
+
+                if data.get("contextId", data.get("context_id")) != context_id:
+                    continue  # leftovers of an interrupted context
+
+                if audio := data.get("audio"):
+                    output_emitter.push(base64.b64decode(audio))
+
+                if data.get("isFinal") and eos_sent:
+                    output_emitter.end_segment()
+                    return
+
+        tasks = [
+            asyncio.create_task(_send_task()),
+            asyncio.create_task(_recv_task()),
+        ]
+        done, interrupted = False, False
+        try:
+            await asyncio.gather(*tasks)
+            done = True
+        except asyncio.CancelledError:
+            interrupted = True
+            raise
+        finally:
+            await utils.aio.gracefully_cancel(*tasks)
+            if done:
+                self._tts._pool.put(ws_conn)
+            elif interrupted and not ws_conn.closed:
+                # the reply was interrupted, drop the context but keep the connection warm
+                self._tts._close_context(ws_conn, context_id)
+                self._tts._pool.put(ws_conn)
+            else:
+                self._tts._pool.remove(ws_conn)
+
+
+def _sample_rate_from_format(output_format: TTSEncoding) -> int:
+    split = output_format.split("_")  # e.g: mp3_44100_64 or pcm_24000
+    return int(split[1])
+
+
+def _mime_type_from_format(output_format: TTSEncoding) -> str:
+    return "audio/pcm" if output_format.startswith("pcm") else "audio/mpeg"
+
+
+def _strip_nones(data: dict[str, Any]) -> dict[str, Any]:
+    return {k: v for k, v in data.items() if v is not None}
+
+
+def _synthesize_url(opts: _TTSOptions) -> str:
+    url = (
+        f"{opts.base_url}/text-to-speech/{opts.voice_id}/stream?"
+        f"model_id={opts.model}&output_format={opts.encoding}"
+    )
+    if opts.streaming_latency is not None:
+        url += f"&optimize_streaming_latency={opts.streaming_latency}"
+    return url
+
+
+def _multi_stream_url(opts: _TTSOptions) -> str:
+    base_url = opts.base_url.replace("https://", "wss://").replace("http://", "ws://")
+    url = (
+        f"{base_url}/text-to-speech/{opts.voice_id}/multi-stream-input?"
+        f"model_id={opts.model}&output_format={opts.encoding}"
+        f"&inactivity_timeout={WS_INACTIVITY_TIMEOUT}"
+    )
+    if opts.language:
+        url += f"&language_code={opts.language}"
+    if opts.streaming_latency is not None:
+        url += f"&optimize_streaming_latency={opts.streaming_latency}"
+    return url
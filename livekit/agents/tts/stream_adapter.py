@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import asyncio
+import time
+from collections import deque
 from collections.abc import AsyncIterable
 from typing import Any
 
@@ -36,7 +38,10 @@ class StreamAdapter(TTS):
             num_channels=tts.num_channels,
         )
         self._wrapped_tts = tts
-        self._sentence_tokenizer = sentence_tokenizer or tokenize.basic.SentenceTokenizer()
+        # the first clause is synthesized without waiting for the whole sentence
+        self._sentence_tokenizer = sentence_tokenizer or tokenize.basic.SentenceTokenizer(
+            eager_flush=tokenize.EagerFlushOptions()
+        )
 
         @self._wrapped_tts.on("metrics_collected")
         def _forward_metrics(*args: Any, **kwargs: Any) -> None:
@@ -85,21 +90,38 @@ class StreamAdapterWrapper(SynthesizeStream):
         segment_id = utils.shortuuid()
         output_emitter.start_segment(segment_id=segment_id)
 
+        # perf_counter of the first text of each segment, for the time to first TTS request
+        segment_starts: deque[float] = deque()
+
         async def _forward_input() -> None:
+            started = False
             async for data in self._input_ch:
                 if isinstance(data, self._FlushSentinel):
                     self._sent_stream.flush()
+                    started = False
                     continue
 
+                if not started and data.strip():
+                    started = True
+                    segment_starts.append(time.perf_counter())
+
                 self._sent_stream.push_text(data)
 
             self._sent_stream.end_input()
 
         async def _synthesize() -> None:
+            sent_segment_id = None
             async for ev in self._sent_stream:
-                async with self._tts._wrapped_tts.synthesize(
+                tts_stream = self._tts._wrapped_tts.synthesize(
                     ev.token, conn_options=self._wrapped_tts_conn_options
-                ) as tts_stream:
+                )
+                if ev.segment_id != sent_segment_id:
+                    sent_segment_id = ev.segment_id
+                    if segment_starts:
+                        start = segment_starts.popleft()
+                        tts_stream._first_request_delay = time.perf_counter() - start
+
+                async with tts_stream:
                     async for audio in tts_stream:
                         output_emitter.push(audio.frame.data.tobytes())
 
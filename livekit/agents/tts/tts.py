@@ -137,6 +137,8 @@ class ChunkedStream(ABC):
         self._tee = aio.itertools.tee(self._event_ch, 2)
         self._event_aiter, monitor_aiter = self._tee
         self._current_attempt_has_error = False
+        # set by StreamAdapter and CacheAdapter on the first request of a segment
+        self._first_request_delay: float | None = None
         self._metrics_task = asyncio.create_task(
             self._metrics_monitor_task(monitor_aiter), name="TTS._metrics_task"
         )
@@ -185,6 +187,7 @@ class ChunkedStream(ABC):
             cancelled=self._synthesize_task.cancelled(),
             label=self._tts._label,
             streamed=False,
+            first_request_delay=self._first_request_delay,
         )
         self._tts.emit("metrics_collected", metrics)
 
@@ -295,6 +298,8 @@ class SynthesizeStream(ABC):
         self._current_attempt_has_error = False
         self._started_time: float = 0
         self._pushed_text: str = ""
+        # set by CacheAdapter on the first request of a segment
+        self._first_request_delay: float | None = None
 
         # used to track metrics
         self._mtc_pending_texts: list[str] = []
@@ -394,6 +399,7 @@ class SynthesizeStream(ABC):
                 cancelled=self._task.cancelled(),
                 label=self._tts._label,
                 streamed=True,
+                first_request_delay=self._first_request_delay,
             )
             self._tts.emit("metrics_collected", metrics)
 
@@ -401,6 +407,7 @@ class SynthesizeStream(ABC):
             ttfb = -1.0
             request_id = ""
             self._started_time = 0
+            self._first_request_delay = None
 
         async for ev in event_aiter:
             if ttfb == -1.0:
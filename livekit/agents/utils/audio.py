@@ -143,12 +143,14 @@ class AudioByteStream:
             logger.warning("AudioByteStream: incomplete frame during flush, dropping")
             return []
 
+        frame_data = self._buf
+        self._buf = bytearray()
         return [
             rtc.AudioFrame(
-                data=self._buf,
+                data=frame_data,
                 sample_rate=self._sample_rate,
                 num_channels=self._num_channels,
-                samples_per_channel=len(self._buf) // 2,
+                samples_per_channel=len(frame_data) // self._bytes_per_sample,
             )
         ]
 
@@ -5,6 +5,7 @@ from collections.abc import AsyncGenerator, Awaitable
 from contextlib import asynccontextmanager
 from typing import Callable, Generic, Optional, TypeVar
 
+from ..log import logger
 from . import aio
 
 T = TypeVar("T")
@@ -25,6 +26,7 @@ class ConnectionPool(Generic[T]):
         connect_cb: Optional[Callable[[float], Awaitable[T]]] = None,
         close_cb: Optional[Callable[[T], Awaitable[None]]] = None,
         connect_timeout: float = 10.0,
+        refresh_margin: Optional[float] = None,
     ) -> None:
         """Initialize the connection wrapper.
 
@@ -33,6 +35,7 @@ class ConnectionPool(Generic[T]):
             mark_refreshed_on_get: If True, the session will be marked as fresh when get() is called. only used when max_session_duration is set.
             connect_cb: Optional async callback to create new connections
             close_cb: Optional async callback to close connections
+            refresh_margin: If set (with max_session_duration), idle connections are replaced in the background this many seconds before they expire.
         """  # noqa: E501
         self._max_session_duration = max_session_duration
         self._mark_refreshed_on_get = mark_refreshed_on_get
@@ -41,6 +44,8 @@ class ConnectionPool(Generic[T]):
         self._connections: dict[T, float] = {}  # conn -> connected_at timestamp
         self._available: set[T] = set()
         self._connect_timeout = connect_timeout
+        self._refresh_margin = refresh_margin
+        self._refresh_tasks: dict[T, asyncio.Task[None]] = {}
 
         # store connections to be reaped (closed) later.
         self._to_close: set[T] = set()
@@ -64,9 +69,10 @@ class ConnectionPool(Generic[T]):
 
     async def _drain_to_close(self) -> None:
         """Drain and close all the connections queued for closing."""
-        for conn in list(self._to_close):
+        # popped one at a time: drains can run concurrently (background refresh, get())
+        while self._to_close:
+            conn = self._to_close.pop()
             await self._maybe_close_connection(conn)
-        self._to_close.clear()
 
     @asynccontextmanager
     async def connection(self, *, timeout: float) -> AsyncGenerator[T, None]:
@@ -118,6 +124,42 @@ class ConnectionPool(Generic[T]):
         """
         if conn in self._connections:
             self._available.add(conn)
+            self._schedule_refresh(conn)
+
+    def _schedule_refresh(self, conn: T) -> None:
+        if self._max_session_duration is None or self._refresh_margin is None:
+            return
+
+        if (task := self._refresh_tasks.pop(conn, None)) is not None:
+            task.cancel()
+
+        delay = (
+            self._connections[conn]
+            + self._max_session_duration
+            - self._refresh_margin
+            - time.time()
+        )
+        self._refresh_tasks[conn] = asyncio.create_task(self._refresh_impl(conn, max(delay, 0.0)))
+
+    async def _refresh_impl(self, conn: T, delay: float) -> None:
+        """Replace an idle connection before it expires, so get() never has to connect."""
+        await asyncio.sleep(delay)
+        self._refresh_tasks.pop(conn, None)
+        if conn not in self._available:
+            return  # in use (rescheduled on put) or already removed
+
+        try:
+            new_conn = await self._connect(timeout=self._connect_timeout)
+        except Exception:
+            logger.warning("failed to refresh pooled connection", exc_info=True)
+            return
+
+        # get() may have handed conn out while connecting, it is left to its user then
+        if conn in self._available:
+            self.remove(conn)
+        self._available.add(new_conn)
+        self._schedule_refresh(new_conn)
+        await self._drain_to_close()
 
     async def _maybe_close_connection(self, conn: T) -> None:
         """Close a connection if close_cb is provided.
@@ -137,6 +179,8 @@ class ConnectionPool(Generic[T]):
             conn: The connection to reset
         """
         self._available.discard(conn)
+        if (task := self._refresh_tasks.pop(conn, None)) is not None:
+            task.cancel()
         if conn in self._connections:
             self._to_close.add(conn)
             self._connections.pop(conn, None)
@@ -146,6 +190,9 @@ class ConnectionPool(Generic[T]):
 
         Marks all current connections to be closed during the next drain cycle.
         """
+        for task in self._refresh_tasks.values():
+            task.cancel()
+        self._refresh_tasks.clear()
         for conn in list(self._connections.keys()):
             self._to_close.add(conn)
         self._connections.clear()
@@ -164,6 +211,7 @@ class ConnectionPool(Generic[T]):
             if not self._connections:
                 conn = await self._connect(timeout=self._connect_timeout)
                 self._available.add(conn)
+                self._schedule_refresh(conn)
 
         task = asyncio.create_task(_prewarm_impl())
         self._prewarm_task = weakref.ref(task)
@@ -1,15 +1,57 @@
 from __future__ import annotations
 
+import asyncio
 import contextvars
-from typing import Callable, Optional
+import importlib.util
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Literal, Optional
+from urllib.parse import urlsplit
 
 import aiohttp
 
 from ..log import logger
 
+if TYPE_CHECKING:
+    import httpx
+
 _ClientFactory = Callable[[], aiohttp.ClientSession]
 _ContextVar = contextvars.ContextVar[Optional[_ClientFactory]]("agent_http_session")
 
+KEEPALIVE_TIMEOUT = 120.0  # the aiohttp default is only 15s
+DNS_CACHE_TTL = 300
+LIMIT_PER_HOST = 50
+
+# sessions used outside of a job context, one per event loop (aiohttp sessions are loop-bound)
+_process_sessions: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession] = (
+    weakref.WeakKeyDictionary()
+)
+_httpx_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+    weakref.WeakKeyDictionary()
+)
+# time of the last prewarm by (client, origin), per event loop like the sessions
+_prewarmed: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[tuple[str, str], float]
+] = weakref.WeakKeyDictionary()
+_prewarm_tasks: set[asyncio.Task[Any]] = set()
+
+
+def _create_session() -> aiohttp.ClientSession:
+    from ..job import get_job_context
+
+    try:
+        http_proxy = get_job_context().proc.http_proxy
+    except RuntimeError:
+        http_proxy = None
+
+    connector = aiohttp.TCPConnector(
+        limit_per_host=LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(proxy=http_proxy, connector=connector)
+
 
 def _new_session_ctx() -> _ClientFactory:
     g_session: aiohttp.ClientSession | None = None
@@ -18,19 +60,7 @@ def _new_session_ctx() -> _ClientFactory:
         nonlocal g_session
         if g_session is None:
             logger.debug("http_session(): creating a new httpclient ctx")
-
-            from ..job import get_job_context
-
-            try:
-                http_proxy = get_job_context().proc.http_proxy
-            except RuntimeError:
-                http_proxy = None
-
-            connector = aiohttp.TCPConnector(
-                limit_per_host=50,
-                keepalive_timeout=120,  # the default is only 15s
-            )
-            g_session = aiohttp.ClientSession(proxy=http_proxy, connector=connector)
+            g_session = _create_session()
         return g_session
 
     _ContextVar.set(_new_session)
@@ -40,15 +70,73 @@ def _new_session_ctx() -> _ClientFactory:
 def http_session() -> aiohttp.ClientSession:
     """Optional utility function to avoid having to manually manage an aiohttp.ClientSession lifetime.
     On job processes, this http session will be bound to the main event loop.
+    Outside of a job, a keep-alive session shared by the whole process (per event loop) is returned.
     """  # noqa: E501
 
     val = _ContextVar.get(None)
-    if val is None:
-        raise RuntimeError(
-            "Attempted to use an http session outside of a job context. This is probably because you are trying to use a plugin without using the agent worker api. You may need to create your own aiohttp.ClientSession, pass it into the plugin constructor as a kwarg, and manage its lifecycle."  # noqa: E501
+    if val is not None:
+        return val()
+
+    loop = asyncio.get_running_loop()
+    session = _process_sessions.get(loop)
+    if session is None or session.closed:
+        logger.debug("http_session(): creating a process-wide httpclient")
+        session = _create_session()
+        _process_sessions[loop] = session
+
+    return session
+
+
+def httpx_client() -> httpx.AsyncClient:
+    """Keep-alive httpx client shared by the process, for SDKs built on httpx (e.g. openai).
+    HTTP/2 is enabled when the `h2` package is installed."""
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _httpx_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=None,
+                max_keepalive_connections=LIMIT_PER_HOST,
+                keepalive_expiry=KEEPALIVE_TIMEOUT,
+            ),
+            timeout=httpx.Timeout(timeout=600.0, connect=10.0),
+            follow_redirects=True,
         )
+        _httpx_clients[loop] = client
+
+    return client
 
-    return val()
+
+def prewarm(url: str, *, client: Literal["aiohttp", "httpx"] = "aiohttp") -> None:
+    """Open a keep-alive connection to the host of `url` in the background,
+    so the first real request doesn't pay for the DNS lookup and TCP+TLS handshake."""
+    parts = urlsplit(url)
+    key = (client, f"{parts.scheme}://{parts.netloc}")
+
+    prewarmed = _prewarmed.setdefault(asyncio.get_running_loop(), {})
+    now = time.monotonic()
+    if now - prewarmed.get(key, -KEEPALIVE_TIMEOUT) < KEEPALIVE_TIMEOUT / 2:
+        return  # a connection opened recently is still in the pool
+
+    prewarmed[key] = now
+
+    async def _prewarm() -> None:
+        try:
+            if client == "httpx":
+                await httpx_client().head(url)
+            else:
+                async with http_session().head(url) as resp:
+                    await resp.read()
+        except Exception:
+            prewarmed.pop(key, None)
+            logger.debug("failed to prewarm http connection", extra={"url": url}, exc_info=True)
+
+    task = asyncio.create_task(_prewarm())
+    _prewarm_tasks.add(task)
+    task.add_done_callback(_prewarm_tasks.discard)
 
 
 async def _close_http_ctx() -> None:
@@ -57,3 +145,12 @@ async def _close_http_ctx() -> None:
         logger.debug("http_session(): closing the httpclient ctx")
         await val().close()
         _ContextVar.set(None)
+
+
+async def _close_process_session() -> None:
+    """Close the process-wide clients of the running loop, before the loop is closed"""
+    loop = asyncio.get_running_loop()
+    if (session := _process_sessions.pop(loop, None)) is not None:
+        await session.close()
+    if (client := _httpx_clients.pop(loop, None)) is not None:
+        await client.aclose()
@@ -17,6 +17,7 @@ from .events import (
     UserInputTranscribedEvent,
     UserStateChangedEvent,
 )
+from .prefetch import SpeculativePrefetch, prefetched
 from .speech_handle import SpeechHandle
 
 __all__ = [
@@ -27,6 +28,8 @@ __all__ = [
     "ModelSettings",
     "InlineTask",
     "SpeechHandle",
+    "SpeculativePrefetch",
+    "prefetched",
     "RunContext",
     "UserInputTranscribedEvent",
     "AgentEvent",
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 import asyncio
-from collections.abc import AsyncGenerator, AsyncIterable, Coroutine, Generator
+from collections.abc import AsyncGenerator, AsyncIterable, Coroutine, Generator, Iterable
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any, Generic, TypeVar
+from typing import TYPE_CHECKING, Any, Callable, Generic, TypeVar
 
 from livekit import rtc
 
@@ -19,6 +19,7 @@ if TYPE_CHECKING:
     from ..llm import mcp
     from .agent_activity import AgentActivity
     from .agent_session import AgentSession, TurnDetectionMode
+    from .prefetch import SpeculativePrefetch
 
 
 @dataclass
@@ -42,9 +43,11 @@ class Agent:
         mcp_servers: NotGivenOr[list[mcp.MCPServer] | None] = NOT_GIVEN,
         allow_interruptions: NotGivenOr[bool] = NOT_GIVEN,
         min_consecutive_speech_delay: NotGivenOr[float] = NOT_GIVEN,
+        prefetch: list[SpeculativePrefetch] | None = None,
     ) -> None:
         tools = tools or []
         self._instructions = instructions
+        self._prefetch = prefetch or []
         self._tools = tools.copy() + list(find_function_tools(tools).values())
         self._chat_ctx = chat_ctx.copy(tools=self._tools) if chat_ctx else ChatContext.empty()
         self._turn_detection = turn_detection
@@ -61,6 +64,20 @@ class Agent:
         self._mcp_servers = mcp_servers
         self._activity: AgentActivity | None = None
 
+    @staticmethod
+    def declare_static_utterances(
+        texts: Iterable[str], *, tts: tts.TTS | Callable[[], tts.TTS]
+    ) -> None:
+        """Declare lines that are always spoken verbatim (greeting, scripted questions).
+
+        They are synthesized with `tts` when the job process is initialized, and `say()`
+        plays the ready-made frames instead of waiting on the TTS. `tts` can be a factory,
+        it must produce the same voice as the TTS used by the session.
+        """
+        from . import presynthesis
+
+        presynthesis.declare(texts, tts=tts)
+
     @property
     def instructions(self) -> str:
         """
@@ -78,6 +95,15 @@ class Agent:
         """
         return self._tools.copy()
 
+    @property
+    def prefetch(self) -> list[SpeculativePrefetch]:
+        """
+        Returns:
+            list[SpeculativePrefetch]:
+                Tool prefetchers run on the user transcript while the user is speaking.
+        """
+        return self._prefetch.copy()
+
     @property
     def chat_ctx(self) -> llm.ChatContext:
         """
@@ -370,7 +396,10 @@ class Agent:
 
             if not activity.tts.capabilities.streaming:
                 wrapped_tts = tts.StreamAdapter(
-                    tts=wrapped_tts, sentence_tokenizer=tokenize.basic.SentenceTokenizer()
+                    tts=wrapped_tts,
+                    sentence_tokenizer=tokenize.basic.SentenceTokenizer(
+                        eager_flush=tokenize.EagerFlushOptions()
+                    ),
                 )
 
             conn_options = activity.session.conn_options.tts_conn_options
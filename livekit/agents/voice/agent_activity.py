@@ -27,6 +27,7 @@ def get_vad():
 from ..tokenize.basic import split_words
 from ..types import NOT_GIVEN, NotGivenOr
 from ..utils.misc import is_given
+from . import presynthesis
 from .agent import Agent, ModelSettings
 from .audio_recognition import AudioRecognition, RecognitionHooks, _EndOfTurnInfo
 from .events import (
@@ -87,6 +88,9 @@ class AgentActivity(RecognitionHooks):
         self._user_turn_completed_atask: asyncio.Task[None] | None = None
         self._speech_tasks: list[asyncio.Task[Any]] = []
 
+        context_window = self._session.options.context_window
+        self._context_window = llm.ContextWindow(context_window) if context_window else None
+
         self._turn_detection_mode = (
             self.turn_detection if isinstance(self.turn_detection, str) else None
         )
@@ -390,6 +394,12 @@ class AgentActivity(RecognitionHooks):
                 
 
             self._main_atask = asyncio.create_task(self._main_task(), name="_main_task")
+
+            vad_event_sink = None
+            if self.stt and self.vad and self.stt.share_vad_events(self.vad):
+                # the STT segments on the events of our VAD stream, it doesn't run its own
+                vad_event_sink = self.stt.push_vad_event
+
             self._audio_recognition = AudioRecognition(
                 hooks=self,
                 stt=self._agent.stt_node if self.stt else None,
@@ -400,6 +410,8 @@ class AgentActivity(RecognitionHooks):
                 min_endpointing_delay=self._session.options.min_endpointing_delay,
                 max_endpointing_delay=self._session.options.max_endpointing_delay,
                 turn_detection_mode=self._turn_detection_mode,
+                prefetch=self._agent.prefetch,
+                vad_event_sink=vad_event_sink,
             )
             self._audio_recognition.start()
             self._started = True
@@ -459,6 +471,12 @@ class AgentActivity(RecognitionHooks):
             if self._audio_recognition is not None:
                 await self._audio_recognition.aclose()
 
+            for prefetch in self._agent.prefetch:
+                await prefetch.aclose()
+
+            if self._context_window is not None:
+                await self._context_window.aclose()
+
             if self._main_atask is not None:
                 await utils.aio.cancel_and_wait(self._main_atask)
 
@@ -516,6 +534,9 @@ class AgentActivity(RecognitionHooks):
             )
             allow_interruptions = NOT_GIVEN
 
+        if not is_given(audio) and isinstance(text, str) and self.tts:
+            audio = presynthesis.lookup(self.tts, text) or NOT_GIVEN
+
         handle = SpeechHandle.create(
             allow_interruptions=allow_interruptions
             if is_given(allow_interruptions)
@@ -732,6 +753,13 @@ class AgentActivity(RecognitionHooks):
             ev.speech_id = speech_handle.id
         self._session.emit("metrics_collected", MetricsCollectedEvent(metrics=ev))
 
+    def _schedule_context_compaction(self) -> None:
+        if self._context_window is None:
+            return
+
+        activity_llm = self.llm if isinstance(self.llm, llm.LLM) else None
+        self._context_window.schedule(self._agent._chat_ctx, llm=activity_llm)
+
     def _on_error(
         self, error: llm.LLMError | stt.STTError | tts.TTSError | llm.RealtimeModelError
     ) -> None:
@@ -1005,6 +1033,8 @@ class AgentActivity(RecognitionHooks):
         speech_handle = self._generate_reply(
             user_message=user_message, chat_ctx=temp_mutable_chat_ctx
         )
+        for prefetch in self._agent.prefetch:
+            prefetch.bind(speech_handle.id, info.new_transcript)
 
         if self._user_turn_completed_atask != asyncio.current_task():
             # If a new user turn has already started, interrupt this one since it's now outdated
@@ -1291,6 +1321,7 @@ class AgentActivity(RecognitionHooks):
                 self._agent._chat_ctx.insert(msg)
                 self._session._conversation_item_added(msg)
                 speech_handle._set_chat_message(msg)
+                self._schedule_context_compaction()
 
             if self._session.agent_state == "speaking":
                 self._session._update_agent_state("listening")
@@ -1309,6 +1340,7 @@ class AgentActivity(RecognitionHooks):
             self._agent._chat_ctx.insert(msg)
             self._session._conversation_item_added(msg)
             speech_handle._set_chat_message(msg)
+            self._schedule_context_compaction()
 
         if len(tool_output.output) > 0:
             self._session._update_agent_state("thinking")
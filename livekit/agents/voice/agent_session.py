@@ -61,6 +61,7 @@ class VoiceOptions:
     max_tool_steps: int
     user_away_timeout: float | None
     min_consecutive_speech_delay: float
+    context_window: llm.ContextWindowOptions | None
 
 
 Userdata_T = TypeVar("Userdata_T")
@@ -134,6 +135,7 @@ class AgentSession(rtc.EventEmitter[EventTypes], Generic[Userdata_T]):
         video_sampler: NotGivenOr[_VideoSampler | None] = NOT_GIVEN,
         user_away_timeout: float | None = 15.0,
         min_consecutive_speech_delay: float = 0.0,
+        context_window: llm.ContextWindowOptions | None = None,
         conn_options: NotGivenOr[SessionConnectOptions] = NOT_GIVEN,
         loop: asyncio.AbstractEventLoop | None = None,
     ) -> None:
@@ -194,6 +196,10 @@ class AgentSession(rtc.EventEmitter[EventTypes], Generic[Userdata_T]):
                 Default ``15.0`` s, set to ``None`` to disable.
             min_consecutive_speech_delay (float, optional): The minimum delay between
                 consecutive speech. Default ``0.0`` s.
+            context_window (llm.ContextWindowOptions, optional): Token budget of the
+                agent's chat context. Once it is exceeded, the oldest turns are
+                summarized (or dropped) in the background so long calls don't
+                grow the LLM request. Default ``None``, the context is unbounded.
             conn_options (SessionConnectOptions, optional): Connection options for
                 stt, llm, and tts.
             loop (asyncio.AbstractEventLoop, optional): Event loop to bind the
@@ -219,6 +225,7 @@ class AgentSession(rtc.EventEmitter[EventTypes], Generic[Userdata_T]):
             max_tool_steps=max_tool_steps,
             user_away_timeout=user_away_timeout,
             min_consecutive_speech_delay=min_consecutive_speech_delay,
+            context_window=context_window,
         )
         self._conn_options = conn_options or SessionConnectOptions()
         self._started = False
@@ -517,6 +524,8 @@ class AgentSession(rtc.EventEmitter[EventTypes], Generic[Userdata_T]):
     def update_options(self) -> None:
         pass
 
+    declare_static_utterances = staticmethod(Agent.declare_static_utterances)
+
     def say(
         self,
         text: str | AsyncIterable[str],
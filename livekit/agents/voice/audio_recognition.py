@@ -2,19 +2,19 @@ from __future__ import annotations
 
 import asyncio
 import time
-from collections.abc import AsyncIterable
+from collections.abc import AsyncIterable, Sequence
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any, Protocol
+from typing import TYPE_CHECKING, Any, Callable, Protocol
 
 from livekit import rtc
 
 from .. import llm, stt, utils
-from .vad.silero import SileroVAD
 from ..debug import tracing
 from ..log import logger
 from ..utils import aio
-from . import io
+from . import io, vad
 from .agent import ModelSettings
+from .prefetch import SpeculativePrefetch
 
 if TYPE_CHECKING:
     from .agent_session import TurnDetectionMode
@@ -55,13 +55,17 @@ class AudioRecognition:
         *,
         hooks: RecognitionHooks,
         stt: io.STTNode | None,
-        vad: SileroVAD | None,
+        vad: vad.VAD | None,
         turn_detector: _TurnDetector | None,
         min_endpointing_delay: float,
         max_endpointing_delay: float,
         turn_detection_mode: TurnDetectionMode | None,
+        prefetch: Sequence[SpeculativePrefetch] = (),
+        vad_event_sink: Callable[[vad.VADEvent], None] | None = None,
     ) -> None:
         self._hooks = hooks
+        self._vad_event_sink = vad_event_sink
+        self._prefetch = prefetch
         self._audio_input_atask: asyncio.Task[None] | None = None
         self._commit_user_turn_atask: asyncio.Task[None] | None = None
         self._stt_atask: asyncio.Task[None] | None = None
@@ -142,7 +146,7 @@ class AudioRecognition:
             self._stt_atask = None
             self._stt_ch = None
 
-    def update_vad(self, vad: SileroVAD | None) -> None:
+    def update_vad(self, vad: vad.VAD | None) -> None:
         self._vad = vad
         if vad:
             self._vad_ch = aio.Chan[rtc.AudioFrame]()
@@ -159,6 +163,8 @@ class AudioRecognition:
     def clear_user_turn(self) -> None:
         self._audio_transcript = ""
         self._audio_interim_transcript = ""
+        for p in self._prefetch:
+            p.reset()
         self._final_transcript_confidence = []
         self._user_turn_committed = False
 
@@ -267,6 +273,7 @@ class AudioRecognition:
             self._final_transcript_confidence.append(confidence)
             self._audio_interim_transcript = ""
             self._final_transcript_received.set()
+            self._update_prefetch()
 
             if not self._speaking:
                 if not self._vad:
@@ -284,6 +291,7 @@ class AudioRecognition:
         elif ev.type == stt.SpeechEventType.INTERIM_TRANSCRIPT:
             self._hooks.on_interim_transcript(ev)
             self._audio_interim_transcript = ev.alternatives[0].text
+            self._update_prefetch()
 
         elif ev.type == stt.SpeechEventType.END_OF_SPEECH and self._turn_detection_mode == "stt":
             self._user_turn_committed = True
@@ -292,8 +300,22 @@ class AudioRecognition:
                 chat_ctx = self._hooks.retrieve_chat_ctx().copy()
                 self._run_eou_detection(chat_ctx)
 
-    async def _on_vad_event(self, ev: SileroVAD.Event) -> None:
-        if ev.type == SileroVAD.EventType.START_OF_SPEECH:
+    def _update_prefetch(self) -> None:
+        # speculatively run the tool prefetchers on the partial transcript, so the result
+        # is often ready by the time the LLM calls the tool
+        if not self._prefetch:
+            return
+
+        transcript = self.current_transcript
+        for p in self._prefetch:
+            p.update(transcript)
+
+    async def _on_vad_event(self, ev: vad.VADEvent) -> None:
+        if self._vad_event_sink is not None:
+            # e.g. an STT segmenting on the same VAD, it doesn't run a second VAD stream
+            self._vad_event_sink(ev)
+
+        if ev.type == vad.VADEventType.START_OF_SPEECH:
             self._hooks.on_start_of_speech(ev)
             self._speaking = True
 
@@ -375,6 +397,9 @@ class AudioRecognition:
                 )
             )
             if committed:
+                for p in self._prefetch:
+                    p.end_turn(self._audio_transcript)
+
                 # clear the transcript if the user turn was committed
                 self._audio_transcript = ""
                 self._final_transcript_confidence = []
@@ -422,11 +447,7 @@ class AudioRecognition:
         if task is not None:
             await aio.cancel_and_wait(task)
 
-        if hasattr(vad, "stream"):
-            stream = vad.stream()
-        else:
-            return  # or skip VAD handling if not supported
-
+        stream = vad.stream()
 
         @utils.log_exceptions(logger=logger)
         async def _forward() -> None:
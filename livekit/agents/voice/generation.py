@@ -14,11 +14,13 @@ from .. import debug, llm, utils
 from ..llm import (
     ChatChunk,
     ChatContext,
+    ChatRole,
     StopResponse,
     ToolContext,
     ToolError,
     utils as llm_utils,
 )
+from ..llm.chat_context import ChatMessage
 from ..llm.tool_context import (
     is_function_tool,
     is_raw_function_tool,
@@ -26,7 +28,7 @@ from ..llm.tool_context import (
 from ..log import logger
 from ..types import NotGivenOr
 from ..utils import aio
-from . import io
+from . import io, prefetch
 from .speech_handle import SpeechHandle
 
 if TYPE_CHECKING:
@@ -368,6 +370,13 @@ async def _execute_tools_task(
                 },
             )
 
+            # expose the result prefetched while the user was speaking (see prefetch.py),
+            # the task copies the context when it is created
+            fetch = None
+            if (p := prefetch._find(session.current_agent.prefetch, fnc_call.name)) is not None:
+                fetch = p.get(speech_handle.id)
+            prefetch_token = prefetch._set_current(fetch)
+
             try:
                 task = asyncio.create_task(
                     function_tool(*fnc_args, **fnc_kwargs),
@@ -390,6 +399,8 @@ async def _execute_tools_task(
                 py_out.exception = e
                 tool_output.output.append(py_out)
                 continue
+            finally:
+                prefetch._reset_current(prefetch_token)
 
             def _log_exceptions(
                 task: asyncio.Task[Any],
@@ -606,13 +617,13 @@ def update_instructions(chat_ctx: ChatContext, *, instructions: str, add_if_miss
     idx = chat_ctx.index_by_id(INSTRUCTIONS_MESSAGE_ID)
     if idx is not None:
         if chat_ctx.items[idx].type == "message":
+            if chat_ctx.items[idx].content == instructions:
+                # same instance, the serialized prompt prefix stays cached
+                return
+
             # create a new instance to avoid mutating the original
-            chat_ctx.items[idx] = llm.ChatMessage(
-                role="system",
-                content="\n".join([
-                    "You are a polite and helpful agent.",
-                    "Guide the user through the travel booking process."
-                ]),  # ← Now a single string
+            chat_ctx.items[idx] = ChatMessage(
+                id=INSTRUCTIONS_MESSAGE_ID, role=ChatRole.system, content=instructions
             )
 
         else:
@@ -622,7 +633,7 @@ def update_instructions(chat_ctx: ChatContext, *, instructions: str, add_if_miss
     elif add_if_missing:
         # insert the instructions at the beginning of the chat context
         chat_ctx.items.insert(
-            0, llm.ChatMessage(id=INSTRUCTIONS_MESSAGE_ID, role="system", content=[instructions])
+            0, ChatMessage(id=INSTRUCTIONS_MESSAGE_ID, role=ChatRole.system, content=instructions)
         )
 
 
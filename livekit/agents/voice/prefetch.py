@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import re
+from collections import OrderedDict
+from collections.abc import Awaitable, Sequence
+from typing import Any, Callable
+
+from ..log import logger
+from ..utils import aio
+
+# Speculative tool prefetch: while the user is still speaking, AudioRecognition feeds the
+# transcript of the turn to each SpeculativePrefetch, which runs its coroutine in the
+# background (debounced, latest transcript wins). At end of turn the fetch is bound to the
+# id of the reply SpeechHandle, and _execute_tools_task makes it visible to the matching
+# tool through `prefetched()`.
+
+PrefetchFnc = Callable[[str], Awaitable[Any]]
+
+DEFAULT_MIN_WORDS = 3
+DEFAULT_DEBOUNCE = 0.2
+MAX_BOUND_SPEECHES = 8
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_current_fetch: contextvars.ContextVar[asyncio.Task[Any] | None] = contextvars.ContextVar(
+    "livekit_agents_prefetch", default=None
+)
+
+
+def _normalize(transcript: str) -> str:
+    return _WHITESPACE_RE.sub(" ", transcript).strip().lower()
+
+
+class SpeculativePrefetch:
+    def __init__(
+        self,
+        tool_name: str,
+        fnc: PrefetchFnc,
+        *,
+        min_words: int = DEFAULT_MIN_WORDS,
+        debounce: float = DEFAULT_DEBOUNCE,
+    ) -> None:
+        """
+        Run `fnc(transcript)` ahead of a call to the tool `tool_name`.
+
+        Args:
+            tool_name (str): Name of the function tool that consumes the result.
+            fnc (PrefetchFnc): Coroutine run with the (partial) user transcript.
+            min_words (int): Don't prefetch shorter transcripts.
+            debounce (float): Delay before a fetch starts, interim transcripts arriving
+                within it replace the pending one.
+        """
+        self._tool_name = tool_name
+        self._fnc = fnc
+        self._min_words = min_words
+        self._debounce = debounce
+
+        # fetch of the turn in progress, of ended turns not bound to a speech yet, and the
+        # fetches bound to a speech
+        self._pending: tuple[str, asyncio.Task[Any]] | None = None
+        self._ended: OrderedDict[str, asyncio.Task[Any]] = OrderedDict()
+        self._speeches: OrderedDict[str, asyncio.Task[Any]] = OrderedDict()
+
+    @property
+    def tool_name(self) -> str:
+        return self._tool_name
+
+    def update(self, transcript: str) -> None:
+        """Called by AudioRecognition with the current transcript of the user turn"""
+        key = _normalize(transcript)
+        if len(key.split(" ")) < self._min_words:
+            return
+
+        if self._pending is not None:
+            if self._pending[0] == key:
+                return
+            self._pending[1].cancel()
+
+        self._pending = (key, self._create_fetch(transcript))
+
+    def end_turn(self, transcript: str) -> None:
+        """The user turn ended with `transcript`, keep its fetch until it is bound"""
+        key = _normalize(transcript)
+        if self._pending is None or self._pending[0] != key:
+            self.reset()
+            return
+
+        self._ended[key] = self._pending[1]
+        self._pending = None
+        self._trim(self._ended)
+
+    def reset(self) -> None:
+        if self._pending is not None:
+            self._pending[1].cancel()
+            self._pending = None
+
+    def bind(self, speech_id: str, transcript: str) -> None:
+        """Make the fetch of `transcript` the result used by the tools of `speech_id`.
+        Nothing is fetched here, a turn whose final transcript wasn't fetched gets no result"""
+        if (task := self._ended.pop(_normalize(transcript), None)) is None:
+            return
+
+        self._speeches[speech_id] = task
+        self._trim(self._speeches)
+
+    def get(self, speech_id: str) -> asyncio.Task[Any] | None:
+        return self._speeches.get(speech_id)
+
+    async def aclose(self) -> None:
+        tasks = list(self._ended.values()) + list(self._speeches.values())
+        if self._pending is not None:
+            tasks.append(self._pending[1])
+
+        self._pending = None
+        self._ended.clear()
+        self._speeches.clear()
+        await aio.cancel_and_wait(*tasks)
+
+    def _create_fetch(self, transcript: str) -> asyncio.Task[Any]:
+        async def _fetch() -> Any:
+            await asyncio.sleep(self._debounce)
+            return await self._fnc(transcript)
+
+        task = asyncio.create_task(_fetch(), name=f"prefetch_{self._tool_name}")
+        task.add_done_callback(_log_exception)
+        return task
+
+    @staticmethod
+    def _trim(tasks: OrderedDict[str, asyncio.Task[Any]]) -> None:
+        while len(tasks) > MAX_BOUND_SPEECHES:
+            _, task = tasks.popitem(last=False)
+            task.cancel()
+
+
+def _log_exception(task: asyncio.Task[Any]) -> None:
+    if not task.cancelled() and (exc := task.exception()) is not None:
+        logger.debug("speculative prefetch failed", extra={"task": task.get_name()}, exc_info=exc)
+
+
+def _find(prefetch: Sequence[SpeculativePrefetch], tool_name: str) -> SpeculativePrefetch | None:
+    return next((p for p in prefetch if p.tool_name == tool_name), None)
+
+
+def _set_current(task: asyncio.Task[Any] | None) -> contextvars.Token[asyncio.Task[Any] | None]:
+    return _current_fetch.set(task)
+
+
+def _reset_current(token: contextvars.Token[asyncio.Task[Any] | None]) -> None:
+    _current_fetch.reset(token)
+
+
+async def prefetched() -> Any | None:
+    """Inside a function tool: the result prefetched for the current speech, or None if
+    nothing was prefetched or the fetch failed"""
+    if (task := _current_fetch.get()) is None:
+        return None
+
+    try:
+        # shielded, another call of the same tool in this speech can reuse it
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if not task.cancelled():
+            raise  # the tool itself was cancelled
+        return None
+    except Exception:
+        return None
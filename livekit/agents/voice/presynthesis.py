@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterable, Iterable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Union
+
+from livekit import rtc
+
+from .. import tts as _tts
+from ..log import logger
+from ..tts.cache_adapter import phrase_key
+from ..utils import http_context
+
+if TYPE_CHECKING:
+    from ..job import JobProcess
+
+# Scripted lines (e.g. the greeting) synthesized once per process, before any job runs.
+# See Agent.declare_static_utterances.
+
+TTSFactory = Callable[[], _tts.TTS]
+
+
+@dataclass
+class _Declaration:
+    texts: list[str]
+    tts: Union[_tts.TTS, TTSFactory]
+    # phrase key by text, computed once for a factory, which is then only called again
+    # when one of the utterances has to be synthesized
+    keys: dict[str, str] = field(default_factory=dict)
+
+
+_declarations: list[_Declaration] = []
+_utterances: dict[str, list[rtc.AudioFrame]] = {}
+# synthesis in progress by phrase key, shared by concurrent apresynthesize() calls
+_in_flight: dict[str, asyncio.Task[None]] = {}
+
+
+def declare(texts: Iterable[str], *, tts: _tts.TTS | TTSFactory) -> None:
+    _declarations.append(_Declaration(texts=list(texts), tts=tts))
+
+
+def lookup(tts: _tts.TTS, text: str) -> AsyncIterable[rtc.AudioFrame] | None:
+    """Return the pre-synthesized audio of `text` if it was declared for this voice"""
+    if not _utterances or (frames := _utterances.get(phrase_key(tts, text))) is None:
+        return None
+
+    return _replay(frames)
+
+
+async def _replay(frames: list[rtc.AudioFrame]) -> AsyncIterable[rtc.AudioFrame]:
+    for frame in frames:
+        yield frame
+
+
+async def apresynthesize(texts: Iterable[str] | None = None) -> None:
+    """Synthesize the declared utterances that aren't ready yet, only `texts` when given.
+    An utterance already being synthesized by another call is waited for, not redone."""
+
+    async def _synthesize(tts: _tts.TTS, key: str, text: str) -> None:
+        try:
+            async with tts.synthesize(text) as stream:
+                _utterances[key] = [ev.frame async for ev in stream]
+        except Exception:
+            logger.warning(
+                "failed to pre-synthesize utterance", extra={"text": text}, exc_info=True
+            )
+
+    selected = set(texts) if texts is not None else None
+    created: list[_tts.TTS] = []  # made by a factory, closed once their utterances are done
+    tasks: list[asyncio.Task[None]] = []
+    for decl in _declarations:
+        decl_texts = [t for t in decl.texts if selected is None or t in selected]
+        if not decl_texts:
+            continue
+
+        tts: _tts.TTS | None = None
+        factory: TTSFactory | None = None
+        if isinstance(decl.tts, _tts.TTS):
+            tts = decl.tts
+            keys = {text: phrase_key(tts, text) for text in decl_texts}
+        else:
+            factory = decl.tts
+            if not decl.keys:
+                tts = factory()
+                created.append(tts)
+                decl.keys = {text: phrase_key(tts, text) for text in decl.texts}
+            keys = decl.keys
+
+        missing = [text for text in decl_texts if keys[text] not in _utterances]
+        if factory is not None and tts is None and any(keys[t] not in _in_flight for t in missing):
+            tts = factory()
+            created.append(tts)
+
+        for text in missing:
+            key = keys[text]
+            if (task := _in_flight.get(key)) is None:
+                assert tts is not None
+                task = asyncio.create_task(_synthesize(tts, key, text))
+                _in_flight[key] = task
+                task.add_done_callback(lambda _, key=key: _in_flight.pop(key, None))
+            tasks.append(task)
+
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for tts in created:
+            await tts.aclose()
+
+
+def presynthesize(proc: JobProcess) -> None:
+    """Used by the default process initializer, runs before the job event loop exists"""
+    if not _declarations:
+        return
+
+    async def _run() -> None:
+        try:
+            await apresynthesize()
+        finally:
+            await http_context._close_process_session()
+
+    asyncio.run(_run())
+    logger.debug(
+        "pre-synthesized static utterances",
+        extra={"count": len(_utterances), "pid": proc.pid},
+    )
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 from collections.abc import AsyncIterator
 from dataclasses import dataclass
 from typing import Union
@@ -32,6 +33,80 @@ class SpeakingRateEvent:
     speaking_rate: float
 
 
+class _SampleBuffer:
+    """Preallocated float32 samples, appended at the end and consumed from the start.
+
+    The window is always a contiguous view of the storage: instead of wrapping around, the
+    remaining samples are moved back to the start when the end of the storage is reached."""
+
+    def __init__(self, capacity: int) -> None:
+        self._data = np.empty(capacity, dtype=np.float32)
+        self._start = 0
+        self._end = 0
+        self._position = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def position(self) -> int:
+        """Samples consumed since the buffer was cleared, the position of the window"""
+        return self._position
+
+    def push(self, samples: np.ndarray[tuple[int], np.dtype[np.int16]]) -> None:
+        size, n = len(self), len(samples)
+        if self._end + n > len(self._data):
+            if size + n > len(self._data):
+                data = np.empty(max(2 * len(self._data), size + n), dtype=np.float32)
+            else:
+                data = self._data
+            data[:size] = self._data[self._start : self._end]
+            self._data, self._start, self._end = data, 0, size
+
+        np.divide(
+            samples,
+            np.iinfo(np.int16).max,
+            out=self._data[self._end : self._end + n],
+            dtype=np.float32,
+        )
+        self._end += n
+
+    def window(self, size: int) -> np.ndarray[tuple[int], np.dtype[np.float32]]:
+        return self._data[self._start : self._start + size]
+
+    def consume(self, size: int) -> None:
+        size = min(size, len(self))
+        self._start += size
+        self._position += size
+
+    def clear(self) -> None:
+        self._start = self._end = self._position = 0
+
+
+@dataclass
+class _Spectrogram:
+    """Spectral magnitudes of the frames of the last window. The windows overlap, the frames the
+    next window shares with it aren't transformed again."""
+
+    position: int
+    "position of the first frame in the stream"
+    hop_length: int
+    magnitudes: np.ndarray[tuple[int, int], np.dtype[np.float64]]
+    "(num_frames, num_bins)"
+    flux: np.ndarray[tuple[int], np.dtype[np.float64]]
+    "spectral flux between consecutive frames"
+
+
+@functools.lru_cache(maxsize=8)
+def _hanning_window(
+    frame_length: int,
+) -> tuple[np.ndarray[tuple[int], np.dtype[np.float64]], float]:
+    """The STFT window and its scale factor, the frame length depends on the sample rate"""
+    window = np.hanning(frame_length)
+    window.flags.writeable = False
+    return window, float(1.0 / np.sqrt(np.sum(window**2)))
+
+
 class SpeakingRateDetector:
     def __init__(
         self,
@@ -68,26 +143,26 @@ class SpeakingRateStream:
         self._input_sample_rate = 0
         self._window_size_samples = 0
         self._step_size_samples = 0
+        self._spectrogram: _Spectrogram | None = None
 
     @log_exceptions(logger=logger)
     async def _main_task(self) -> None:
         _inference_sample_rate = 0
-        inference_f32_data = np.empty(0, dtype=np.float32)
 
         pub_timestamp = self._opts.window_duration / 2
-        inference_frames: list[rtc.AudioFrame] = []
+        samples: _SampleBuffer | None = None
         resampler: rtc.AudioResampler | None = None
 
         async for input_frame in self._input_ch:
             if not isinstance(input_frame, rtc.AudioFrame):
                 # estimate the speech rate for the last frame
-                available_samples = sum(frame.samples_per_channel for frame in inference_frames)
-                if available_samples > self._window_size_samples * 0.5:
-                    frame = rtc.combine_audio_frames(inference_frames)
-                    frame_f32_data = np.divide(frame.data, np.iinfo(np.int16).max, dtype=np.float32)
-
-                    sr = self._compute_speaking_rate(frame_f32_data, _inference_sample_rate)
-                    pub_timestamp += frame.duration
+                if samples is not None and len(samples) > self._window_size_samples * 0.5:
+                    sr = self._compute_speaking_rate(
+                        samples.window(len(samples)),
+                        _inference_sample_rate,
+                        position=samples.position,
+                    )
+                    pub_timestamp += len(samples) / _inference_sample_rate
                     self._event_ch.send_nowait(
                         SpeakingRateEvent(
                             timestamp=pub_timestamp,
@@ -95,7 +170,9 @@ class SpeakingRateStream:
                             speaking_rate=sr,
                         )
                     )
-                inference_frames = []
+                if samples is not None:
+                    samples.clear()
+                self._spectrogram = None
                 continue
 
             # resample the input frame if necessary
@@ -105,7 +182,7 @@ class SpeakingRateStream:
 
                 self._window_size_samples = int(self._opts.window_duration * _inference_sample_rate)
                 self._step_size_samples = int(self._opts.step_size * _inference_sample_rate)
-                inference_f32_data = np.empty(self._window_size_samples, dtype=np.float32)
+                samples = _SampleBuffer(self._window_size_samples * 2)
 
                 if self._input_sample_rate != _inference_sample_rate:
                     resampler = rtc.AudioResampler(
@@ -124,26 +201,17 @@ class SpeakingRateStream:
                 )
                 continue
 
-            if resampler is not None:
-                inference_frames.extend(resampler.push(input_frame))
-            else:
-                inference_frames.append(input_frame)
-
-            while True:
-                available_samples = sum(frame.samples_per_channel for frame in inference_frames)
-                if available_samples < self._window_size_samples:
-                    break
-
-                inference_frame = rtc.combine_audio_frames(inference_frames)
-                np.divide(
-                    inference_frame.data[: self._window_size_samples],
-                    np.iinfo(np.int16).max,
-                    out=inference_f32_data,
-                    dtype=np.float32,
-                )
+            assert samples is not None
+            for frame in resampler.push(input_frame) if resampler is not None else [input_frame]:
+                samples.push(np.frombuffer(frame.data, dtype=np.int16))
 
+            while len(samples) >= self._window_size_samples:
                 # run the inference
-                sr = self._compute_speaking_rate(inference_f32_data, _inference_sample_rate)
+                sr = self._compute_speaking_rate(
+                    samples.window(self._window_size_samples),
+                    _inference_sample_rate,
+                    position=samples.position,
+                )
                 self._event_ch.send_nowait(
                     SpeakingRateEvent(
                         timestamp=pub_timestamp,
@@ -154,22 +222,18 @@ class SpeakingRateStream:
 
                 # move the window forward by the hop size
                 pub_timestamp += self._opts.step_size
-                if len(inference_frame.data) - self._step_size_samples > 0:
-                    data = inference_frame.data[self._step_size_samples :]
-                    inference_frames = [
-                        rtc.AudioFrame(
-                            data=data,
-                            sample_rate=inference_frame.sample_rate,
-                            num_channels=1,
-                            samples_per_channel=len(data) // 2,
-                        )
-                    ]
+                samples.consume(self._step_size_samples)
 
     def _compute_speaking_rate(
-        self, audio: np.ndarray[tuple[int], np.dtype[np.float32]], sample_rate: int
+        self,
+        audio: np.ndarray[tuple[int], np.dtype[np.float32]],
+        sample_rate: int,
+        *,
+        position: int | None = None,
     ) -> float:
         """
-        Compute the speaking rate of the audio using the selected method
+        Compute the speaking rate of the audio using the selected method,
+        `position` is the position of the audio in the stream, to reuse the previous spectrogram
         """
         silence_threshold = self._opts._silence_threshold
 
@@ -184,7 +248,7 @@ class SpeakingRateStream:
         if len(tail_audio_sq) > 0 and np.sqrt(np.mean(tail_audio_sq)) < silence_threshold * 0.5:
             return 0.0
 
-        return self._spectral_flux(audio, sample_rate)
+        return self._spectral_flux(audio, sample_rate, position=position)
 
     def _stft(
         self,
@@ -192,25 +256,21 @@ class SpeakingRateStream:
         frame_length: int,
         hop_length: int,
     ) -> np.ndarray[tuple[int, int], np.dtype[np.complex128]]:
-        num_frames = (len(audio) - frame_length) // hop_length + 1
-        result = np.zeros((frame_length // 2 + 1, num_frames), dtype=np.complex128)
-
-        window = np.hanning(frame_length)
-        scale_factor = 1.0 / np.sqrt(np.sum(window**2))
-        for i in range(num_frames):
-            start = i * hop_length
-            end = start + frame_length
-            frame = audio[start:end]
-            windowed = frame * window
-
-            # perform fft and scale
-            fft_result = np.fft.rfft(windowed)
-            result[:, i] = fft_result * scale_factor
+        """(num_frames, num_bins) spectrum of the overlapping frames"""
+        window, scale_factor = _hanning_window(frame_length)
 
+        # strided view of the frames, transformed at once
+        frames = np.lib.stride_tricks.sliding_window_view(audio, frame_length)[::hop_length]
+        result = np.fft.rfft(frames * window, axis=1)
+        result *= scale_factor
         return result
 
     def _spectral_flux(
-        self, audio: np.ndarray[tuple[int], np.dtype[np.float32]], sample_rate: int
+        self,
+        audio: np.ndarray[tuple[int], np.dtype[np.float32]],
+        sample_rate: int,
+        *,
+        position: int | None = None,
     ) -> float:
         """
         Calculate speaking rate based on spectral flux.
@@ -220,21 +280,44 @@ class SpeakingRateStream:
         frame_length = int(sample_rate * 0.025)  # 25ms
         hop_length = frame_length // 2  # 50% overlap
 
-        Zxx = self._stft(audio, frame_length, hop_length)
-
-        # calculate spectral flux (sum of spectral magnitude changes between frames)
-        spectral_magnitudes = np.abs(Zxx)
-        spectral_flux_values = []
-
-        for i in range(1, spectral_magnitudes.shape[1]):
-            # l1 norm of difference between consecutive spectral frames
-            flux = np.sum(np.abs(spectral_magnitudes[:, i] - spectral_magnitudes[:, i - 1]))
-            spectral_flux_values.append(flux)
-
-        if not spectral_flux_values:
+        num_frames = (len(audio) - frame_length) // hop_length + 1
+        if num_frames < 2:
             return 0.0
 
-        avg_flux = float(np.mean(spectral_flux_values))
+        # frames shared with the previous window
+        shared, prev = 0, self._spectrogram
+        if (
+            position is not None
+            and prev is not None
+            and prev.hop_length == hop_length
+            and position >= prev.position
+            and (position - prev.position) % hop_length == 0
+        ):
+            shift = (position - prev.position) // hop_length
+            shared = min(len(prev.magnitudes) - shift, num_frames)
+
+        # calculate spectral flux (sum of spectral magnitude changes between frames), the
+        # l1 norm of difference between consecutive spectral frames
+        if shared > 1:
+            assert prev is not None
+            magnitudes = prev.magnitudes[shift : shift + shared]
+            flux = prev.flux[shift : shift + shared - 1]
+            if shared < num_frames:
+                new_audio = audio[shared * hop_length :]
+                new_magnitudes = np.abs(self._stft(new_audio, frame_length, hop_length))
+                magnitudes = np.concatenate((magnitudes, new_magnitudes))
+                new_flux = np.abs(np.diff(magnitudes[shared - 1 :], axis=0)).sum(axis=1)
+                flux = np.concatenate((flux, new_flux))
+        else:
+            magnitudes = np.abs(self._stft(audio, frame_length, hop_length))
+            flux = np.abs(np.diff(magnitudes, axis=0)).sum(axis=1)
+
+        if position is not None:
+            self._spectrogram = _Spectrogram(
+                position=position, hop_length=hop_length, magnitudes=magnitudes, flux=flux
+            )
+
+        avg_flux = float(np.mean(flux))
         return avg_flux
 
     def push_frame(self, frame: rtc.AudioFrame) -> None:
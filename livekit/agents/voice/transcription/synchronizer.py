@@ -25,6 +25,7 @@ STANDARD_SPEECH_RATE = 3.83  # hyphens (syllables) per second
 class _TextSyncOptions:
     speed: float
     hyphenate_word: Callable[[str], list[str]]
+    count_hyphens: Callable[[str], int]
     split_words: Callable[[str], list[tuple[str, int, int]]]
     sentence_tokenizer: tokenize.SentenceTokenizer
     speaking_rate_detector: SpeakingRateDetector
@@ -58,7 +59,7 @@ class _SpeakingRateData:
         text: str,
         start_time: float | None,
         end_time: float | None,
-        text_to_hyphens: Callable[[str], list[str]],
+        count_hyphens: Callable[[str], int],
     ) -> None:
         if start_time is not None:
             # calculate the integral of the speaking rate up to the start time
@@ -66,7 +67,7 @@ class _SpeakingRateData:
 
             dt = start_time - self.pushed_duration
             full_text = "".join(self._text_buffer)
-            d_hyphens = len(text_to_hyphens(full_text))
+            d_hyphens = count_hyphens(full_text)
             integral += d_hyphens
             rate = d_hyphens / dt if dt > 0 else 0
 
@@ -79,7 +80,7 @@ class _SpeakingRateData:
 
         if end_time is not None:
             self.add_by_annotation(
-                text="", start_time=end_time, end_time=None, text_to_hyphens=text_to_hyphens
+                text="", start_time=end_time, end_time=None, count_hyphens=count_hyphens
             )
 
     def accumulate_to(self, timestamp: float) -> float:
@@ -213,7 +214,7 @@ class _SegmentSynchronizerImpl:
                 text=text,
                 start_time=start_time,
                 end_time=end_time,
-                text_to_hyphens=self._calc_hyphens,
+                count_hyphens=self._count_hyphens,
             )
 
         self._text_data.sentence_stream.push_text(text)
@@ -236,7 +237,7 @@ class _SegmentSynchronizerImpl:
         if not self._text_data.done or not self._audio_data.done:
             return
 
-        pushed_hyphens = len(self._calc_hyphens(self._text_data.pushed_text))
+        pushed_hyphens = self._count_hyphens(self._text_data.pushed_text)
         # hyphens per second
         if self._audio_data.pushed_duration > 0:
             self._speed = pushed_hyphens / self._audio_data.pushed_duration
@@ -308,7 +309,7 @@ class _SegmentSynchronizerImpl:
                     text_cursor = end_pos
                     continue
 
-                word_hyphens = len(self._opts.hyphenate_word(word))
+                word_hyphens = self._opts.count_hyphens(word)
                 elapsed = time.time() - self._start_wall_time
 
                 target_hyphens: float | None = None
@@ -341,14 +342,10 @@ class _SegmentSynchronizerImpl:
                 # send the remaining text (e.g. new line or spaces)
                 self._out_ch.send_nowait(sentence[text_cursor:])
 
-    def _calc_hyphens(self, text: str) -> list[str]:
-        """Calculate hyphens for text."""
-        hyphens: list[str] = []
+    def _count_hyphens(self, text: str) -> int:
+        """Count the hyphens of the text."""
         words: list[tuple[str, int, int]] = self._opts.split_words(text)
-        for word, _, _ in words:
-            new = self._opts.hyphenate_word(word)
-            hyphens.extend(new)
-        return hyphens
+        return sum(self._opts.count_hyphens(word) for word, _, _ in words)
 
     async def _sleep_if_not_closed(self, delay: float) -> None:
         with contextlib.suppress(asyncio.TimeoutError):
@@ -394,6 +391,12 @@ class TranscriptSynchronizer:
         self._opts = _TextSyncOptions(
             speed=speed,
             hyphenate_word=hyphenate_word,
+            # the default is memoized process wide, only the count of a word is needed
+            count_hyphens=(
+                tokenize.basic.count_hyphens
+                if hyphenate_word is tokenize.basic.hyphenate_word
+                else lambda word: len(hyphenate_word(word))
+            ),
             split_words=split_words,
             sentence_tokenizer=(
                 sentence_tokenizer or tokenize.basic.SentenceTokenizer(retain_format=True)
@@ -1,5 +1,4 @@
 from __future__ import annotations
-from .silero import SileroVAD
 
 import asyncio
 import time
@@ -11,6 +10,8 @@ from typing import Literal, Union
 
 from livekit import rtc
 
+from ...metrics import VADMetrics
+from ...utils import aio
 
 
 @unique
@@ -179,3 +180,20 @@ class VADStream(ABC):
         if self._input_ch.closed:
             cls = type(self)
             raise RuntimeError(f"{cls.__module__}.{cls.__name__} input ended")
+
+
+from ...inference_runner import _InferenceRunner  # noqa: E402
+from ._silero_runner import _SileroVADRunner  # noqa: E402
+from .silero import SileroVAD, SileroVADStream  # noqa: E402
+
+_InferenceRunner.register_runner(_SileroVADRunner)
+
+__all__ = [
+    "VAD",
+    "VADCapabilities",
+    "VADEvent",
+    "VADEventType",
+    "VADStream",
+    "SileroVAD",
+    "SileroVADStream",
+]
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import struct
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from ...inference_runner import _InferenceRunner
+from . import onnx_model
+
+# request: <sample_rate:u32><stream_id_len:u16><stream_id:utf-8><window:f32[]>
+# a sample rate of 0 (and no window) releases the state of the stream
+_HEADER = struct.Struct("<IH")
+# response: <probability:f32>
+_RESPONSE = struct.Struct("<f")
+
+_SESSION_TTL = 30.0  # drop the state of streams that stopped sending windows
+
+
+def encode_window(stream_id: str, sample_rate: int, window: np.ndarray) -> bytes:
+    sid = stream_id.encode()
+    return _HEADER.pack(sample_rate, len(sid)) + sid + window.astype(np.float32).tobytes()
+
+
+def encode_release(stream_id: str) -> bytes:
+    sid = stream_id.encode()
+    return _HEADER.pack(0, len(sid)) + sid
+
+
+def decode_probability(data: bytes | None) -> float:
+    if data is None:
+        raise RuntimeError("silero vad runner returned no data")
+
+    return _RESPONSE.unpack(data)[0]
+
+
+@dataclass
+class _StreamState:
+    sample_rate: int
+    state: np.ndarray = field(
+        default_factory=lambda: np.zeros((2, onnx_model.STATE_SIZE), np.float32)
+    )
+    context: np.ndarray = field(default_factory=lambda: np.zeros(0, np.float32))
+    last_used: float = 0.0
+
+
+class _SileroVADRunner(_InferenceRunner):
+    """Runs the Silero model for every VADStream of the worker in the inference process.
+
+    Windows received during the same tick are stacked into a single [batch, window] input,
+    the recurrent state of each stream is kept here and gathered/scattered around the call.
+    """
+
+    INFERENCE_METHOD = "lk_silero_vad"
+    BATCH_INTERVAL = 0.005
+
+    def initialize(self) -> None:
+        # only the ONNX graph exposes the recurrent state as an explicit input/output,
+        # which is what allows a single call to serve many streams
+        self._session = onnx_model.new_inference_session()
+        self._streams: dict[str, _StreamState] = {}
+
+    def run(self, data: bytes) -> bytes | None:
+        return self.run_batch([data])[0]
+
+    def run_batch(self, data: list[bytes]) -> list[bytes | None]:
+        now = time.monotonic()
+        results: list[bytes | None] = [None] * len(data)
+
+        # the model can't mix sample rates in the same call
+        by_rate: dict[int, list[tuple[int, _StreamState, np.ndarray]]] = {}
+        released: list[str] = []
+        for i, req in enumerate(data):
+            sample_rate, sid_len = _HEADER.unpack_from(req)
+            offset = _HEADER.size + sid_len
+            stream_id = req[_HEADER.size : offset].decode()
+            if sample_rate == 0:
+                released.append(stream_id)  # after the windows sent before the release
+                continue
+
+            window = np.frombuffer(req, dtype=np.float32, offset=offset)
+
+            stream = self._streams.get(stream_id)
+            if stream is None or stream.sample_rate != sample_rate:
+                stream = _StreamState(sample_rate=sample_rate)
+                self._streams[stream_id] = stream
+
+            stream.last_used = now
+            by_rate.setdefault(sample_rate, []).append((i, stream, window))
+
+        for sample_rate, items in by_rate.items():
+            probs = self._infer(sample_rate, items)
+            for (i, _, _), p in zip(items, probs):
+                results[i] = _RESPONSE.pack(p)
+
+        for sid in released:
+            self._streams.pop(sid, None)
+
+        expired = [sid for sid, s in self._streams.items() if now - s.last_used > _SESSION_TTL]
+        for sid in expired:
+            del self._streams[sid]
+
+        return results
+
+    def _infer(
+        self, sample_rate: int, items: list[tuple[int, _StreamState, np.ndarray]]
+    ) -> list[float]:
+        context_size = onnx_model.context_size(sample_rate)
+        window_size = len(items[0][2])
+        batch_size = len(items)
+
+        x = np.zeros((batch_size, context_size + window_size), dtype=np.float32)
+        state = np.empty((2, batch_size, onnx_model.STATE_SIZE), dtype=np.float32)
+        for row, (_, stream, window) in enumerate(items):
+            if len(stream.context):
+                x[row, :context_size] = stream.context
+            x[row, context_size:] = window
+            state[:, row] = stream.state
+
+        out, new_state = self._session.run(
+            None,
+            {"input": x, "state": state, "sr": np.array(sample_rate, dtype=np.int64)},
+        )
+
+        for row, (_, stream, _) in enumerate(items):
+            stream.state = new_state[:, row].copy()
+            stream.context = x[row, -context_size:].copy()
+
+        return out[:, 0].tolist()
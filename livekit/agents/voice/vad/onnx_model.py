@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import threading
+from typing import Any
+
+import numpy as np
+
+SUPPORTED_SAMPLE_RATES = [8000, 16000]
+STATE_SIZE = 128
+
+_session_lock = threading.Lock()
+_session: Any = None
+
+
+def window_size_samples(sample_rate: int) -> int:
+    return 512 if sample_rate == 16000 else 256
+
+
+def context_size(sample_rate: int) -> int:
+    return 64 if sample_rate == 16000 else 32
+
+
+def model_path() -> str:
+    # resolve the file without importing silero_vad, its __init__ pulls torch
+    spec = importlib.util.find_spec("silero_vad")
+    if spec is None or not spec.submodule_search_locations:
+        raise RuntimeError("silero-vad is not installed")
+
+    return os.path.join(spec.submodule_search_locations[0], "data", "silero_vad.onnx")
+
+
+def new_inference_session() -> Any:
+    """Return the process-wide onnxruntime session, created on first use.
+
+    The session is stateless (the recurrent state is an explicit input), so every
+    stream of the process shares it.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            import onnxruntime  # type: ignore
+
+            opts = onnxruntime.SessionOptions()
+            opts.inter_op_num_threads = 1
+            opts.intra_op_num_threads = 1
+            opts.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+            opts.add_session_config_entry("session.intra_op.allow_spinning", "0")
+
+            _session = onnxruntime.InferenceSession(
+                model_path(), providers=["CPUExecutionProvider"], sess_options=opts
+            )
+
+        return _session
+
+
+class OnnxModel:
+    """Runs the Silero ONNX graph one window at a time, with its own recurrent state.
+
+    Input, state and context buffers are allocated once and reused for every call.
+    """
+
+    def __init__(self, *, onnx_session: Any, sample_rate: int) -> None:
+        if sample_rate not in SUPPORTED_SAMPLE_RATES:
+            raise ValueError("Silero VAD only supports 8KHz and 16KHz sample rates")
+
+        self._sess = onnx_session
+        self._sample_rate = sample_rate
+        self._window_size_samples = window_size_samples(sample_rate)
+        self._context_size = context_size(sample_rate)
+
+        self._sample_rate_nd = np.array(sample_rate, dtype=np.int64)
+        self._state = np.zeros((2, 1, STATE_SIZE), dtype=np.float32)
+        self._input_buffer = np.zeros(
+            (1, self._context_size + self._window_size_samples), dtype=np.float32
+        )
+        self._ort_inputs = {
+            "input": self._input_buffer,
+            "state": self._state,
+            "sr": self._sample_rate_nd,
+        }
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def window_size_samples(self) -> int:
+        return self._window_size_samples
+
+    def reset(self) -> None:
+        self._state.fill(0.0)
+        self._input_buffer.fill(0.0)
+
+    def __call__(self, x: np.ndarray) -> float:
+        # the tail of the previous window becomes the context of this one
+        self._input_buffer[0, : self._context_size] = self._input_buffer[0, -self._context_size :]
+        self._input_buffer[0, self._context_size :] = x
+
+        out, state = self._sess.run(None, self._ort_inputs)
+        self._state[...] = state
+        return float(out[0, 0])
@@ -1,23 +1,585 @@
-import torch
-from silero_vad import read_audio, get_speech_timestamps, load_silero_vad
-from silero_vad import load_silero_vad as load_model
-import types
+from __future__ import annotations
 
+import asyncio
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal
+
+import numpy as np
+
+from livekit import rtc
+
+from ... import utils
+from ...log import logger
+from . import VAD, VADCapabilities, VADEvent, VADEventType, VADStream, onnx_model
+from ._silero_runner import (
+    _SileroVADRunner,
+    decode_probability,
+    encode_release,
+    encode_window,
+)
+from .onnx_model import SUPPORTED_SAMPLE_RATES, OnnxModel
+
+if TYPE_CHECKING:
+    import torch
+
+    from ...ipc.inference_executor import InferenceExecutor
+
+SLOW_INFERENCE_THRESHOLD = 0.2  # late by 200ms
+
+VADBackend = Literal["onnx", "torch"]
+
+
+@dataclass
+class _VADOptions:
+    min_speech_duration: float
+    min_silence_duration: float
+    prefix_padding_duration: float
+    max_buffered_speech: float
+    activation_threshold: float
+    deactivation_threshold: float
+    sample_rate: int
+    backend: VADBackend
+    use_inference_process: bool
+
+
+class _TorchModel:
+    """Runs the Silero torch JIT model one window at a time.
+
+    Each instance owns a copy of the recurrent state, so streams never share
+    hidden state with each other.
+    """
+
+    def __init__(self, *, model: Any, sample_rate: int) -> None:
+        if sample_rate not in SUPPORTED_SAMPLE_RATES:
+            raise ValueError("Silero VAD only supports 8KHz and 16KHz sample rates")
+
+        self._model = copy.deepcopy(model)
+        self._model.reset_states()
+        self._sample_rate = sample_rate
+        self._window_size_samples = onnx_model.window_size_samples(sample_rate)
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def window_size_samples(self) -> int:
+        return self._window_size_samples
+
+    def reset(self) -> None:
+        self._model.reset_states()
+
+    def __call__(self, x: np.ndarray) -> float:
+        import torch
+
+        with torch.no_grad():
+            return float(self._model(torch.from_numpy(x), self._sample_rate).item())
+
+
+class SileroVAD(VAD):
+    Event = VADEvent
+    EventType = VADEventType
+
+    def __init__(
+        self,
+        sampling_rate: int = 16000,
+        *,
+        min_speech_duration: float = 0.05,
+        min_silence_duration: float = 0.55,
+        prefix_padding_duration: float = 0.5,
+        max_buffered_speech: float = 60.0,
+        activation_threshold: float = 0.5,
+        deactivation_threshold: float | None = None,
+        backend: VADBackend = "onnx",
+        use_inference_process: bool = True,
+    ) -> None:
+        """
+        Create a Silero VAD instance.
+
+        Args:
+            sampling_rate (int): Sample rate used for inference (8KHz or 16KHz).
+            min_speech_duration (float): Minimum duration of speech to start a new speech chunk.
+            min_silence_duration (float): At the end of each speech, wait this duration before
+                ending the speech.
+            prefix_padding_duration (float): Duration of padding to add to the beginning of
+                each speech chunk.
+            max_buffered_speech (float): Maximum duration of speech to keep in the buffer
+                (in seconds).
+            activation_threshold (float): Probability above which a window counts as speech.
+            deactivation_threshold (float | None): Probability below which a window counts as
+                silence while speaking. Defaults to ``activation_threshold - 0.15``.
+            backend (str): ``"onnx"`` runs the model with onnxruntime and numpy only,
+                ``"torch"`` uses the torch JIT model shipped with silero-vad.
+            use_inference_process (bool): When running inside a job, send the windows to the
+                worker's shared inference process, which batches them with the other calls.
+                Otherwise the model is loaded and run in this process.
+        """
+        if sampling_rate not in SUPPORTED_SAMPLE_RATES:
+            raise ValueError("Silero VAD only supports 8KHz and 16KHz sample rates")
+
+        if backend not in ("onnx", "torch"):
+            raise ValueError(f"unknown Silero VAD backend: {backend}")
+
+        if deactivation_threshold is None:
+            deactivation_threshold = max(activation_threshold - 0.15, 0.01)
+
+        self._opts = _VADOptions(
+            min_speech_duration=min_speech_duration,
+            min_silence_duration=min_silence_duration,
+            prefix_padding_duration=prefix_padding_duration,
+            max_buffered_speech=max_buffered_speech,
+            activation_threshold=activation_threshold,
+            deactivation_threshold=deactivation_threshold,
+            sample_rate=sampling_rate,
+            backend=backend,
+            use_inference_process=use_inference_process,
+        )
+        super().__init__(
+            capabilities=VADCapabilities(
+                update_interval=onnx_model.window_size_samples(sampling_rate) / sampling_rate
+            )
+        )
 
-class SileroVAD:
-    def __init__(self, sampling_rate=16000):
         self.sampling_rate = sampling_rate
-        self.model = load_model()
+        self._model: Any = None
+
+    @property
+    def model(self) -> Any:
+        """The torch JIT model, loaded lazily (only the torch backend needs it)"""
+        if self._model is None:
+            from silero_vad import load_silero_vad
+
+            self._model = load_silero_vad()
+        return self._model
 
+    @classmethod
+    def load(cls, **kwargs: Any) -> SileroVAD:
+        return cls(**kwargs)
+
+    def get_speech_segments(self, audio_tensor: torch.Tensor) -> list[dict[str, int]]:
+        from silero_vad import get_speech_timestamps
 
-    def get_speech_segments(self, audio_tensor: torch.Tensor):
         return get_speech_timestamps(audio_tensor, self.model, sampling_rate=self.sampling_rate)
-    
-    def stream(self):
-        # Dummy async generator for compatibility
-        async def dummy_stream():
-            if False:
-                yield
-        return dummy_stream()
 
+    def stream(self) -> SileroVADStream:
+        return SileroVADStream(
+            self, self._opts, inference_executor=self._get_inference_executor()
+        )
+
+    def _get_inference_executor(self) -> InferenceExecutor | None:
+        if not self._opts.use_inference_process:
+            return None
+
+        from ...inference_runner import _InferenceRunner
+        from ...job import get_job_context
+
+        if _SileroVADRunner.INFERENCE_METHOD not in _InferenceRunner.registered_runners:
+            return None
+
+        try:
+            return get_job_context().inference_executor
+        except RuntimeError:
+            return None  # not running inside a job
+
+    def _local_model(self) -> OnnxModel | _TorchModel:
+        if self._opts.backend == "torch":
+            return _TorchModel(model=self.model, sample_rate=self._opts.sample_rate)
+
+        return OnnxModel(
+            onnx_session=onnx_model.new_inference_session(), sample_rate=self._opts.sample_rate
+        )
+
+
+class SileroVADStream(VADStream):
+    def __init__(
+        self,
+        vad: SileroVAD,
+        opts: _VADOptions,
+        *,
+        inference_executor: InferenceExecutor | None = None,
+    ) -> None:
+        super().__init__(vad)
+        self._opts = opts
+        self._silero_vad = vad
+        self._inference_executor = inference_executor
+        self._model = None if inference_executor is not None else vad._local_model()
+        self._stream_id = utils.shortuuid("vad_")
+        self._window_size_samples = onnx_model.window_size_samples(opts.sample_rate)
+        self._loop = asyncio.get_event_loop()
+
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task.add_done_callback(lambda _: self._executor.shutdown(wait=False))
+        self._exp_filter = utils.ExpFilter(alpha=0.35)
+
+        self._input_sample_rate = 0
+        self._speech_buffer: np.ndarray | None = None
+        self._speech_buffer_max_reached = False
+        self._prefix_padding_samples = 0  # (input_sample_rate)
+
+    async def _run_inference(self, data: np.ndarray) -> float:
+        if self._inference_executor is not None:
+            try:
+                res = await self._inference_executor.do_inference(
+                    _SileroVADRunner.INFERENCE_METHOD,
+                    encode_window(self._stream_id, self._opts.sample_rate, data),
+                )
+                return decode_probability(res)
+            except Exception:
+                logger.warning(
+                    "silero vad inference process unavailable, running the model locally",
+                    exc_info=True,
+                )
+                self._inference_executor = None
+                self._model = self._silero_vad._local_model()
+
+        assert self._model is not None
+        return await self._loop.run_in_executor(self._executor, self._model, data)
+
+    async def aclose(self) -> None:
+        await super().aclose()
+        await self._release_state()
+
+    async def _release_state(self) -> None:
+        """Drop the recurrent state kept for this stream by the inference process"""
+        if self._inference_executor is None:
+            return
+
+        try:
+            await self._inference_executor.do_inference(
+                _SileroVADRunner.INFERENCE_METHOD, encode_release(self._stream_id)
+            )
+        except Exception:
+            # the state still expires after a while without windows
+            logger.debug("failed to release the silero vad state", exc_info=True)
+
+    @utils.log_exceptions(logger=logger)
+    async def _main_task(self) -> None:
+        inference_f32_data = np.empty(self._window_size_samples, dtype=np.float32)
+        speech_buffer_index: int = 0
+
+        # "pub_" means public, these values are exposed to the users through events
+        pub_speaking = False
+        pub_speech_duration = 0.0
+        pub_silence_duration = 0.0
+        pub_current_sample = 0
+        pub_timestamp = 0.0
+
+        speech_threshold_duration = 0.0
+        silence_threshold_duration = 0.0
+
+        input_frames: list[rtc.AudioFrame] = []
+        inference_frames: list[rtc.AudioFrame] = []
+        resampler: rtc.AudioResampler | None = None
+
+        # used to avoid drift when the sample_rate ratio is not an integer
+        input_copy_remaining_fract = 0.0
+
+        extra_inference_time = 0.0
+
+        async for input_frame in self._input_ch:
+            flushing = not isinstance(input_frame, rtc.AudioFrame)
+            if not isinstance(input_frame, rtc.AudioFrame):
+                if not self._input_sample_rate:
+                    continue  # nothing was pushed yet
+
+                # the pending samples are run as a last window, padded with silence
+                pending = sum(frame.samples_per_channel for frame in inference_frames)
+                if pending > 0:
+                    inference_frames.append(
+                        rtc.AudioFrame.create(
+                            self._opts.sample_rate, 1, self._window_size_samples - pending
+                        )
+                    )
+                    input_needed = int(
+                        self._window_size_samples
+                        * self._input_sample_rate
+                        / self._opts.sample_rate
+                        + input_copy_remaining_fract
+                    )
+                    missing = input_needed - sum(f.samples_per_channel for f in input_frames)
+                    if missing > 0:
+                        input_frames.append(
+                            rtc.AudioFrame.create(self._input_sample_rate, 1, missing)
+                        )
+            elif not self._input_sample_rate:
+                self._input_sample_rate = input_frame.sample_rate
+
+                # alloc the buffers now that we know the input sample rate
+                self._prefix_padding_samples = int(
+                    self._opts.prefix_padding_duration * self._input_sample_rate
+                )
+                self._speech_buffer = np.empty(
+                    int(self._opts.max_buffered_speech * self._input_sample_rate)
+                    + self._prefix_padding_samples,
+                    dtype=np.int16,
+                )
+
+                if self._input_sample_rate != self._opts.sample_rate:
+                    # resampling needed: the input sample rate isn't the same as the model's
+                    # sample rate used for inference
+                    resampler = rtc.AudioResampler(
+                        input_rate=self._input_sample_rate,
+                        output_rate=self._opts.sample_rate,
+                        quality=rtc.AudioResamplerQuality.QUICK,  # VAD doesn't need high quality
+                    )
+            elif self._input_sample_rate != input_frame.sample_rate:
+                logger.error(
+                    "a frame with different sample rate was pushed",
+                    extra={
+                        "sample_rate": input_frame.sample_rate,
+                        "expected_sample_rate": self._input_sample_rate,
+                    },
+                )
+                continue
+
+            speech_buffer = self._speech_buffer
+            assert speech_buffer is not None
+
+            if not flushing:
+                input_frames.append(input_frame)
+                if resampler is not None:
+                    # the resampler may have a bit of latency, but it is OK to ignore since it
+                    # should be negligible
+                    inference_frames.extend(resampler.push(input_frame))
+                else:
+                    inference_frames.append(input_frame)
+
+            while True:
+                start_time = time.perf_counter()
+
+                available_inference_samples = sum(
+                    frame.samples_per_channel for frame in inference_frames
+                )
+                if available_inference_samples < self._window_size_samples:
+                    break  # not enough samples to run inference
+
+                input_frame = utils.combine_frames(input_frames)
+                inference_frame = utils.combine_frames(inference_frames)
+
+                # convert data to f32
+                np.divide(
+                    inference_frame.data[: self._window_size_samples],
+                    np.iinfo(np.int16).max,
+                    out=inference_f32_data,
+                    dtype=np.float32,
+                )
+
+                # run the inference, the model carries its hidden state to the next window
+                p = await self._run_inference(inference_f32_data)
+                p = self._exp_filter.apply(exp=1.0, sample=p)
+
+                window_duration = self._window_size_samples / self._opts.sample_rate
+
+                pub_current_sample += self._window_size_samples
+                pub_timestamp += window_duration
+
+                resampling_ratio = self._input_sample_rate / self._opts.sample_rate
+                to_copy = (
+                    self._window_size_samples * resampling_ratio + input_copy_remaining_fract
+                )
+                to_copy_int = int(to_copy)
+                input_copy_remaining_fract = to_copy - to_copy_int
+
+                # copy the inference window to the speech buffer
+                available_space = len(speech_buffer) - speech_buffer_index
+                to_copy_buffer = min(to_copy_int, available_space)
+                if to_copy_buffer > 0:
+                    speech_buffer[speech_buffer_index : speech_buffer_index + to_copy_buffer] = (
+                        input_frame.data[:to_copy_buffer]
+                    )
+                    speech_buffer_index += to_copy_buffer
+                elif not self._speech_buffer_max_reached:
+                    # reached self._opts.max_buffered_speech (padding is included)
+                    self._speech_buffer_max_reached = True
+                    logger.warning(
+                        "max_buffered_speech reached, ignoring further data for the current speech input"  # noqa: E501
+                    )
+
+                inference_duration = time.perf_counter() - start_time
+                extra_inference_time = max(
+                    0.0,
+                    extra_inference_time + inference_duration - window_duration,
+                )
+                if inference_duration > SLOW_INFERENCE_THRESHOLD:
+                    logger.warning(
+                        "inference is slower than realtime",
+                        extra={"delay": extra_inference_time},
+                    )
+
+                if pub_speaking:
+                    pub_speech_duration += window_duration
+                else:
+                    pub_silence_duration += window_duration
+
+                self._event_ch.send_nowait(
+                    VADEvent(
+                        type=VADEventType.INFERENCE_DONE,
+                        samples_index=pub_current_sample,
+                        timestamp=pub_timestamp,
+                        silence_duration=pub_silence_duration,
+                        speech_duration=pub_speech_duration,
+                        probability=p,
+                        inference_duration=inference_duration,
+                        frames=[
+                            rtc.AudioFrame(
+                                data=input_frame.data[:to_copy_int].tobytes(),
+                                sample_rate=self._input_sample_rate,
+                                num_channels=1,
+                                samples_per_channel=to_copy_int,
+                            )
+                        ],
+                        speaking=pub_speaking,
+                        raw_accumulated_silence=silence_threshold_duration,
+                        raw_accumulated_speech=speech_threshold_duration,
+                    )
+                )
+
+                # hysteresis: once speaking, only a probability below the deactivation
+                # threshold counts as silence
+                is_speech = p >= self._opts.activation_threshold or (
+                    pub_speaking and p >= self._opts.deactivation_threshold
+                )
+
+                if is_speech:
+                    speech_threshold_duration += window_duration
+                    silence_threshold_duration = 0.0
+
+                    if not pub_speaking:
+                        if speech_threshold_duration >= self._opts.min_speech_duration:
+                            pub_speaking = True
+                            pub_silence_duration = 0.0
+                            pub_speech_duration = speech_threshold_duration
+
+                            self._event_ch.send_nowait(
+                                VADEvent(
+                                    type=VADEventType.START_OF_SPEECH,
+                                    samples_index=pub_current_sample,
+                                    timestamp=pub_timestamp,
+                                    silence_duration=pub_silence_duration,
+                                    speech_duration=pub_speech_duration,
+                                    frames=[self._copy_speech_buffer(speech_buffer_index)],
+                                    speaking=True,
+                                )
+                            )
+
+                else:
+                    silence_threshold_duration += window_duration
+                    speech_threshold_duration = 0.0
+
+                    if not pub_speaking:
+                        speech_buffer_index = self._reset_write_cursor(speech_buffer_index)
+
+                    if (
+                        pub_speaking
+                        and silence_threshold_duration >= self._opts.min_silence_duration
+                    ):
+                        pub_speaking = False
+                        pub_speech_duration = 0.0
+                        pub_silence_duration = silence_threshold_duration
+
+                        self._event_ch.send_nowait(
+                            VADEvent(
+                                type=VADEventType.END_OF_SPEECH,
+                                samples_index=pub_current_sample,
+                                timestamp=pub_timestamp,
+                                silence_duration=pub_silence_duration,
+                                speech_duration=pub_speech_duration,
+                                frames=[self._copy_speech_buffer(speech_buffer_index)],
+                                speaking=False,
+                            )
+                        )
+
+                        speech_buffer_index = self._reset_write_cursor(speech_buffer_index)
+
+                # remove the frames that were used for inference from the input and inference frames
+                input_frames = []
+                inference_frames = []
+
+                # add the remaining data
+                if len(input_frame.data) - to_copy_int > 0:
+                    data = input_frame.data[to_copy_int:].tobytes()
+                    input_frames.append(
+                        rtc.AudioFrame(
+                            data=data,
+                            sample_rate=self._input_sample_rate,
+                            num_channels=1,
+                            samples_per_channel=len(data) // 2,
+                        )
+                    )
+
+                if len(inference_frame.data) - self._window_size_samples > 0:
+                    data = inference_frame.data[self._window_size_samples :].tobytes()
+                    inference_frames.append(
+                        rtc.AudioFrame(
+                            data=data,
+                            sample_rate=self._opts.sample_rate,
+                            num_channels=1,
+                            samples_per_channel=len(data) // 2,
+                        )
+                    )
+
+            if flushing:
+                # end of the segment: close the current speech and start the next segment
+                # from a clean state
+                if pub_speaking:
+                    pub_speaking = False
+                    pub_silence_duration = silence_threshold_duration
+                    self._event_ch.send_nowait(
+                        VADEvent(
+                            type=VADEventType.END_OF_SPEECH,
+                            samples_index=pub_current_sample,
+                            timestamp=pub_timestamp,
+                            silence_duration=pub_silence_duration,
+                            speech_duration=0.0,
+                            frames=[self._copy_speech_buffer(speech_buffer_index)],
+                            speaking=False,
+                        )
+                    )
+
+                input_frames = []
+                inference_frames = []
+                input_copy_remaining_fract = 0.0
+                speech_buffer_index = 0
+                self._speech_buffer_max_reached = False
+                pub_speech_duration = 0.0
+                pub_silence_duration = 0.0
+                speech_threshold_duration = 0.0
+                silence_threshold_duration = 0.0
+                await self._reset_model()
+
+    async def _reset_model(self) -> None:
+        self._exp_filter.reset()
+        if self._model is not None:
+            self._model.reset()
+        else:
+            # the inference process keeps the recurrent state by stream id
+            await self._release_state()
+            self._stream_id = utils.shortuuid("vad_")
+
+    def _reset_write_cursor(self, speech_buffer_index: int) -> int:
+        """Keep only the prefix padding at the start of the speech buffer"""
+        assert self._speech_buffer is not None
+
+        if speech_buffer_index <= self._prefix_padding_samples:
+            return speech_buffer_index
+
+        padding_data = self._speech_buffer[
+            speech_buffer_index - self._prefix_padding_samples : speech_buffer_index
+        ]
+
+        self._speech_buffer_max_reached = False
+        self._speech_buffer[: self._prefix_padding_samples] = padding_data
+        return self._prefix_padding_samples
+
+    def _copy_speech_buffer(self, speech_buffer_index: int) -> rtc.AudioFrame:
+        assert self._speech_buffer is not None
 
+        return rtc.AudioFrame(
+            sample_rate=self._input_sample_rate,
+            num_channels=1,
+            samples_per_channel=speech_buffer_index,
+            data=self._speech_buffer[:speech_buffer_index].tobytes(),
+        )
@@ -64,7 +64,9 @@ UPDATE_LOAD_INTERVAL = 0.5
 
 
 def _default_initialize_process_fnc(proc: JobProcess) -> Any:
-    return
+    from .voice import presynthesis
+
+    presynthesis.presynthesize(proc)
 
 
 async def _default_request_fnc(ctx: JobRequest) -> None:
@@ -15,20 +15,19 @@ from twilio.rest import Client
 sys.path.insert(0, str(Path(__file__).resolve().parent / "livekit" / "agents"))
 
 from livekit.agents import Agent
-from livekit.agents.llm import OpenAILLM, ChatContext
+from livekit.agents.llm import OpenAILLM, ChatContext, ContextWindowOptions
+from livekit.agents.voice import presynthesis
 from livekit.agents.voice.agent_session import AgentSession
+from livekit.agents.tts import CacheAdapter
 from livekit.agents.tts.elevenlabs import ElevenLabsTTS
 from livekit.agents.stt.openai import OpenAIWhisperSTT
 from livekit.agents.voice.vad.silero import SileroVAD
-from livekit.agents.llm.openai import FunctionTool
 import jwt
 import time
-from llama_index.core import (
-    SimpleDirectoryReader,
-    StorageContext,
-    VectorStoreIndex,
-    load_index_from_storage,
-)
+from retriever import get_query_engine
+from catalog import get_package_search
+from index_builder import build
+from vector_store import VectorStore, convert_llama_index
 
 from livekit.agents.voice.room_io.room_io import Room
 
@@ -146,28 +145,36 @@ def twiml_intro():
 # ─── Knowledge Base ───
 data_dir = Path("data")
 persist_dir = Path("query-engine-storage")
+vectors_dir = persist_dir / "vectors"
 
 try:
-    if not persist_dir.exists():
-        logger.info("📄 No index found. Creating from PDFs...")
-        documents = SimpleDirectoryReader(str(data_dir)).load_data()
-        index = VectorStoreIndex.from_documents(documents)
-        index.storage_context.persist(persist_dir=persist_dir)
-    else:
-        logger.info("📁 Loading existing index...")
-        storage_context = StorageContext.from_defaults(persist_dir=persist_dir)
-        index = load_index_from_storage(storage_context)
+    if not VectorStore.exists(vectors_dir):
+        if (persist_dir / "default__vector_store.json").exists():
+            logger.info("📦 Converting index to the binary vector store...")
+            convert_llama_index(persist_dir, vectors_dir)
+        else:
+            logger.info("📄 No index found. Creating from PDFs...")
+            build(data_dir, vectors_dir, api_key=api_key)
+
+    logger.info("📁 Loading existing index...")
+    # memory-mapped, built once per process, reopened (and its answers dropped) when the store
+    # is rebuilt
+    # "retrieve": query_kb returns the matching chunks, the agent LLM writes the answer
+    kb_engine = get_query_engine(
+        vectors_dir, index_store_path=vectors_dir / "manifest.json", mode="retrieve"
+    )
+    # structured side index: exact filters on destination, budget, hotel, vehicle, meals,
+    # reloaded with the store
+    package_search = get_package_search(
+        vectors_dir, index_store_path=vectors_dir / "manifest.json"
+    )
 except Exception as e:
     logger.exception("❌ Failed to load knowledge base: %s", e)
     raise
 
 # ─── Tool ───
-async def query_kb(query: str) -> str:
-    query_engine = index.as_query_engine(use_async=True)
-    result = await query_engine.aquery(query)
-    return str(result)
-
-query_kb_tool = FunctionTool.from_defaults(fn=query_kb).to_tool()
+query_kb_tool = kb_engine.as_function_tool(name="query_kb")
+search_packages_tool = package_search.as_function_tool(name="search_packages")
 
 # ─── Prompt ───
 PROMPT = """
@@ -192,7 +199,7 @@ Once the preferences are collected:
 
 "Thanks for sharing that. Let me find the best options from our travel packages."
 
-(Use the knowledge base to fetch and suggest a package based on destination, travel dates, budget, and preferences.)
+(Use search_packages to filter packages by destination, budget, hotel category, vehicle and meal plan, then the knowledge base for details, and suggest a package based on destination, travel dates, budget, and preferences.)
 
 If a relevant package is found:
 
@@ -221,16 +228,33 @@ If there are no more questions:
 "Thanks for chatting with me! I have noted your preferences and passed them along to our team."
 """
 
+# ─── Scripted lines, synthesized before the call connects ───
+GREETING = "Hi! I hope you're doing well. Is this a good time to chat about your travel plans?"
+STATIC_UTTERANCES = [
+    GREETING,
+    "I will ask you a few quick questions so I can find the best options for you.",
+    "Thanks for chatting with me! I have noted your preferences and passed them along to our team.",
+]
+
+
+def make_tts() -> CacheAdapter:
+    return CacheAdapter(tts=ElevenLabsTTS(voice_id="DpnM70iDHNHZ0Mguv6GJ"))
+
+
+Agent.declare_static_utterances(STATIC_UTTERANCES, tts=make_tts)
+
 # ─── Agent ───
 class TravelAgent(Agent):
     def __init__(self):
+        vad = SileroVAD()
         super().__init__(
             instructions=PROMPT,
             llm=OpenAILLM(model="gpt-4o", api_key=api_key),
-            stt=OpenAIWhisperSTT(model="whisper-1"),
-            tts=ElevenLabsTTS(voice_id="DpnM70iDHNHZ0Mguv6GJ"),
-            vad=SileroVAD(),
-            tools=[query_kb_tool],
+            stt=OpenAIWhisperSTT(model="whisper-1", vad=vad),
+            tts=make_tts(),
+            vad=vad,
+            tools=[query_kb_tool, search_packages_tool],
+            prefetch=[kb_engine.prefetch("query_kb")],
         )
 
 # ─── Call via Twilio ───
@@ -275,14 +299,22 @@ async def initialize_everything():
             identity="agent"
         )
 
+        # No worker process here, pre-synthesize while the room connects. The greeting only
+        # waits for its own audio, the other lines keep going in the background
+        presynthesis_task = asyncio.create_task(presynthesis.apresynthesize())
+        greeting_task = asyncio.create_task(presynthesis.apresynthesize([GREETING]))
+
         # Start agent session
-        session = AgentSession()
+        # long calls: older turns are summarized once the history passes the token budget
+        session = AgentSession(context_window=ContextWindowOptions())
         await session.start(
             agent=TravelAgent(),
             room=room
         )
 
-        await session.say("Hi! I hope you're doing well. Is this a good time to chat about your travel plans?")
+        await greeting_task
+        await session.say(GREETING)
+        await presynthesis_task
 
     except Exception as e:
         logger.exception("❌ Error during session start: %s", e)
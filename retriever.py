@@ -0,0 +1,513 @@
+"""In-process top-k retrieval over the memory-mapped knowledge base.
+
+The query engine is built once per process (see `get_query_engine`) and reused by every
+`query_kb` call: a lookup is one embedding request, one matmul + argpartition over the
+normalized matrix, and one chat completion.
+
+Two caches sit in front of it: query embeddings by normalized text, and answers by
+embedding similarity (invalidated by TTL). When the index version changes (the store was
+rebuilt), the store is reopened and the answers of the old one are dropped.
+
+Retrieval can also start before the LLM calls the tool: `prefetch()` retrieves on the user's
+transcript while they speak, and the nodes are bound to the reply's speech id. `query_kb`
+still retrieves on the query written by the LLM (whose embedding is already cached when it
+is the transcript as is) and merges the prefetched nodes into its results, by score.
+`prefetch_stats` counts how often they are ready against the requests spent.
+
+In "retrieve" mode `query_kb` skips the chat completion and returns the top chunks
+(package name, price and text, trimmed to a token budget) for the agent LLM to answer from.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+from openai import AsyncOpenAI
+
+from livekit.agents.llm.openai import FunctionTool, Tool
+from livekit.agents.llm.utils import token_counter
+from livekit.agents.utils import http_context
+from livekit.agents.voice import SpeculativePrefetch, prefetched
+from vector_store import Node, VectorStore
+
+DEFAULT_TOP_K = 2
+DEFAULT_CONTEXT_TOP_K = 4
+DEFAULT_CONTEXT_TOKENS = 1000
+DEFAULT_LLM_MODEL = "gpt-4o-mini"
+DEFAULT_SIMILARITY_THRESHOLD = 0.97
+DEFAULT_ANSWER_TTL = 600.0
+QA_PROMPT = (
+    "Context information is below.\n"
+    "---------------------\n"
+    "{context}\n"
+    "---------------------\n"
+    "Given the context information and not prior knowledge, answer the query.\n"
+    "Query: {query}\n"
+    "Answer: "
+)
+
+
+QueryMode = Literal["synthesize", "retrieve"]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScoredNode:
+    node: Node
+    score: float
+
+
+@dataclass
+class PrefetchStats:
+    requests: int = 0
+    """Embedding requests started by the prefetch"""
+    queries: int = 0
+    """Tool queries"""
+    hits: int = 0
+    """Tool queries that found nodes prefetched for their speech"""
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.queries if self.queries else 0.0
+
+
+@dataclass
+class PackageInfo:
+    name: str
+    price: str | None = None
+
+
+class Retriever:
+    def __init__(self, store: VectorStore) -> None:
+        self._store = store
+        # rows are normalized by the store, float16 is upcast once (slow matmul on CPU),
+        # float32 stores are used straight from the mapping
+        self._matrix = np.asarray(store.embeddings, dtype=np.float32)
+
+    @property
+    def store(self) -> VectorStore:
+        return self._store
+
+    def top_k(self, query_embedding: np.ndarray, k: int = DEFAULT_TOP_K) -> list[ScoredNode]:
+        count = self._matrix.shape[0]
+        k = min(k, count)
+        if k <= 0:
+            return []
+
+        q = np.asarray(query_embedding, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        scores = self._matrix @ q
+
+        if k < count:
+            idx = np.argpartition(scores, count - k)[count - k :]
+        else:
+            idx = np.arange(count)
+        idx = idx[np.argsort(scores[idx])[::-1]]
+
+        nodes = self._store.nodes
+        return [ScoredNode(node=nodes[i], score=float(scores[i])) for i in idx]
+
+
+def merge_nodes(nodes: list[ScoredNode], other: list[ScoredNode], k: int) -> list[ScoredNode]:
+    """Top `k` of both lists by score, a node in both keeps its best score"""
+    best: dict[str, ScoredNode] = {}
+    for scored in (*nodes, *other):
+        prev = best.get(scored.node.id)
+        if prev is None or scored.score > prev.score:
+            best[scored.node.id] = scored
+    return sorted(best.values(), key=lambda s: s.score, reverse=True)[:k]
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def normalize_query(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+_PRICE_RE = re.compile(
+    r"(?:₹|\bRs\.?|\bINR)\s*\d[\d,]*(?:/-)?(?:\s*\(?\s*per\s+person\)?)?", re.IGNORECASE
+)
+_FILE_SUFFIX_RE = re.compile(r"\.(?:pdf|docx?|txt|md)$", re.IGNORECASE)
+
+
+def package_infos(nodes: list[Node]) -> dict[str, PackageInfo]:
+    """Package name and first price mentioned, per source document"""
+    infos: dict[str, PackageInfo] = {}
+    for node in nodes:
+        doc = _source(node)
+        if (info := infos.get(doc)) is None:
+            name = _FILE_SUFFIX_RE.sub("", str(node.metadata.get("file_name", doc))).strip()
+            info = infos[doc] = PackageInfo(name=_WHITESPACE_RE.sub(" ", name))
+        if info.price is None and (m := _PRICE_RE.search(_WHITESPACE_RE.sub(" ", node.text))):
+            info.price = m.group(0).strip()
+    return infos
+
+
+def _source(node: Node) -> str:
+    return str(node.metadata.get("file_name") or node.ref_doc_id or node.id)
+
+
+def format_context(
+    nodes: list[ScoredNode],
+    packages: dict[str, PackageInfo],
+    *,
+    max_tokens: int = DEFAULT_CONTEXT_TOKENS,
+) -> str:
+    """Chunks in score order, each with its package metadata, within `max_tokens`"""
+    tokenizer = token_counter()
+    parts: list[str] = []
+    remaining = max_tokens
+    for i, scored in enumerate(nodes, start=1):
+        node = scored.node
+        info = packages.get(_source(node)) or PackageInfo(name=_source(node))
+        header = f"[{i}] Package: {info.name}"
+        if info.price:
+            header += f" | Price: {info.price}"
+        if page := node.metadata.get("page_label"):
+            header += f" | Page: {page}"
+
+        text = _WHITESPACE_RE.sub(" ", node.text).strip()
+        remaining -= tokenizer.count(header) + 1
+        if remaining <= 0:
+            break
+
+        text_tokens = tokenizer.count(text)
+        if text_tokens > remaining:
+            text = tokenizer.truncate(text, remaining) + "…"
+        remaining -= text_tokens
+        parts.append(f"{header}\n{text}")
+
+    return "\n\n".join(parts) if parts else "No matching package found."
+
+
+def _numbers(text: str) -> tuple[str, ...]:
+    # "under 10000" and "under 20000" embed almost identically, they must never share an answer
+    return tuple(sorted(m.replace(",", "") for m in _NUMBER_RE.findall(text)))
+
+
+class IndexVersion:
+    """Content hash of the index description file (the store `manifest.json`), re-read only
+    when its mtime changes"""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._path = Path(path)
+        self._mtime_ns: int | None = None
+        self._version = ""
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def __call__(self) -> str:
+        try:
+            mtime_ns = self._path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return ""
+
+        if mtime_ns != self._mtime_ns:
+            self._version = hashlib.sha256(self._path.read_bytes()).hexdigest()[:16]
+            self._mtime_ns = mtime_ns
+        return self._version
+
+
+class EmbeddingCache:
+    """LRU of query embeddings keyed by normalized text"""
+
+    def __init__(self, *, max_entries: int = 512) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    def get(self, text: str) -> np.ndarray | None:
+        key = normalize_query(text)
+        if (embedding := self._entries.get(key)) is not None:
+            self._entries.move_to_end(key)
+        return embedding
+
+    def put(self, text: str, embedding: np.ndarray) -> None:
+        key = normalize_query(text)
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+class AnswerCache:
+    """Semantic cache: a stored answer is reused when a new query is within `threshold`
+    cosine similarity of a cached one (and mentions the same numbers).
+
+    Query embeddings are kept in one preallocated matrix (ring buffer), a lookup is a
+    single matmul over it.
+    """
+
+    def __init__(
+        self,
+        *,
+        dim: int,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        ttl: float = DEFAULT_ANSWER_TTL,
+        max_entries: int = 256,
+    ) -> None:
+        self._threshold = threshold
+        self._ttl = ttl
+
+        self._matrix = np.zeros((max_entries, dim), dtype=np.float32)
+        self._expires_at = np.full(max_entries, -np.inf)
+        self._answers: list[str] = [""] * max_entries
+        self._numbers: list[tuple[str, ...]] = [()] * max_entries
+        self._next = 0
+
+    def clear(self) -> None:
+        self._expires_at.fill(-np.inf)
+
+    def get(self, query: str, embedding: np.ndarray) -> str | None:
+        scores = self._matrix @ embedding
+        scores[self._expires_at < time.monotonic()] = -np.inf
+
+        numbers = _numbers(query)
+        candidates = np.flatnonzero(scores >= self._threshold)
+        for i in candidates[np.argsort(-scores[candidates])]:
+            if self._numbers[i] == numbers:
+                return self._answers[i]
+        return None
+
+    def put(self, query: str, embedding: np.ndarray, answer: str) -> None:
+        i = self._next
+        self._next = (self._next + 1) % len(self._answers)
+        self._matrix[i] = embedding
+        self._expires_at[i] = time.monotonic() + self._ttl
+        self._answers[i] = answer
+        self._numbers[i] = _numbers(query)
+
+
+class QueryEngine:
+    def __init__(
+        self,
+        retriever: Retriever,
+        *,
+        top_k: int = DEFAULT_TOP_K,
+        llm_model: str = DEFAULT_LLM_MODEL,
+        api_key: str | None = None,
+        index_store_path: str | os.PathLike[str] | None = None,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        answer_ttl: float = DEFAULT_ANSWER_TTL,
+        mode: QueryMode = "synthesize",
+        context_top_k: int = DEFAULT_CONTEXT_TOP_K,
+        context_tokens: int = DEFAULT_CONTEXT_TOKENS,
+    ) -> None:
+        self._retriever = retriever
+        self._top_k = top_k
+        self._mode = mode
+        self._context_top_k = context_top_k
+        self._context_tokens = context_tokens
+        self._packages = package_infos(retriever.store.nodes)
+        self._llm_model = llm_model
+        self._embed_model = retriever.store.manifest.embed_model
+        self._api_key = api_key
+        self._client: AsyncOpenAI | None = None
+        self._http_client: Any = None
+
+        self._embedding_cache = EmbeddingCache()
+        # requests in flight by normalized text, a prefetch and the tool call share them
+        self._embedding_tasks: dict[str, asyncio.Task[np.ndarray]] = {}
+        self._prefetch_stats = PrefetchStats()
+        self._similarity_threshold = similarity_threshold
+        self._answer_ttl = answer_ttl
+        self._answer_cache = self._new_answer_cache()
+
+        # manifest of the store, it is reopened when the manifest changes
+        self._index_version = IndexVersion(index_store_path) if index_store_path else None
+        self._version = self._index_version() if self._index_version else ""
+
+    def _new_answer_cache(self) -> AnswerCache:
+        return AnswerCache(
+            dim=self._retriever.store.manifest.dim,
+            threshold=self._similarity_threshold,
+            ttl=self._answer_ttl,
+        )
+
+    def _check_index(self) -> None:
+        """Reopen the store if it was rebuilt, the answers of the old one are dropped"""
+        if self._index_version is None:
+            return
+
+        version = self._index_version()
+        if version == self._version:
+            return
+
+        self._version = version
+        try:
+            store = VectorStore.open(self._index_version.path.parent)
+        except Exception:
+            logger.warning("failed to reopen the rebuilt vector store", exc_info=True)
+            return
+
+        if store.manifest.embed_model != self._embed_model:
+            self._embedding_cache = EmbeddingCache()
+        self._embed_model = store.manifest.embed_model
+        self._retriever = Retriever(store)
+        self._packages = package_infos(store.nodes)
+        self._answer_cache = self._new_answer_cache()
+        logger.info("vector store reopened", extra={"version": version, "count": len(store)})
+
+    @property
+    def retriever(self) -> Retriever:
+        return self._retriever
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        http_client = http_context.httpx_client()
+        if self._client is None or self._http_client is not http_client:
+            self._client = AsyncOpenAI(api_key=self._api_key, http_client=http_client)
+            self._http_client = http_client
+        return self._client
+
+    async def aembed(self, text: str) -> np.ndarray:
+        """Normalized embedding of `text`"""
+        if (embedding := self._embedding_cache.get(text)) is not None:
+            return embedding
+
+        key = normalize_query(text)
+        if (task := self._embedding_tasks.get(key)) is None:
+            task = asyncio.create_task(self._create_embedding(text))
+            self._embedding_tasks[key] = task
+            task.add_done_callback(lambda t: self._embedding_done(key, t))
+
+        # shielded, a cancelled prefetch doesn't cancel the request for the tool call
+        return await asyncio.shield(task)
+
+    async def _create_embedding(self, text: str) -> np.ndarray:
+        res = await self.client.embeddings.create(model=self._embed_model, input=text)
+        embedding = np.asarray(res.data[0].embedding, dtype=np.float32)
+        embedding /= max(float(np.linalg.norm(embedding)), 1e-12)
+        self._embedding_cache.put(text, embedding)
+        return embedding
+
+    def _embedding_done(self, key: str, task: asyncio.Task[np.ndarray]) -> None:
+        self._embedding_tasks.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # raised to the callers, don't log it again if none is left
+
+    async def _prefetch_retrieve(self, transcript: str) -> list[ScoredNode]:
+        key = normalize_query(transcript)
+        if self._embedding_cache.get(transcript) is None and key not in self._embedding_tasks:
+            self._prefetch_stats.requests += 1
+        return await self.aretrieve(transcript)
+
+    def _record_query(self, nodes: list[ScoredNode] | None) -> None:
+        stats = self._prefetch_stats
+        stats.queries += 1
+        hit = nodes is not None
+        if hit:
+            stats.hits += 1
+        logger.debug(
+            "query_kb prefetch",
+            extra={"hit": hit, "hit_rate": stats.hit_rate, "prefetch_requests": stats.requests},
+        )
+
+    @property
+    def prefetch_stats(self) -> PrefetchStats:
+        return self._prefetch_stats
+
+    @property
+    def mode(self) -> QueryMode:
+        return self._mode
+
+    async def aretrieve(self, query: str) -> list[ScoredNode]:
+        self._check_index()
+        retriever = self._retriever  # the one matching the embedding model
+        k = self._context_top_k if self._mode == "retrieve" else self._top_k
+        return retriever.top_k(await self.aembed(query), k)
+
+    async def acontext(
+        self,
+        query: str,
+        *,
+        nodes: list[ScoredNode] | None = None,
+        prefetched: list[ScoredNode] | None = None,
+    ) -> str:
+        """Raw top chunks with their package metadata, no chat completion. `nodes` are used
+        as is when given, `prefetched` ones are merged with those retrieved for `query`"""
+        self._check_index()
+        retriever, packages = self._retriever, self._packages
+        if nodes is None:
+            embedding = await self.aembed(query)
+            nodes = retriever.top_k(embedding, self._context_top_k)
+            if prefetched:
+                nodes = merge_nodes(nodes, prefetched, self._context_top_k)
+        return format_context(nodes, packages, max_tokens=self._context_tokens)
+
+    async def aquery(
+        self,
+        query: str,
+        *,
+        nodes: list[ScoredNode] | None = None,
+        prefetched: list[ScoredNode] | None = None,
+    ) -> str:
+        """Answer `query`. `nodes` are used as the context when given, `prefetched` ones are
+        merged with those retrieved for `query`"""
+        self._check_index()
+        retriever, answer_cache = self._retriever, self._answer_cache
+        embedding = None
+        if nodes is None:
+            embedding = await self.aembed(query)
+            if (answer := answer_cache.get(query, embedding)) is not None:
+                return answer
+
+            nodes = retriever.top_k(embedding, self._top_k)
+            if prefetched:
+                nodes = merge_nodes(nodes, prefetched, self._top_k)
+
+        context = "\n\n".join(n.node.text for n in nodes)
+        completion = await self.client.chat.completions.create(
+            model=self._llm_model,
+            messages=[{"role": "user", "content": QA_PROMPT.format(context=context, query=query)}],
+        )
+        answer = completion.choices[0].message.content or ""
+        if answer and embedding is not None:
+            answer_cache.put(query, embedding, answer)
+        return answer
+
+    def prefetch(self, tool_name: str = "query_kb") -> SpeculativePrefetch:
+        """Retrieve on the user transcript while they speak, pass it to `Agent(prefetch=...)`"""
+        return SpeculativePrefetch(tool_name, self._prefetch_retrieve)
+
+    def as_function_tool(self, name: str = "query_kb", description: str | None = None) -> Tool:
+        async def query_kb(query: str) -> str:
+            # chunks retrieved on what the user said this turn. The query often differs
+            # from it ("yes that sounds good"), so they're merged with the query's own by
+            # score: a vague transcript scores low and doesn't displace them
+            nodes: list[ScoredNode] | None = await prefetched()
+            self._record_query(nodes)
+            if self._mode == "retrieve":
+                return await self.acontext(query, prefetched=nodes)
+            return await self.aquery(query, prefetched=nodes)
+
+        if description is None:
+            description = (
+                "Search the travel packages knowledge base, returns the matching package "
+                "details (name, price, itinerary)."
+                if self._mode == "retrieve"
+                else "Search the travel packages knowledge base and answer the query."
+            )
+
+        return FunctionTool.from_defaults(fn=query_kb, name=name, description=description).to_tool()
+
+
+@functools.lru_cache(maxsize=None)
+def get_query_engine(path: str | os.PathLike[str], **kwargs: Any) -> QueryEngine:
+    """Query engine of the store at `path`, built once per process"""
+    return QueryEngine(Retriever(VectorStore.open(path)), **kwargs)
@@ -0,0 +1,116 @@
+import asyncio
+import os
+
+import numpy as np
+
+from livekit.agents import utils
+from livekit.agents.tts import CacheAdapter, PhraseCache
+from livekit.agents.tts.tts import (
+    TTS,
+    AudioEmitter,
+    ChunkedStream,
+    SynthesizeStream,
+    TTSCapabilities,
+)
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+
+SAMPLE_RATE = 16000
+SENTENCES = [
+    "Sure, I can help with that trip to Goa.",
+    "The first hotel costs twelve thousand per night.",
+    "Would you like to book it?",
+]
+
+
+def _audio_for(text: str) -> bytes:
+    # 10ms (one frame) of a constant sample per character, different for each text
+    value = sum(map(ord, text.strip())) % 1000 + 1
+    return np.full(len(text.strip()) * 160, value, dtype=np.int16).tobytes()
+
+
+class FakeTTS(TTS):
+    def __init__(self) -> None:
+        super().__init__(
+            capabilities=TTSCapabilities(streaming=True), sample_rate=SAMPLE_RATE, num_channels=1
+        )
+        self.requests: list[str] = []
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> ChunkedStream:
+        raise AssertionError("a streaming TTS is expected to be streamed")
+
+    def stream(
+        self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> SynthesizeStream:
+        return FakeSynthesizeStream(tts=self, conn_options=conn_options)
+
+
+class FakeSynthesizeStream(SynthesizeStream):
+    async def _run(self, output_emitter: AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+            mime_type="audio/pcm",
+            stream=True,
+        )
+        output_emitter.start_segment(segment_id=utils.shortuuid())
+        async for data in self._input_ch:
+            if isinstance(data, str):
+                self._mark_started()
+                self._tts.requests.append(data)
+                output_emitter.push(_audio_for(data))
+        output_emitter.end_segment()
+
+
+async def _reply(tts: CacheAdapter, text: str) -> bytes:
+    stream = tts.stream()
+    stream.push_text(text)
+    stream.end_input()
+    audio = b"".join([ev.frame.data.tobytes() async for ev in stream])
+    await stream.aclose()
+    return audio.rstrip(b"\x00")  # the emitter ends the segment with silence
+
+
+async def _streamed_reply_fills_cache(cache_dir: str) -> None:
+    wrapped = FakeTTS()
+    tts = CacheAdapter(tts=wrapped, cache=PhraseCache(cache_dir=cache_dir))
+    expected = b"".join(_audio_for(s) for s in SENTENCES)
+
+    assert await _reply(tts, " ".join(SENTENCES)) == expected
+    assert sorted(wrapped.requests) == sorted(SENTENCES)
+    await tts.cache.aflush()
+
+    # every sentence is stored on its own, in memory and on disk
+    for sentence in SENTENCES:
+        assert tts.cache.get(tts.cache_key(sentence)) == _audio_for(sentence)
+    assert len(os.listdir(cache_dir)) == len(SENTENCES)
+
+    # replayed without any request, also by another process sharing the directory
+    wrapped.requests.clear()
+    assert await _reply(tts, " ".join(SENTENCES)) == expected
+    other = CacheAdapter(tts=wrapped, cache=PhraseCache(cache_dir=cache_dir))
+    assert await _reply(other, " ".join(SENTENCES)) == expected
+    assert wrapped.requests == []
+
+
+def test_streamed_reply_fills_cache(tmp_path) -> None:
+    asyncio.run(_streamed_reply_fills_cache(str(tmp_path)))
+
+
+async def _disk_tier_is_capped(cache_dir: str) -> None:
+    cache = PhraseCache(cache_dir=cache_dir, max_memory_bytes=0, max_disk_bytes=10_000)
+    for i in range(10):
+        cache.put(f"key{i}", bytes(2_000))
+        await cache.aflush()
+
+    sizes = [os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir)]
+    assert sum(sizes) <= 10_000
+    # the least recently written phrases are evicted first
+    assert cache.get("key9") is not None
+    assert cache.get("key0") is None
+
+
+def test_disk_tier_is_capped(tmp_path) -> None:
+    asyncio.run(_disk_tier_is_capped(str(tmp_path)))
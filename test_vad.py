@@ -1,31 +1,73 @@
-import torch
-from silero_vad import get_speech_timestamps, read_audio, load_silero_vad, collect_chunks, save_audio
-import silero_vad.utils_vad as utils_vad
+import asyncio
+import os
+import wave
 from pathlib import Path
 
-# --- Monkey-patch the OnnxWrapper __init__ to handle PosixPath bug ---
-original_init = utils_vad.OnnxWrapper.__init__
-def patched_init(self, path, *args, **kwargs):
-    if isinstance(path, Path):
-        path = str(path)  # Fix for 'in' operator bug
-    original_init(self, path, *args, **kwargs)
-utils_vad.OnnxWrapper.__init__ = patched_init
+import numpy as np
 
-# --- Load model ---
-model = load_silero_vad("cpu")
+from livekit import rtc
+from livekit.agents.voice.vad import SileroVAD, SileroVADStream, VADEvent, VADEventType
 
-# --- Load audio file (must be 16kHz mono WAV) ---
-audio = read_audio("test.wav", sampling_rate=16000)
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = SAMPLE_RATE // 100  # 10ms frames, like a room track
 
-# --- Run VAD ---
-segments = get_speech_timestamps(audio, model, sampling_rate=16000)
 
-# --- Print results ---
-print("✅ Detected speech segments:")
-for seg in segments:
-    print(seg)
+async def detect_speech(path: str) -> list[tuple[VADEvent, VADEvent]]:
+    # --- Load audio file (must be 16kHz mono WAV) ---
+    with wave.open(path, "rb") as f:
+        assert f.getframerate() == SAMPLE_RATE and f.getnchannels() == 1
+        pcm = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
 
-# --- Collect speech chunks and save ---
-speech = collect_chunks(segments, audio)
-save_audio("speech_only.wav", speech, sampling_rate=16000)
-print("✅ Saved speech_only.wav")
+    # --- Run the VAD stream (onnxruntime backend, in this process) ---
+    vad = SileroVAD(backend="onnx", use_inference_process=False)
+    stream = vad.stream()
+    assert isinstance(stream, SileroVADStream)
+
+    for i in range(0, len(pcm), FRAME_SAMPLES):
+        chunk = pcm[i : i + FRAME_SAMPLES]
+        stream.push_frame(
+            rtc.AudioFrame(
+                data=chunk.tobytes(),
+                sample_rate=SAMPLE_RATE,
+                num_channels=1,
+                samples_per_channel=len(chunk),
+            )
+        )
+    stream.end_input()
+
+    events = [ev async for ev in stream if ev.type != VADEventType.INFERENCE_DONE]
+    await stream.aclose()
+
+    # --- Check the events: speech starts, and every start is ended (end_input flushes) ---
+    assert events, "no speech detected"
+    for i, ev in enumerate(events):
+        expected = VADEventType.START_OF_SPEECH if i % 2 == 0 else VADEventType.END_OF_SPEECH
+        assert ev.type == expected, f"unexpected {ev.type} at {ev.timestamp:.3f}s"
+        assert ev.frames and ev.frames[0].samples_per_channel > 0
+    assert events[-1].type == VADEventType.END_OF_SPEECH
+
+    return list(zip(events[::2], events[1::2]))
+
+
+def test_silero_vad_stream(tmp_path: Path) -> None:
+    segments = asyncio.run(detect_speech(os.path.join(os.path.dirname(__file__), "test.wav")))
+
+    # --- Segments are in order and don't overlap ---
+    assert len(segments) >= 1
+    prev_end = 0.0
+    for start, end in segments:
+        assert prev_end <= start.timestamp <= end.timestamp
+        assert start.speech_duration > 0
+        prev_end = end.timestamp
+
+    # --- Save the speech, the sample files are left untouched ---
+    out_path = tmp_path / "speech_only.wav"
+    with wave.open(str(out_path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        for _, end in segments:
+            f.writeframes(bytes(end.frames[0].data))
+
+    with wave.open(str(out_path), "rb") as f:
+        assert f.getnframes() == sum(end.frames[0].samples_per_channel for _, end in segments)
@@ -0,0 +1,217 @@
+"""Binary, memory-mapped storage of the knowledge base embeddings.
+
+Layout of a store directory (written by `build_index.py`):
+
+    manifest.json    format version, dtype, dimension, row count, embedding model and
+                     a hash of the indexed content
+    embeddings.npy   (count, dim) float32/float16 matrix, rows are L2-normalized
+    nodes.json       one entry per row: node id, ref doc id, text and metadata
+    sources.json     (incremental builds) hash and node ids of every source file
+    catalog.npz      structured package columns for exact filters (see catalog.py)
+
+The matrix is opened with `mmap_mode="r"`, so loading is O(1) and every process of the
+worker shares the same pages instead of parsing its own copy of the llama-index JSON.
+
+Rebuilt stores are written to a new generation directory next to the store, and the store
+path (a symlink) is swapped to it atomically, see `publish`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+
+FORMAT_VERSION = 1
+DEFAULT_EMBED_MODEL = "text-embedding-ada-002"  # llama-index default
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+NODES_FILE = "nodes.json"
+
+Dtype = Literal["float32", "float16"]
+
+
+@dataclass
+class Node:
+    id: str
+    text: str
+    ref_doc_id: str | None = None
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Manifest:
+    dim: int
+    count: int
+    dtype: Dtype
+    embed_model: str
+    version: int = FORMAT_VERSION
+    content_hash: str = ""
+
+
+class VectorStore:
+    def __init__(self, *, manifest: Manifest, embeddings: np.ndarray, nodes: list[Node]) -> None:
+        if embeddings.shape != (manifest.count, manifest.dim):
+            raise ValueError(
+                f"embeddings shape {embeddings.shape} doesn't match the manifest "
+                f"({manifest.count}, {manifest.dim})"
+            )
+        if len(nodes) != manifest.count:
+            raise ValueError(f"expected {manifest.count} nodes, got {len(nodes)}")
+
+        self._manifest = manifest
+        self._embeddings = embeddings
+        self._nodes = nodes
+
+    @classmethod
+    def open(cls, path: str | os.PathLike[str]) -> VectorStore:
+        path = Path(path)
+        manifest = Manifest(**json.loads((path / MANIFEST_FILE).read_text()))
+        if manifest.version != FORMAT_VERSION:
+            raise ValueError(f"unsupported vector store version {manifest.version}")
+
+        embeddings = np.load(path / EMBEDDINGS_FILE, mmap_mode="r")
+        with open(path / NODES_FILE, encoding="utf-8") as f:
+            nodes = [Node(**n) for n in json.load(f)]
+
+        return cls(manifest=manifest, embeddings=embeddings, nodes=nodes)
+
+    @staticmethod
+    def exists(path: str | os.PathLike[str]) -> bool:
+        return (Path(path) / MANIFEST_FILE).exists()
+
+    @property
+    def manifest(self) -> Manifest:
+        return self._manifest
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """(count, dim) read-only matrix of L2-normalized embeddings"""
+        return self._embeddings
+
+    @property
+    def nodes(self) -> list[Node]:
+        return self._nodes
+
+    def __len__(self) -> int:
+        return self._manifest.count
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def content_hash(nodes: list[Node], embed_model: str) -> str:
+    h = hashlib.sha256(embed_model.encode())
+    for node in nodes:
+        h.update(bytes.fromhex(chunk_hash(node.text)))
+    return h.hexdigest()[:16]
+
+
+def write(
+    path: str | os.PathLike[str],
+    *,
+    embeddings: np.ndarray,
+    nodes: list[Node],
+    dtype: Dtype = "float32",
+    embed_model: str = DEFAULT_EMBED_MODEL,
+) -> Manifest:
+    """Write a store, the rows are normalized so cosine similarity is a dot product"""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim != 2:
+        raise ValueError("embeddings must be a 2D matrix")
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.maximum(norms, 1e-12)
+
+    manifest = Manifest(
+        dim=matrix.shape[1],
+        count=matrix.shape[0],
+        dtype=dtype,
+        embed_model=embed_model,
+        content_hash=content_hash(nodes, embed_model),
+    )
+    np.save(path / EMBEDDINGS_FILE, matrix.astype(dtype))
+    with open(path / NODES_FILE, "w", encoding="utf-8") as f:
+        json.dump([n.__dict__ for n in nodes], f, ensure_ascii=False)
+    # written last, a store without manifest is ignored
+    (path / MANIFEST_FILE).write_text(json.dumps(manifest.__dict__, indent=2))
+    return manifest
+
+
+def convert_llama_index(
+    persist_dir: str | os.PathLike[str],
+    path: str | os.PathLike[str],
+    *,
+    dtype: Dtype = "float32",
+    embed_model: str = DEFAULT_EMBED_MODEL,
+) -> Manifest:
+    """Convert a llama-index persist dir (simple vector store + docstore) to a binary store"""
+    persist_dir = Path(persist_dir)
+    with open(persist_dir / "default__vector_store.json", encoding="utf-8") as f:
+        vector_data = json.load(f)
+    with open(persist_dir / "docstore.json", encoding="utf-8") as f:
+        docstore = json.load(f)["docstore/data"]
+
+    embedding_dict: dict[str, list[float]] = vector_data["embedding_dict"]
+    ref_doc_ids: dict[str, str] = vector_data.get("text_id_to_ref_doc_id", {})
+
+    ids = list(embedding_dict)
+    nodes = []
+    for node_id in ids:
+        data = docstore[node_id]["__data__"]
+        nodes.append(
+            Node(
+                id=node_id,
+                text=data.get("text", ""),
+                ref_doc_id=ref_doc_ids.get(node_id),
+                metadata=data.get("metadata", {}),
+            )
+        )
+
+    embeddings = np.array([embedding_dict[i] for i in ids], dtype=np.float32)
+    return write(path, embeddings=embeddings, nodes=nodes, dtype=dtype, embed_model=embed_model)
+
+
+def new_generation(path: str | os.PathLike[str]) -> Path:
+    """Empty directory to write the next version of the store at `path` into"""
+    path = Path(path)
+    generation = path.with_name(f".{path.name}-{time.time_ns():x}")
+    generation.mkdir(parents=True)
+    return generation
+
+
+def publish(path: str | os.PathLike[str], generation: str | os.PathLike[str]) -> None:
+    """Atomically point the store `path` at `generation` and delete the previous version.
+
+    `path` is a symlink replaced with `os.replace`, readers see either the old or the new
+    store, never a mix. Processes that already opened the old store keep their mapping.
+    """
+    path, generation = Path(path), Path(generation)
+    previous: Path | None = None
+    if path.is_symlink():
+        previous = path.resolve()
+    elif path.exists():
+        # plain directory (written by `convert_llama_index`), becomes a generation once
+        previous = path.with_name(f".{path.name}-{time.time_ns():x}")
+        os.replace(path, previous)
+
+    link = path.with_name(f".{path.name}.link-{os.getpid()}")
+    if link.is_symlink():
+        link.unlink()
+    os.symlink(generation.name, link, target_is_directory=True)
+    os.replace(link, path)
+
+    if previous is not None and previous != generation.resolve():
+        shutil.rmtree(previous, ignore_errors=True)